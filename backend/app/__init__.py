@@ -1,46 +1,137 @@
 # app/__init__.py
+import threading
+import time
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
-from neo4j import GraphDatabase
 from .core.config import Config
+from .core.lifecycle import HealthMonitor, LazyService, ProbeSkipped
+from .core.logger import configure_logging, get_logger
+from .core.metrics import REGISTRY, span
+from .services.graph_analytics import build_analytics_scheduler
+from .services.graph_search import SearchIndex
 from .services.graph_service import GraphService
+from .services.graph_session import SessionManager, create_driver
+from .services.query_governor import QueryGovernor
+from .services.change_feed import ChangeFeed
+from .services.cypher_normalizer import StatementRegistry
 from .services.llm_service import LLMService  # 添加这行导入
-from .services.deepseek_service import DeepSeekService
 # 导入蓝图和需要初始化的服务实例
 from .routes import api as api_routes
 
-def create_app():
+log = get_logger(__name__)
+
+def create_app(start_background: bool = True):
     """
     应用工厂函数: 创建并配置Flask应用
+    所有服务都延迟初始化，健康检查在后台线程中执行，不阻塞启动
+    start_background 为False时不启动任何后台任务（健康检查、索引同步、图指标、搜索索引），
+    用于调试模式下只负责监视文件并重启子进程的 reloader 父进程
     """
+    started = time.perf_counter()
     app = Flask(__name__)
     CORS(app) # 为所有路由启用CORS
 
     # 1. 从config对象加载配置
     app.config.from_object(Config)
+    configure_logging(
+        level=app.config['LOG_LEVEL'],
+        sample_rate=app.config['LOG_SAMPLE_RATE'],
+        max_length=app.config['LOG_MAX_LENGTH']
+    )
+    # jsonify 的序列化耗时计入 json_serialize 阶段
+    app.json = InstrumentedJSONProvider(app)
 
     # 2. 初始化数据库驱动
     # 我们在这里创建唯一的driver实例，并传递给服务层
-    driver = GraphDatabase.driver(
-        app.config['NEO4J_URI'],
-        auth=(app.config['NEO4J_USER'], app.config['NEO4J_PASSWORD'])
-    )
+    driver = create_driver(Config)
     driver.close_on_exit = True
+    # 所有服务共享同一个会话管理层，从而共享因果一致性书签：
+    # 某个服务写入后，其他服务的读取一定能看到这次写入
+    sessions = SessionManager(driver, database=app.config['NEO4J_DATABASE'])
 
     # 3. 初始化所有服务
+    governor = None
+    if app.config['QUERY_GOVERNOR_ENABLED']:
+        governor = QueryGovernor(
+            sessions,
+            max_estimated_rows=app.config['QUERY_MAX_ESTIMATED_ROWS'],
+            timeout=app.config['QUERY_TIMEOUT'],
+            max_rows=app.config['QUERY_MAX_ROWS']
+        )
+
+    # 自定义Cypher查询的语句形态登记表，用于估算执行计划缓存命中率
+    registry = None
+    if app.config['STATEMENT_REGISTRY_SIZE'] > 0:
+        registry = StatementRegistry(max_shapes=app.config['STATEMENT_REGISTRY_SIZE'])
+
+    # 图数据变更流：写操作的增量推送给打开的可视化页面
+    change_feed = ChangeFeed(capacity=app.config['CHANGE_FEED_SIZE']) if app.config['CHANGE_FEED_SIZE'] > 0 else None
+
     # 将driver实例注入到GraphService中
-    api_routes.graph_service = GraphService(driver)
+    api_routes.graph_service = GraphService(
+        sessions,
+        governor=governor,
+        cache_size=app.config['GRAPH_CACHE_SIZE'],
+        cache_ttl=app.config['GRAPH_CACHE_TTL'],
+        node_cache_size=app.config['NODE_DETAIL_CACHE_SIZE'],
+        ingest_batch_size=app.config['INGEST_BATCH_SIZE'],
+        community_categories=app.config['GRAPH_COMMUNITY_CATEGORIES'],
+        registry=registry,
+        change_feed=change_feed,
+        change_max_entities=app.config['CHANGE_FEED_MAX_ENTITIES'],
+        max_graph_nodes=app.config['GRAPH_MAX_NODES'],
+        max_page_size=app.config['GRAPH_PAGE_MAX_SIZE'],
+        max_fanout=app.config['TRAVERSAL_MAX_FANOUT'],
+        max_traversal_nodes=app.config['TRAVERSAL_MAX_NODES'],
+        max_frontier=app.config['TRAVERSAL_MAX_FRONTIER']
+    )
     api_routes.llm_service = LLMService() # 重新添加这行
     
-    # 初始化DeepSeek服务
-    try:
-        api_routes.deepseek_service = DeepSeekService()
-        print("✅ DeepSeek服务初始化成功")
-    except Exception as e:
-        print(f"❌ DeepSeek服务初始化失败: {e}")
-        print(f"   错误详情: {type(e).__name__}")
-        # 创建一个空的服务以避免NoneType错误
-        api_routes.deepseek_service = None
+    # DeepSeek服务在第一次使用时才初始化
+    api_routes.deepseek_service = LazyService("DeepSeek", _create_deepseek_service)
+
+    # 后台健康检查：/api/ping 只读取缓存的结果，不触发网络调用
+    monitor = HealthMonitor(interval=app.config['HEALTH_CHECK_INTERVAL'])
+    monitor.register("neo4j", driver.verify_connectivity)
+    monitor.register("deepseek", lambda: _probe_deepseek(api_routes.deepseek_service))
+    api_routes.health_monitor = monitor
+    if start_background and app.config['HEALTH_CHECK_ON_STARTUP']:
+        monitor.start()
+
+    # 索引与约束在后台线程中同步，不阻塞启动
+    if start_background and app.config['SCHEMA_APPLY_ON_STARTUP']:
+        threading.Thread(target=_apply_schema, args=(api_routes.graph_service,),
+                         name="schema-apply", daemon=True).start()
+
+    # 图指标在后台线程中定期计算并写回节点属性，写操作后增量更新
+    if app.config['ANALYTICS_ENABLED']:
+        scheduler = build_analytics_scheduler(
+            sessions,
+            on_complete=api_routes.graph_service.apply_analytics,
+            interval=app.config['ANALYTICS_INTERVAL'],
+            debounce=app.config['ANALYTICS_DEBOUNCE'],
+            run_on_start=app.config['ANALYTICS_RUN_ON_STARTUP'],
+            backend=app.config['ANALYTICS_BACKEND'],
+            betweenness_samples=app.config['ANALYTICS_BETWEENNESS_SAMPLES'],
+            batch_size=app.config['INGEST_BATCH_SIZE']
+        )
+        api_routes.graph_service.add_write_listener(scheduler.mark_dirty)
+        api_routes.analytics_scheduler = scheduler
+        if start_background:
+            scheduler.start()
+
+    # 实体搜索索引：写操作后标记过期，下次搜索时在后台重建
+    search_index = SearchIndex(sessions, fuzzy=app.config['SEARCH_FUZZY'],
+                               rebuild_interval=app.config['SEARCH_REBUILD_INTERVAL'])
+    api_routes.graph_service.add_write_listener(search_index.mark_stale)
+    api_routes.search_index = search_index
+    if start_background and app.config['SEARCH_INDEX_ON_STARTUP']:
+        threading.Thread(target=_build_search_index, args=(search_index,),
+                         name="search-index", daemon=True).start()
+
+    # /api/metrics 抓取时读取各服务已有的统计
+    REGISTRY.register_collector("services", lambda: _service_metrics(api_routes))
 
     # 4. 注册蓝图
     app.register_blueprint(api_routes.api_blueprint)
@@ -49,4 +140,87 @@ def create_app():
     def index():
         return "<h1>欢迎来到科研人脉网络API!</h1><p>请访问 /api/ping 或 /api/db-test 测试服务状态。</p>"
 
-    return app
\ No newline at end of file
+    app.config['STARTUP_DURATION_MS'] = round((time.perf_counter() - started) * 1000, 1)
+    log.info("🚀 应用启动完成，用时 %s ms", app.config['STARTUP_DURATION_MS'])
+    return app
+
+
+class InstrumentedJSONProvider(DefaultJSONProvider):
+    """记录 jsonify 序列化耗时的 JSON Provider"""
+
+    def dumps(self, obj, **kwargs) -> str:
+        with span("json_serialize"):
+            return super().dumps(obj, **kwargs)
+
+
+def _service_metrics(routes) -> list:
+    """采集各服务的缓存、队列和计划缓存统计，格式见 MetricsRegistry"""
+    samples = []
+    graph_service = routes.graph_service
+    if graph_service is not None:
+        samples.append(("graph_version", "gauge", "图数据版本号（每次写操作后递增）", None, graph_service.graph_version))
+        for name, cache in (("graph", graph_service._graph_cache), ("node", graph_service._node_cache),
+                            ("traversal", graph_service._traversal_cache)):
+            samples.append(("cache_hits_total", "counter", "内存缓存命中次数", {"cache": name}, cache.hits))
+            samples.append(("cache_misses_total", "counter", "内存缓存未命中次数", {"cache": name}, cache.misses))
+            samples.append(("cache_entries", "gauge", "内存缓存条目数", {"cache": name}, len(cache)))
+        if graph_service.registry is not None:
+            stats = graph_service.registry.stats(limit=0)
+            samples.append(("statement_shapes", "gauge", "登记的语句形态数", None, stats["shapes"]))
+            samples.append(("statement_executions_total", "counter", "自定义Cypher执行次数", None, stats["executions"]))
+            samples.append(("statement_plan_cache_hits_total", "counter", "估算的执行计划缓存命中次数", None, stats["hits"]))
+        if graph_service.change_feed is not None:
+            stats = graph_service.change_feed.stats()
+            samples.append(("change_feed_deltas_total", "counter", "发布到变更流的增量数", None, stats["published"]))
+            samples.append(("change_feed_resets_total", "counter", "要求客户端重新获取的增量数", None, stats["resets"]))
+            samples.append(("change_feed_waiting", "gauge", "正在等待变更的长轮询/SSE连接数", None, stats["waiting"]))
+
+    search_index = routes.search_index
+    if search_index is not None:
+        status = search_index.status()
+        samples.append(("search_index_entities", "gauge", "搜索索引中的实体数", None, status["entities"]))
+        samples.append(("search_index_build_seconds", "gauge", "最近一次构建搜索索引的耗时（秒）", None,
+                        status["build_seconds"]))
+
+    # DeepSeek服务尚未初始化时不触发初始化
+    lazy = routes.deepseek_service
+    if lazy is not None and lazy.initialized:
+        service = lazy.get()
+        for name, value in service.executor.stats().items():
+            kind = "gauge" if name in ("in_flight", "max_concurrency", "max_pending") else "counter"
+            metric = f"llm_{name}" if kind == "gauge" else f"llm_requests_{name}_total"
+            samples.append((metric, kind, f"LLM执行器统计: {name}", None, value))
+        if service.cache is not None:
+            stats = service.cache.stats()
+            samples.append(("translation_cache_hits_total", "counter", "翻译缓存命中次数", None, stats["hits"]))
+            samples.append(("translation_cache_misses_total", "counter", "翻译缓存未命中次数", None, stats["misses"]))
+    return samples
+
+
+def _apply_schema(graph_service: GraphService):
+    try:
+        graph_service.apply_schema()
+    except Exception as e:
+        log.error("❌ 同步索引与约束失败: %s", e)
+
+
+def _build_search_index(search_index: SearchIndex):
+    try:
+        search_index.refresh()
+    except Exception as e:
+        log.error("❌ 构建搜索索引失败: %s", e)
+
+
+def _create_deepseek_service():
+    # 在这里才导入，避免启动时加载openai客户端
+    from .services.deepseek_service import DeepSeekService
+    return DeepSeekService()
+
+
+def _probe_deepseek(lazy_service: LazyService):
+    # 只探测已经被真实请求初始化的服务，不在后台提前创建
+    if not lazy_service.initialized:
+        if lazy_service.error:
+            raise RuntimeError(lazy_service.error)
+        raise ProbeSkipped("DeepSeek服务尚未使用")
+    lazy_service.get()._test_connection()
\ No newline at end of file
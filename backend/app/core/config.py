@@ -1,27 +1,14 @@
 import os
 from typing import Optional
 
-# 调试：打印当前工作目录和环境变量
-print(f"🔍 当前工作目录: {os.getcwd()}")
-print(f"🔍 环境变量中的DEEPSEEK_API_KEY: {bool(os.getenv('DEEPSEEK_API_KEY'))}")
-
-# 尝试加载 .env 文件
+# 尝试加载 .env 文件（导入时不打印、不做额外探测，调试信息见 Config.debug_print）
+env_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
 try:
     from dotenv import load_dotenv
-    
-    # 明确指定.env文件路径
-    env_path = os.path.join(os.path.dirname(__file__), '..', '..', '.env')
-    print(f"🔍 尝试加载.env文件: {env_path}")
-    print(f"🔍 .env文件是否存在: {os.path.exists(env_path)}")
-    
     load_dotenv(env_path)
-    print("✅ .env 文件加载成功")
-    
-    # 再次检查环境变量
-    print(f"🔍 加载后的DEEPSEEK_API_KEY: {bool(os.getenv('DEEPSEEK_API_KEY'))}")
-    
 except ImportError:
-    print("⚠️  python-dotenv 未安装，将使用系统环境变量")
+    # python-dotenv 未安装，使用系统环境变量
+    pass
 
 class Config:
     """存放所有配置"""
@@ -29,16 +16,106 @@ class Config:
     NEO4J_URI = os.environ.get("NEO4J_URI", "bolt://localhost:7687")
     NEO4J_USER = os.environ.get("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD = os.environ.get("NEO4J_PASSWORD", "neo4j12345678")
+    # 目标数据库，为空时使用服务器的默认数据库
+    NEO4J_DATABASE = os.environ.get("NEO4J_DATABASE") or None
+    # 连接池大小与获取连接的超时时间（秒）
+    NEO4J_MAX_POOL_SIZE = int(os.environ.get("NEO4J_MAX_POOL_SIZE", "100"))
+    NEO4J_ACQUISITION_TIMEOUT = float(os.environ.get("NEO4J_ACQUISITION_TIMEOUT", "60"))
+    # 托管读/写事务遇到可重试错误时的最长重试时间（秒）
+    NEO4J_MAX_RETRY_TIME = float(os.environ.get("NEO4J_MAX_RETRY_TIME", "30"))
+
+    # 启动与健康检查配置
+    HEALTH_CHECK_ON_STARTUP: bool = os.getenv("HEALTH_CHECK_ON_STARTUP", "true").lower() == "true"
+    HEALTH_CHECK_INTERVAL: int = int(os.getenv("HEALTH_CHECK_INTERVAL", "300"))  # 后台探测间隔（秒），0表示只探测一次
+
+    # ECharts 图快照缓存配置
+    GRAPH_CACHE_SIZE = int(os.getenv("GRAPH_CACHE_SIZE", "32"))
+    GRAPH_CACHE_TTL = int(os.getenv("GRAPH_CACHE_TTL", "300"))
+    NODE_DETAIL_CACHE_SIZE = int(os.getenv("NODE_DETAIL_CACHE_SIZE", "1024"))
+
+    # 图数据接口的参数上限，客户端传入更大的值时按上限处理
+    GRAPH_MAX_NODES = int(os.getenv("GRAPH_MAX_NODES", "2000"))           # /api/graph-data 的 limit 上限
+    GRAPH_PAGE_MAX_SIZE = int(os.getenv("GRAPH_PAGE_MAX_SIZE", "1000"))   # /api/graph-data/page 每页最多节点数
+    TRAVERSAL_MAX_FANOUT = int(os.getenv("TRAVERSAL_MAX_FANOUT", "500"))      # /api/path、/api/neighborhood 每个节点最多展开的关系数
+    TRAVERSAL_MAX_NODES = int(os.getenv("TRAVERSAL_MAX_NODES", "2000"))       # /api/neighborhood 最多返回的节点数
+    TRAVERSAL_MAX_FRONTIER = int(os.getenv("TRAVERSAL_MAX_FRONTIER", "5000")) # /api/path 双向BFS每层前沿最多节点数
+
+    # 启动时在后台同步索引与约束
+    SCHEMA_APPLY_ON_STARTUP: bool = os.getenv("SCHEMA_APPLY_ON_STARTUP", "true").lower() == "true"
+
+    # 图指标（PageRank、度数、介数、社区）预计算配置
+    ANALYTICS_ENABLED: bool = os.getenv("ANALYTICS_ENABLED", "true").lower() == "true"
+    ANALYTICS_BACKEND = os.getenv("ANALYTICS_BACKEND", "auto")                      # auto | numpy | gds
+    ANALYTICS_INTERVAL = int(os.getenv("ANALYTICS_INTERVAL", "3600"))               # 完整重新计算的间隔（秒）
+    ANALYTICS_RUN_ON_STARTUP: bool = os.getenv("ANALYTICS_RUN_ON_STARTUP", "false").lower() == "true"  # 启动时立即完整计算一次（每个工作进程都会执行）
+    ANALYTICS_DEBOUNCE = int(os.getenv("ANALYTICS_DEBOUNCE", "30"))                 # 写操作后等待多久再增量计算（秒）
+    ANALYTICS_BETWEENNESS_SAMPLES = int(os.getenv("ANALYTICS_BETWEENNESS_SAMPLES", "64"))  # 介数近似的抽样源点数
+    GRAPH_COMMUNITY_CATEGORIES = int(os.getenv("GRAPH_COMMUNITY_CATEGORIES", "12"))  # 按社区分类的类别数，0表示按标签分类
+
+    # 图数据变更流配置（/api/graph/changes）
+    CHANGE_FEED_SIZE = int(os.getenv("CHANGE_FEED_SIZE", "1000"))                  # 环形缓冲区保留的增量个数，为0时不启用
+    CHANGE_FEED_MAX_ENTITIES = int(os.getenv("CHANGE_FEED_MAX_ENTITIES", "500"))   # 单个增量最多携带的实体数，超出时要求客户端重新获取
+    CHANGE_FEED_POLL_TIMEOUT = float(os.getenv("CHANGE_FEED_POLL_TIMEOUT", "25"))  # 长轮询最长等待时间（秒），也是SSE心跳间隔
+    CHANGE_FEED_STREAM_DURATION = float(os.getenv("CHANGE_FEED_STREAM_DURATION", "300"))  # 单个SSE连接的最长时间（秒），之后由浏览器自动重连
+
+    # 实体搜索索引配置
+    SEARCH_INDEX_ON_STARTUP: bool = os.getenv("SEARCH_INDEX_ON_STARTUP", "true").lower() == "true"  # 启动时在后台构建
+    SEARCH_FUZZY: bool = os.getenv("SEARCH_FUZZY", "true").lower() == "true"  # 英文词的模糊（拼写错误）匹配
+    SEARCH_REBUILD_INTERVAL = float(os.getenv("SEARCH_REBUILD_INTERVAL", "30"))  # 写入后两次重建索引的最小间隔（秒）
+
+    # 批量写入配置
+    INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "5000"))    # 每个事务写入的行数
+
+    # Cypher 查询守卫配置（/api/cypher 与 /api/ai-cypher）
+    QUERY_GOVERNOR_ENABLED: bool = os.getenv("QUERY_GOVERNOR_ENABLED", "true").lower() == "true"
+    QUERY_MAX_ESTIMATED_ROWS = int(os.getenv("QUERY_MAX_ESTIMATED_ROWS", "1000000"))  # 查询计划中任一算子的预估行数上限
+    QUERY_TIMEOUT = float(os.getenv("QUERY_TIMEOUT", "30"))                            # 事务超时（秒）
+    QUERY_MAX_ROWS = int(os.getenv("QUERY_MAX_ROWS", "10000"))                         # 非流式查询最多返回的行数
+
+    # 日志与指标配置
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")                           # DEBUG 时输出每个请求的查询、参数和模型输出
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))        # DEBUG 明细日志的采样比例
+    LOG_MAX_LENGTH: int = int(os.getenv("LOG_MAX_LENGTH", "2000"))             # 单条日志的最大字符数，超出部分截断
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # 是否开放 /api/metrics
+
+    # 模型生成语句的字面量参数化与语句形态统计
+    CYPHER_NORMALIZE_AI: bool = os.getenv("CYPHER_NORMALIZE_AI", "true").lower() == "true"  # 执行前把字面量提取为参数
+    STATEMENT_REGISTRY_SIZE = int(os.getenv("STATEMENT_REGISTRY_SIZE", "1000"))  # 与数据库的 server.db.query_cache_size 保持一致，为0时不统计
+
+    # Cypher 流式查询配置
+    CYPHER_STREAM_MAX_ROWS = int(os.getenv("CYPHER_STREAM_MAX_ROWS", "100000"))
+    CYPHER_STREAM_FETCH_SIZE = int(os.getenv("CYPHER_STREAM_FETCH_SIZE", "1000"))
 
     # DeepSeek API 配置
     DEEPSEEK_API_KEY: Optional[str] = os.getenv("DEEPSEEK_API_KEY")
     DEEPSEEK_BASE_URL: str = os.getenv("DEEPSEEK_BASE_URL", "https://api.deepseek.com")
     DEEPSEEK_MODEL: str = os.getenv("DEEPSEEK_MODEL", "deepseek-chat")
 
+    # LLM 调用执行器配置
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))      # 同时在途的上游请求数
+    LLM_MAX_PENDING: int = int(os.getenv("LLM_MAX_PENDING", "64"))             # 允许排队的请求数
+    LLM_POOL_CONNECTIONS: int = int(os.getenv("LLM_POOL_CONNECTIONS", "16"))   # HTTP连接池大小
+    LLM_REQUEST_TIMEOUT: float = float(os.getenv("LLM_REQUEST_TIMEOUT", "30"))  # 单个请求超时（秒）
+
+    # /api/ai-cypher/batch 配置
+    AI_BATCH_MAX_INPUTS: int = int(os.getenv("AI_BATCH_MAX_INPUTS", "500"))   # 单次请求最多的输入条数
+    CYPHER_BATCH_CHUNK_SIZE: int = int(os.getenv("CYPHER_BATCH_CHUNK_SIZE", "100"))  # 每个写事务执行的语句数
+
+    # 自然语言 -> Cypher 翻译缓存配置
+    TRANSLATION_CACHE_ENABLED: bool = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+    TRANSLATION_CACHE_PATH: str = os.getenv(
+        "TRANSLATION_CACHE_PATH",
+        os.path.join(os.path.dirname(__file__), '..', '..', 'data', 'translation_cache.sqlite3')
+    )
+    TRANSLATION_CACHE_MAX_ENTRIES: int = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "10000"))
+    # 为True时，自然语言翻译出的写语句（MERGE/CREATE/DELETE等）不走缓存；/api/ai-cypher/extract 的抽取结果不受影响
+    TRANSLATION_CACHE_BYPASS_WRITES: bool = os.getenv("TRANSLATION_CACHE_BYPASS_WRITES", "true").lower() == "true"
+
     @classmethod
     def debug_print(cls):
         """调试打印所有配置"""
         print("🔍 当前配置状态:")
+        print(f"   .env文件: {env_path} ({'存在' if os.path.exists(env_path) else '不存在'})")
         print(f"   DEEPSEEK_API_KEY: {'已设置' if cls.DEEPSEEK_API_KEY else '❌ 未设置'}")
         if cls.DEEPSEEK_API_KEY:
             print(f"   API密钥前缀: {cls.DEEPSEEK_API_KEY[:10]}...")
@@ -0,0 +1,112 @@
+# app/core/lifecycle.py
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from .logger import get_logger
+
+log = get_logger(__name__)
+
+
+class LazyService:
+    """
+    延迟初始化的服务容器：第一次调用 get() 时才创建服务实例。
+    创建失败时缓存错误信息，retry_interval 秒后再次调用 get() 才会重试。
+    """
+
+    def __init__(self, name: str, factory: Callable, retry_interval: float = 30.0):
+        self.name = name
+        self._factory = factory
+        self._retry_interval = retry_interval
+        self._instance = None
+        self._error: Optional[str] = None
+        self._failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """返回服务实例，创建失败时返回None"""
+        if self._instance is not None:
+            return self._instance
+        with self._lock:
+            if self._instance is not None:
+                return self._instance
+            if self._failed_at is not None and time.monotonic() - self._failed_at < self._retry_interval:
+                return None
+            try:
+                started = time.perf_counter()
+                self._instance = self._factory()
+                self._error = None
+                log.info("✅ %s服务初始化成功 (%.1f ms)", self.name, (time.perf_counter() - started) * 1000)
+            except Exception as e:
+                self._error = f"{type(e).__name__}: {e}"
+                self._failed_at = time.monotonic()
+                log.error("❌ %s服务初始化失败: %s", self.name, self._error)
+            return self._instance
+
+    @property
+    def initialized(self) -> bool:
+        return self._instance is not None
+
+    @property
+    def error(self) -> Optional[str]:
+        return self._error
+
+
+class ProbeSkipped(Exception):
+    """探测函数抛出它表示本次不探测（例如服务还没有被真实请求初始化），状态记为 skipped"""
+
+
+class HealthMonitor:
+    """
+    在后台线程中定期执行健康探测，并缓存最近一次的结果。
+    读取状态（snapshot）不会触发任何网络调用。
+    """
+
+    def __init__(self, interval: float = 300.0):
+        self.interval = interval
+        self._probes: Dict[str, Callable] = {}
+        self._status: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def register(self, name: str, probe: Callable) -> None:
+        """注册一个探测函数：正常返回表示健康，抛出 ProbeSkipped 表示跳过，抛出其他异常表示不可用"""
+        self._probes[name] = probe
+        self._status[name] = {"status": "unknown", "checked_at": None, "latency_ms": None, "error": None}
+
+    def run_once(self) -> None:
+        for name, probe in self._probes.items():
+            started = time.perf_counter()
+            try:
+                probe()
+                status = {"status": "ok", "error": None}
+            except ProbeSkipped as e:
+                status = {"status": "skipped", "error": str(e) or None}
+            except Exception as e:
+                status = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+            status["latency_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            status["checked_at"] = time.time()
+            with self._lock:
+                self._status[name] = status
+
+    def start(self) -> None:
+        """启动后台探测线程（daemon），不会阻塞调用方"""
+        if self._thread is not None:
+            return
+
+        def loop():
+            while True:
+                self.run_once()
+                if not self.interval or self._stop.wait(self.interval):
+                    break
+
+        self._thread = threading.Thread(target=loop, name="health-monitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: dict(status) for name, status in self._status.items()}
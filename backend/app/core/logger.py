@@ -0,0 +1,76 @@
+# app/core/logger.py
+import logging
+import random
+import sys
+
+ROOT_LOGGER = "app"
+
+# DEBUG 级别的明细日志（完整查询、参数、模型输出）按该比例采样
+_sample_rate = 1.0
+
+
+class _TruncatingFormatter(logging.Formatter):
+    """单条日志超过 max_length 个字符时截断，避免大结果集或长查询拖慢日志输出"""
+
+    def __init__(self, fmt: str, max_length: int):
+        super().__init__(fmt)
+        self.max_length = max_length
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super().formatMessage(record)
+        if self.max_length and len(message) > self.max_length:
+            return f"{message[:self.max_length]}...（共 {len(message)} 个字符）"
+        return message
+
+
+def configure_logging(level: str = "INFO", sample_rate: float = 1.0, max_length: int = 2000) -> None:
+    """配置应用日志：输出到标准错误，级别为 level，DEBUG 日志按 sample_rate 采样；重复调用只更新设置"""
+    global _sample_rate
+    _sample_rate = max(0.0, min(float(sample_rate), 1.0))
+
+    logger = logging.getLogger(ROOT_LOGGER)
+    logger.setLevel(getattr(logging, str(level).upper(), logging.INFO))
+    logger.propagate = False
+    formatter = _TruncatingFormatter("%(asctime)s %(levelname)s [%(name)s] %(message)s", max_length)
+    for handler in logger.handlers:
+        handler.setFormatter(formatter)
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(formatter)
+        logger.addHandler(handler)
+
+
+class SampledLogger:
+    """
+    分级、可采样的日志记录器：
+    - debug() 用于每个请求的明细（完整查询、参数、模型输出），只在 DEBUG 级别开启时按采样率输出
+    - info()/warning()/error() 总是输出（受日志级别控制）
+    参数按 logging 的 %s 方式延迟格式化，未输出的日志不会格式化大对象。
+    """
+
+    def __init__(self, name: str):
+        self._logger = logging.getLogger(name)
+
+    def debug(self, message: str, *args) -> None:
+        if self._logger.isEnabledFor(logging.DEBUG) and (_sample_rate >= 1.0 or random.random() < _sample_rate):
+            self._logger.debug(message, *args)
+
+    def info(self, message: str, *args) -> None:
+        self._logger.info(message, *args)
+
+    def warning(self, message: str, *args) -> None:
+        self._logger.warning(message, *args)
+
+    def error(self, message: str, *args) -> None:
+        self._logger.error(message, *args)
+
+    def exception(self, message: str, *args) -> None:
+        self._logger.exception(message, *args)
+
+    def is_debug(self) -> bool:
+        return self._logger.isEnabledFor(logging.DEBUG)
+
+
+def get_logger(name: str) -> SampledLogger:
+    """按模块名获取日志记录器，如 get_logger(__name__)"""
+    return SampledLogger(name)
@@ -0,0 +1,211 @@
+# app/core/metrics.py
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 耗时直方图的默认分桶（秒），覆盖从缓存命中到慢速模型调用
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Counter:
+    """只增不减的计数器，按标签值分别计数"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(tuple(labels.get(name, "") for name in self.labelnames), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram:
+    """分桶直方图（Prometheus 语义：桶为累计计数，另有 _sum 和 _count）"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> [各桶计数（非累计）..., +Inf 桶计数, 总和]
+        self._values: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def snapshot(self, **labels) -> Optional[dict]:
+        """某个标签组合的 count/sum，没有观测值时返回None"""
+        key = tuple(labels.get(name, "") for name in self.labelnames)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                return None
+            return {"count": sum(series[:-1]), "sum": series[-1]}
+
+    def render(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, list(series)) for key, series in self._values.items())
+        lines = []
+        for key, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {series[-1]:.6f}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    进程内指标注册表，按 Prometheus 文本格式（0.0.4）输出。
+    除了计数器和直方图，还可以注册采集函数，在抓取时读取各服务已有的统计（缓存命中数、在途请求数等），
+    采集函数返回 [(指标名, 类型, 说明, {标签: 值} 或 None, 数值)]。
+    """
+
+    def __init__(self, namespace: str = "rhizome"):
+        self.namespace = namespace
+        self._metrics: Dict[str, object] = {}
+        self._collectors: Dict[str, Callable[[], list]] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", help_text, labelnames))
+
+    def histogram(self, name: str, help_text: str, labelnames: Iterable[str] = (),
+                  buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", help_text, labelnames, buckets))
+
+    def register_collector(self, name: str, collector: Callable[[], list]) -> None:
+        """注册（或替换同名的）采集函数"""
+        self._collectors[name] = collector
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            samples = metric.render()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+
+        # 同一指标的所有样本必须连续输出，按指标名分组
+        groups: Dict[str, list] = {}
+        for collector in list(self._collectors.values()):
+            try:
+                samples = collector()
+            except Exception as e:
+                # 某个服务不可用时不影响其他指标的输出
+                lines.append(f"# collector error: {type(e).__name__}: {_escape(e)}")
+                continue
+            for name, kind, help_text, labels, value in samples:
+                if value is None:
+                    continue
+                name = f"{self.namespace}_{name}"
+                group = groups.setdefault(name, [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"])
+                labels = labels or {}
+                group.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+        for group in groups.values():
+            lines.extend(group)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+SPAN_SECONDS = REGISTRY.histogram("span_seconds", "各处理阶段的耗时（秒）", ("span",))
+HTTP_SECONDS = REGISTRY.histogram("http_request_seconds", "API请求耗时（秒）", ("endpoint", "method", "status"))
+HTTP_RESPONSE_BYTES = REGISTRY.counter("http_response_bytes_total", "API响应体字节数（不含流式响应）", ("endpoint",))
+RECORDS = REGISTRY.counter("records_total", "从Neo4j读取并转换的记录数", ("source",))
+LLM_TOKENS = REGISTRY.counter("llm_tokens_total", "模型调用消耗的token数", ("kind",))
+
+# 当前请求中已结束的阶段：[(阶段名, 耗时秒)]，由API层在请求开始时设置，用于输出 Server-Timing 响应头
+_request_spans: contextvars.ContextVar = contextvars.ContextVar("request_spans", default=None)
+
+
+def begin_request() -> None:
+    _request_spans.set([])
+
+
+def request_spans() -> list:
+    return _request_spans.get() or []
+
+
+@contextmanager
+def span(name: str):
+    """
+    计时一个处理阶段，写入 span_seconds 直方图；在请求上下文中同时记入该请求的阶段列表。
+    用法: with span("cypher_execute"): ...
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        SPAN_SECONDS.observe(elapsed, span=name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+
+def server_timing(spans: list) -> str:
+    """把阶段列表格式化为 Server-Timing 响应头（同名阶段累加），浏览器开发者工具中可以直接查看"""
+    totals: Dict[str, float] = {}
+    for name, elapsed in spans:
+        totals[name] = totals.get(name, 0.0) + elapsed
+    return ", ".join(f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in totals.items())
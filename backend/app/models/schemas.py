@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Dict, List, Optional
 
 class BaseResponseModel(BaseModel):
     """基础响应模型，定义通用返回格式"""
@@ -9,4 +9,24 @@ class BaseResponseModel(BaseModel):
 class NLPQueryRequest(BaseModel):
     """自然语言查询的请求体模型"""
     query_text: str = Field(..., min_length=1, description="用户输入的自然语言问题")
-    user_id: Optional[str] = Field(None, description="用于追踪会话的用户ID")
\ No newline at end of file
+    user_id: Optional[str] = Field(None, description="用于追踪会话的用户ID")
+    ingest: bool = Field(False, description="是否把解析出的实体批量写入图数据库")
+
+class PingResponse(BaseResponseModel):
+    """/api/ping 的返回格式，包含启动耗时和各服务的就绪状态"""
+    startup_ms: Optional[float] = None
+    services: Dict[str, dict] = Field(default_factory=dict)
+
+class AICypherBatchRequest(BaseModel):
+    """/api/ai-cypher/batch 的请求体模型"""
+    inputs: List[str] = Field(..., min_length=1, description="多条自然语言指令，每条生成一个Cypher语句")
+    use_cache: bool = Field(True, description="是否使用翻译缓存")
+    atomic: bool = Field(False, description="为True时所有语句在同一个事务中执行，任一失败则全部回滚")
+    chunk_size: Optional[int] = Field(None, ge=1, description="非atomic模式下每个事务执行的语句数")
+    max_concurrency: Optional[int] = Field(None, ge=1, description="同时调用模型的请求数上限")
+
+class AIExtractRequest(BaseModel):
+    """/api/ai-cypher/extract 的请求体模型"""
+    text: str = Field(..., min_length=1, description="一段或一篇描述科研人脉的文字")
+    use_cache: bool = Field(True, description="是否使用翻译缓存")
+    execute: bool = Field(True, description="为False时只返回抽取并校验后的语句，不写入数据库")
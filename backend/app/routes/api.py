@@ -1,25 +1,88 @@
 # app/routes/api.py
-from flask import Blueprint, jsonify, request
+import copy
+import time
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
 from pydantic import ValidationError
-from ..models.schemas import NLPQueryRequest, BaseResponseModel
+from ..models.schemas import AICypherBatchRequest, AIExtractRequest, NLPQueryRequest, BaseResponseModel, PingResponse
+from ..core.lifecycle import HealthMonitor, LazyService
+from ..core.logger import get_logger
+from ..core import metrics
+from ..services import graph_codec, record_codec
+from ..services.graph_analytics import AnalyticsScheduler
+from ..services.graph_search import SearchIndex
 # 注意，我们从.services导入具体的服务类
 from ..services.graph_service import GraphService
 from ..services.llm_service import LLMService
-from ..services.deepseek_service import DeepSeekService
-from ..services.deepseek_service import DeepSeekService
 
 # 使用 Flask 的 "蓝图" (Blueprint) 来组织路由，实现模块化
 api_blueprint = Blueprint('api', __name__, url_prefix='/api')
 
+log = get_logger(__name__)
+
 # 全局服务实例，将在应用工厂中被初始化
 graph_service: GraphService = None
 llm_service: LLMService = None
-deepseek_service: DeepSeekService = None
+deepseek_service: LazyService = None  # DeepSeekService，首次使用时初始化
+health_monitor: HealthMonitor = None
+search_index: SearchIndex = None
+analytics_scheduler: AnalyticsScheduler = None  # 图指标后台计算，ANALYTICS_ENABLED 为false时为None
+
+@api_blueprint.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
+    metrics.begin_request()
+
+@api_blueprint.after_request
+def _record_request_metrics(response):
+    """记录请求耗时和响应大小，并通过 Server-Timing 响应头返回本次请求各阶段的耗时"""
+    started = g.get('request_started')
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    # 使用路由模板作为标签，避免 /node/<id> 之类的路径产生无限多的时间序列
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    metrics.HTTP_SECONDS.observe(elapsed, endpoint=endpoint, method=request.method, status=response.status_code)
+    if not response.is_streamed and response.content_length is not None:
+        metrics.HTTP_RESPONSE_BYTES.inc(response.content_length, endpoint=endpoint)
+    spans = metrics.request_spans()
+    response.headers['Server-Timing'] = ", ".join(
+        filter(None, [metrics.server_timing(spans), f"total;dur={elapsed * 1000:.1f}"])
+    )
+    log.debug("%s %s -> %s (%.1f ms)", request.method, request.path, response.status_code, elapsed * 1000)
+    return response
+
+def _json_response(payload, status: int = 200) -> Response:
+    """用 record_codec.dumps（orjson 可用时）序列化查询结果，比 jsonify 快且输出紧凑"""
+    with metrics.span("json_serialize"):
+        body = record_codec.dumps(payload)
+    return Response(body, status=status, mimetype='application/json')
+
+def _entities_requested(request_data: dict) -> bool:
+    """请求体 "format": "entities" 时，结果中的节点、关系去重到 entities 表中，行里只保留引用"""
+    return request_data.get('format') == 'entities'
+
+def _get_deepseek_service():
+    """获取DeepSeek服务实例（首次调用时初始化），不可用时返回None"""
+    return deepseek_service.get() if deepseek_service is not None else None
 
 @api_blueprint.route('/ping', methods=['GET'])
 def ping():
-    """一个简单的测试端点"""
-    return jsonify(BaseResponseModel(message="pong!").model_dump())
+    """一个简单的测试端点，同时返回各服务的就绪状态（读取后台健康检查的缓存结果，不触发网络调用）"""
+    services = health_monitor.snapshot() if health_monitor else {}
+    if deepseek_service is not None and "deepseek" in services:
+        services["deepseek"]["initialized"] = deepseek_service.initialized
+    return jsonify(PingResponse(
+        message="pong!",
+        startup_ms=current_app.config.get('STARTUP_DURATION_MS'),
+        services=services
+    ).model_dump())
+
+@api_blueprint.route('/metrics', methods=['GET'])
+def prometheus_metrics():
+    """Prometheus 文本格式的指标：各阶段耗时、请求耗时、记录数、响应字节数及各服务的缓存与队列统计"""
+    if not current_app.config['METRICS_ENABLED']:
+        return jsonify(BaseResponseModel(status="error", message="指标采集未启用").model_dump()), 404
+    return Response(metrics.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @api_blueprint.route('/db-test', methods=['GET'])
 def db_test():
@@ -37,20 +100,266 @@ def query_handler():
         query_request = NLPQueryRequest(**request.json)
         # 1. 调用LLM服务解析实体
         entities = llm_service.parse_text_to_entities(query_request.query_text)
-        # 2. (未来) 调用Graph服务进行图查询或更新
-        # graph_service.process_entities(entities)
+        # 2. 按需调用Graph服务把实体批量写入图数据库
+        if query_request.ingest:
+            report = graph_service.process_entities(entities)
+            return jsonify({"entities": entities, "ingestion": report})
         return jsonify(entities)
     except ValidationError as e:
         return jsonify(BaseResponseModel(status="error", message=f"请求体校验失败: {e.errors()}").model_dump()), 400
     except Exception as e:
         return jsonify(BaseResponseModel(status="error", message=f"处理请求时发生错误: {str(e)}").model_dump()), 500
     
+def _list_arg(name: str):
+    """解析逗号分隔的查询参数，未提供时返回None"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
 @api_blueprint.route('/graph-data', methods=['GET'])
 def get_graph_data():
     """从Neo4j获取真实数据并返回给前端"""
     # 从服务层调用函数获取ECharts格式的数据
-    data = graph_service.get_graph_for_echarts(node_limit=50) # 可以调整查询数量
-    return jsonify(data)
+    node_limit = request.args.get('limit', default=50, type=int) # 可以调整查询数量，超过 GRAPH_MAX_NODES 时按上限处理
+    if node_limit < 1:
+        return jsonify(BaseResponseModel(status="error", message="limit 必须为正整数").model_dump()), 400
+    # 在查询前读取版本号：查询期间发生的写操作仍会出现在之后的变更流中
+    version = graph_service.graph_version
+    with_layout = request.args.get('layout', default='false').lower() in ('1', 'true', 'server')
+    # ?properties=name,affiliation 只返回指定的节点属性，完整属性通过 /api/node/<id> 按需获取
+    data, etag = graph_service.get_graph_snapshot(
+        node_limit=node_limit,
+        with_layout=with_layout,
+        node_properties=_list_arg('properties'),
+        link_properties=_list_arg('link_properties')
+    )
+
+    # 内容协商：Accept 为紧凑格式或 MessagePack（或 ?format=compact|msgpack）时返回列式的紧凑数据
+    fmt = graph_codec.negotiate_format(request.accept_mimetypes, request.args.get('format'))
+    if fmt == 'json':
+        response = jsonify(data)
+    else:
+        with metrics.span("graph_encode"):
+            body, mimetype = graph_codec.encode(graph_codec.to_compact(data), fmt)
+        body, content_encoding = graph_codec.compress(body, request.accept_encodings)
+        response = Response(body, mimetype=mimetype)
+        if content_encoding:
+            response.headers['Content-Encoding'] = content_encoding
+        if etag:
+            etag = f"{etag}-{fmt}" + (f"-{content_encoding}" if content_encoding else "")
+
+    # 返回格式取决于 Accept/Accept-Encoding，JSON 响应也要声明，避免缓存把紧凑格式发给普通客户端
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    # 客户端用这个版本号订阅之后的变更（/api/graph/changes）
+    response.headers['X-Graph-Version'] = str(version)
+    if graph_service.change_feed is not None:
+        response.headers['X-Graph-Epoch'] = graph_service.change_feed.epoch
+
+    if etag:
+        # 图未变化时客户端带 If-None-Match 请求会得到 304
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    return response
+
+@api_blueprint.route('/node/<path:element_id>', methods=['GET'])
+def get_node_detail(element_id):
+    """获取单个节点的完整属性"""
+    try:
+        detail = graph_service.get_node_detail(element_id)
+    except Exception as e:
+        return jsonify(BaseResponseModel(status="error", message=f"获取节点详情失败: {str(e)}").model_dump()), 500
+    if detail is None:
+        return jsonify(BaseResponseModel(status="error", message=f"节点不存在: {element_id}").model_dump()), 404
+    return jsonify(detail)
+
+@api_blueprint.route('/graph-data/page', methods=['GET'])
+def get_graph_data_page():
+    """分页、增量地获取图数据，使用返回的cursor继续加载下一页"""
+    try:
+        data = graph_service.get_graph_page(
+            cursor=request.args.get('cursor'),
+            page_size=request.args.get('page_size', default=50, type=int),
+            mode=request.args.get('mode', default='scan'),
+            label=request.args.get('label'),
+            seed=request.args.get('seed')
+        )
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify(BaseResponseModel(status="error", message=str(e)).model_dump()), 400
+    except Exception as e:
+        return jsonify(BaseResponseModel(status="error", message=f"分页获取图数据时发生错误: {str(e)}").model_dump()), 500
+
+def _change_cursor():
+    """
+    解析客户端已有的 (版本号, epoch)：SSE 重连时来自 Last-Event-ID（"epoch:version"），
+    否则来自 ?since=&epoch=；都没有时从当前版本开始
+    """
+    feed = graph_service.change_feed
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    if ':' in last_event_id:
+        epoch, _, version = last_event_id.rpartition(':')
+        if version.isdigit():
+            return int(version), epoch
+    since = request.args.get('since', type=int)
+    if since is None:
+        return feed.version, feed.epoch
+    return since, request.args.get('epoch')
+
+def _sse_event(event: str, payload: dict, event_id: str) -> bytes:
+    return b"id: " + event_id.encode() + b"\nevent: " + event.encode() + b"\ndata: " + record_codec.dumps(payload) + b"\n\n"
+
+@api_blueprint.route('/graph/changes', methods=['GET'])
+def get_graph_changes():
+    """
+    长轮询获取图数据的增量：?since=<X-Graph-Version>&epoch=<X-Graph-Epoch>&timeout=25
+    有新版本时立即返回 {"epoch", "version", "reset", "deltas"}，否则最多等待 timeout 秒后返回空的 deltas；
+    reset 为True时客户端应重新获取 /api/graph-data
+    """
+    feed = graph_service.change_feed
+    if feed is None:
+        return jsonify(BaseResponseModel(status="error", message="图数据变更流未启用").model_dump()), 404
+    version, epoch = _change_cursor()
+    max_timeout = current_app.config['CHANGE_FEED_POLL_TIMEOUT']
+    timeout = min(max(request.args.get('timeout', default=max_timeout, type=float), 0), max_timeout)
+    return _json_response(feed.wait(version, epoch, timeout=timeout) if timeout else feed.since(version, epoch))
+
+@api_blueprint.route('/graph/changes/stream', methods=['GET'])
+def stream_graph_changes():
+    """
+    以 Server-Sent Events 推送图数据的增量，参数同 /api/graph/changes。
+    事件: delta（一个版本的增量）、reset（需要重新获取 /api/graph-data）；
+    事件id为 "epoch:version"，浏览器断线重连时通过 Last-Event-ID 从断点继续
+    """
+    feed = graph_service.change_feed
+    if feed is None:
+        return jsonify(BaseResponseModel(status="error", message="图数据变更流未启用").model_dump()), 404
+    version, epoch = _change_cursor()
+    heartbeat = current_app.config['CHANGE_FEED_POLL_TIMEOUT']
+    deadline = time.monotonic() + current_app.config['CHANGE_FEED_STREAM_DURATION']
+
+    def events(version, epoch):
+        yield b"retry: 3000\n\n"
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                # 结束连接，浏览器会带着 Last-Event-ID 自动重连
+                return
+            reply = feed.wait(version, epoch, timeout=min(heartbeat, remaining))
+            event_id = f"{reply['epoch']}:{reply['version']}"
+            if reply["reset"]:
+                yield _sse_event("reset", reply, event_id)
+            elif reply["deltas"]:
+                for delta in reply["deltas"]:
+                    yield _sse_event("delta", delta, f"{reply['epoch']}:{delta['version']}")
+            else:
+                yield b": keep-alive\n\n"
+            version, epoch = reply["version"], reply["epoch"]
+
+    response = Response(stream_with_context(events(version, epoch)), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # 关闭反向代理的缓冲
+    return response
+
+@api_blueprint.route('/search', methods=['GET'])
+def search_entities():
+    """搜索学者、论文、学生和机构（输入联想），?q=&limit=10&labels=Scholar,Paper"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"results": [], "took_ms": 0})
+    started = time.perf_counter()
+    try:
+        results = search_index.search(
+            query,
+            limit=min(request.args.get('limit', default=10, type=int), 100),
+            labels=_list_arg('labels')
+        )
+    except Exception as e:
+        return jsonify(BaseResponseModel(status="error", message=f"搜索时发生错误: {str(e)}").model_dump()), 500
+    return jsonify({"results": results, "took_ms": round((time.perf_counter() - started) * 1000, 2)})
+
+@api_blueprint.route('/search/status', methods=['GET'])
+def get_search_status():
+    """查看搜索索引的大小与重建状态"""
+    return jsonify(search_index.status())
+
+def _positive_int_args(**defaults):
+    """读取整数查询参数（未提供时取默认值），返回 (参数字典, 错误信息)；有参数不是正整数时错误信息不为None"""
+    values = {name: request.args.get(name, default=default, type=int) for name, default in defaults.items()}
+    for name, value in values.items():
+        if value <= 0:
+            return values, f"{name} 必须为正整数"
+    return values, None
+
+@api_blueprint.route('/path', methods=['GET'])
+def get_shortest_path():
+    """查找两个节点之间的最短路径，?source=&target=&max_depth=&types=COLLABORATES_WITH,CITES&fanout="""
+    source, target = request.args.get('source'), request.args.get('target')
+    if not source or not target:
+        return jsonify(BaseResponseModel(status="error", message="source 和 target 不能为空").model_dump()), 400
+    # 超过服务端上限的值由 GraphService 截断
+    limits, error = _positive_int_args(max_depth=6, fanout=200)
+    if error:
+        return jsonify(BaseResponseModel(status="error", message=error).model_dump()), 400
+    try:
+        data = graph_service.get_shortest_path(source, target, rel_types=_list_arg('types'), **limits)
+        if request.args.get('layout', default='false').lower() in ('1', 'true', 'server'):
+            data = graph_service.apply_layout(copy.deepcopy(data))
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify(BaseResponseModel(status="error", message=str(e)).model_dump()), 404
+    except Exception as e:
+        return jsonify(BaseResponseModel(status="error", message=f"查找最短路径时发生错误: {str(e)}").model_dump()), 500
+
+@api_blueprint.route('/neighborhood', methods=['GET'])
+def get_neighborhood():
+    """获取节点的k跳邻域，?seed=&depth=2&types=&fanout=&max_nodes="""
+    seed = request.args.get('seed')
+    if not seed:
+        return jsonify(BaseResponseModel(status="error", message="seed 不能为空").model_dump()), 400
+    limits, error = _positive_int_args(depth=2, fanout=50, max_nodes=500)
+    if error:
+        return jsonify(BaseResponseModel(status="error", message=error).model_dump()), 400
+    try:
+        data = graph_service.get_neighborhood(seed, rel_types=_list_arg('types'), **limits)
+        if request.args.get('layout', default='false').lower() in ('1', 'true', 'server'):
+            data = graph_service.apply_layout(copy.deepcopy(data))
+        return jsonify(data)
+    except ValueError as e:
+        return jsonify(BaseResponseModel(status="error", message=str(e)).model_dump()), 404
+    except Exception as e:
+        return jsonify(BaseResponseModel(status="error", message=f"获取邻域时发生错误: {str(e)}").model_dump()), 500
+
+@api_blueprint.route('/schema', methods=['GET'])
+def get_schema_status():
+    """查看索引与约束的状态及填充进度"""
+    try:
+        return jsonify(graph_service.get_schema_status())
+    except Exception as e:
+        return jsonify(BaseResponseModel(status="error", message=f"获取索引状态失败: {str(e)}").model_dump()), 500
+
+@api_blueprint.route('/schema/apply', methods=['POST'])
+def apply_schema():
+    """幂等地创建所需的索引与约束"""
+    results = graph_service.apply_schema()
+    status_code = 200 if all(result["success"] for result in results) else 500
+    return jsonify({"success": status_code == 200, "results": results}), status_code
+
+@api_blueprint.route('/analytics', methods=['GET'])
+def get_analytics_status():
+    """查看图指标（PageRank、度数、介数、社区）的计算状态"""
+    if analytics_scheduler is None:
+        return jsonify({"enabled": False})
+    return jsonify({"enabled": True, **analytics_scheduler.status()})
+
+@api_blueprint.route('/analytics/run', methods=['POST'])
+def run_analytics():
+    """请求在后台重新计算图指标并写回节点属性，立即返回202；结果通过 GET /api/analytics 查看"""
+    if analytics_scheduler is None:
+        return jsonify(BaseResponseModel(status="error", message="图指标计算未启用").model_dump()), 400
+    analytics_scheduler.schedule()
+    return jsonify({"enabled": True, "scheduled": True, **analytics_scheduler.status()}), 202
 
 @api_blueprint.route('/cypher', methods=['POST'])
 def execute_cypher():
@@ -68,13 +377,35 @@ def execute_cypher():
                 "summary": {}
             }), 400
         
+        # 流式模式：以NDJSON逐行返回结果，最后一行是统计信息
+        if request_data.get('stream') or request.accept_mimetypes.best == 'application/x-ndjson':
+            limit = current_app.config['CYPHER_STREAM_MAX_ROWS']
+            try:
+                requested = request_data.get('max_rows')
+                max_rows = limit if requested is None else min(int(requested), limit)
+            except (TypeError, ValueError):
+                max_rows = 0
+            if max_rows < 1:
+                return jsonify({
+                    "success": False,
+                    "error": "max_rows 必须是正整数",
+                    "data": [],
+                    "summary": {}
+                }), 400
+            events = graph_service.stream_cypher_query(
+                cypher_query, parameters,
+                max_rows=max_rows,
+                fetch_size=current_app.config['CYPHER_STREAM_FETCH_SIZE']
+            )
+            lines = (record_codec.dumps(event) + b"\n" for event in events)
+            return Response(stream_with_context(lines), mimetype='application/x-ndjson')
+
         # 执行查询
-        result = graph_service.execute_cypher_query(cypher_query, parameters)
+        result = graph_service.execute_cypher_query(
+            cypher_query, parameters, entities=_entities_requested(request_data)
+        )
         
-        if result["success"]:
-            return jsonify(result)
-        else:
-            return jsonify(result), 400
+        return _json_response(result, 200 if result["success"] else 400)
             
     except Exception as e:
         return jsonify({
@@ -88,12 +419,10 @@ def execute_cypher():
 def ai_generate_and_execute_cypher():
     """AI生成Cypher语句并执行"""
     try:
-        print("🚀 收到AI-Cypher请求")
-        
         request_data = request.json
         user_input = request_data.get('user_input', '').strip()
         
-        print(f"📝 用户输入: {user_input}")
+        log.debug("🚀 收到AI-Cypher请求, 用户输入: %s", user_input)
         
         if not user_input:
             return jsonify({
@@ -102,20 +431,20 @@ def ai_generate_and_execute_cypher():
                 "step": "validation"
             }), 400
         
-        # 检查DeepSeek服务
-        print(f"🔍 检查DeepSeek服务状态: {deepseek_service is not None}")
-        
-        if deepseek_service is None:
+        # 检查DeepSeek服务（首次使用时初始化）
+        service = _get_deepseek_service()
+        if service is None:
             return jsonify({
                 "success": False,
                 "error": "DeepSeek服务未初始化，请检查API密钥配置",
                 "step": "service_check"
             }), 500
         
-        print("🤖 调用DeepSeek服务...")
-        ai_result = deepseek_service.generate_cypher_from_text(user_input)
+        ai_result = service.generate_cypher_from_text(
+            user_input, use_cache=request_data.get('use_cache', True)
+        )
         
-        print(f"📊 AI结果: {ai_result}")
+        log.debug("📊 AI结果: %s", ai_result)
         
         if not ai_result["success"]:
             return jsonify({
@@ -128,15 +457,19 @@ def ai_generate_and_execute_cypher():
         cypher_query = ai_result["cypher_query"]
         
         # 步骤2：执行生成的Cypher语句
-        execution_result = graph_service.execute_cypher_query(cypher_query)
+        execution_result = graph_service.execute_cypher_query(
+            cypher_query, normalize=current_app.config['CYPHER_NORMALIZE_AI'],
+            entities=_entities_requested(request_data)
+        )
         
         # 返回完整结果
-        return jsonify({
+        return _json_response({
             "success": execution_result["success"],
             "user_input": user_input,
             "generated_cypher": cypher_query,
             "execution_result": execution_result,
-            "ai_model": ai_result.get("model_used", "unknown")
+            "ai_model": ai_result.get("model_used", "unknown"),
+            "cached": ai_result.get("cached", False)
         })
         
     except Exception as e:
@@ -145,3 +478,147 @@ def ai_generate_and_execute_cypher():
             "error": f"处理请求时发生错误: {str(e)}",
             "step": "general_error"
         }), 500
+
+
+@api_blueprint.route('/ai-cypher/batch', methods=['POST'])
+def ai_generate_and_execute_cypher_batch():
+    """批量AI生成Cypher语句：并行调用模型、去重后分块在写事务中执行，按输入逐条返回结果"""
+    try:
+        batch = AICypherBatchRequest(**(request.json or {}))
+    except ValidationError as e:
+        return jsonify({"success": False, "error": f"请求体校验失败: {e.errors()}", "step": "validation"}), 400
+
+    max_inputs = current_app.config['AI_BATCH_MAX_INPUTS']
+    if len(batch.inputs) > max_inputs:
+        return jsonify({
+            "success": False,
+            "error": f"单次最多 {max_inputs} 条输入，收到 {len(batch.inputs)} 条",
+            "step": "validation"
+        }), 400
+
+    service = _get_deepseek_service()
+    if service is None:
+        return jsonify({
+            "success": False,
+            "error": "DeepSeek服务未初始化，请检查API密钥配置",
+            "step": "service_check"
+        }), 500
+
+    try:
+        inputs = [user_input.strip() for user_input in batch.inputs]
+        generated = service.generate_cypher_batch(
+            inputs, use_cache=batch.use_cache, max_concurrency=batch.max_concurrency
+        )
+
+        # 只执行生成成功的语句，结果按下标对应回输入
+        executable = [i for i, result in enumerate(generated) if result["success"]]
+        execution = graph_service.execute_cypher_batch(
+            [generated[i]["cypher_query"] for i in executable],
+            chunk_size=batch.chunk_size or current_app.config['CYPHER_BATCH_CHUNK_SIZE'],
+            atomic=batch.atomic,
+            normalize=current_app.config['CYPHER_NORMALIZE_AI']
+        )
+        execution_results = dict(zip(executable, execution["results"]))
+
+        items = []
+        for i, (user_input, result) in enumerate(zip(inputs, generated)):
+            item = {"index": i, "user_input": user_input, "cached": result.get("cached", False)}
+            if not result["success"]:
+                item.update({"success": False, "error": result["error"], "step": "ai_generation"})
+            else:
+                execution_result = execution_results[i]
+                item.update({
+                    "success": execution_result["success"],
+                    "generated_cypher": result["cypher_query"],
+                    "execution_result": {k: v for k, v in execution_result.items() if k not in ("index", "query")}
+                })
+                if not execution_result["success"]:
+                    item["step"] = "execution"
+            items.append(item)
+
+        succeeded = sum(1 for item in items if item["success"])
+        return _json_response({
+            "success": succeeded == len(items),
+            "total": len(items),
+            "succeeded": succeeded,
+            "failed": len(items) - succeeded,
+            "generation_failed": len(items) - len(executable),
+            "unique_statements": execution["unique"],
+            "transactions": execution["transactions"],
+            "counters": execution["counters"],
+            "ai_model": service.model,
+            "items": items
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"处理批量请求时发生错误: {str(e)}",
+            "step": "general_error"
+        }), 500
+
+@api_blueprint.route('/ai-cypher/extract', methods=['POST'])
+def ai_extract_and_execute_statements():
+    """结构化输出模式：一次模型调用从整段文字中抽取参数化写入语句，校验后按模板批量执行"""
+    try:
+        extract = AIExtractRequest(**(request.json or {}))
+    except ValidationError as e:
+        return jsonify({"success": False, "error": f"请求体校验失败: {e.errors()}", "step": "validation"}), 400
+
+    service = _get_deepseek_service()
+    if service is None:
+        return jsonify({
+            "success": False,
+            "error": "DeepSeek服务未初始化，请检查API密钥配置",
+            "step": "service_check"
+        }), 500
+
+    try:
+        ai_result = service.extract_statements(extract.text.strip(), use_cache=extract.use_cache)
+        if not ai_result["success"]:
+            return jsonify({"success": False, "error": ai_result["error"], "step": "ai_generation"}), 400
+
+        response = {
+            "success": True,
+            "statements": ai_result["statements"],
+            "rejected": ai_result["rejected"],
+            "ai_model": ai_result["model_used"],
+            "cached": ai_result["cached"],
+            "usage": ai_result["usage"]
+        }
+        if extract.execute and ai_result["statements"]:
+            execution = graph_service.execute_statement_templates(
+                ai_result["statements"], chunk_size=current_app.config['INGEST_BATCH_SIZE']
+            )
+            response["success"] = execution["success"]
+            response["execution_result"] = execution
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": f"处理请求时发生错误: {str(e)}",
+            "step": "general_error"
+        }), 500
+
+@api_blueprint.route('/ai-cypher/cache', methods=['GET'])
+def ai_cypher_cache_stats():
+    """查看自然语言 -> Cypher 翻译缓存的命中统计"""
+    service = _get_deepseek_service()
+    if service is None:
+        return jsonify(BaseResponseModel(status="error", message="DeepSeek服务未初始化").model_dump()), 500
+    return jsonify(service.cache_stats())
+
+@api_blueprint.route('/cypher/shapes', methods=['GET'])
+def cypher_statement_shapes():
+    """查看自定义Cypher查询的语句形态统计与估算的执行计划缓存命中率"""
+    if graph_service.registry is None:
+        return jsonify(BaseResponseModel(status="error", message="语句形态统计未启用").model_dump()), 404
+    limit = min(max(request.args.get('limit', 20, type=int), 0), 200)
+    return jsonify(graph_service.registry.stats(limit=limit))
+
+@api_blueprint.route('/llm/stats', methods=['GET'])
+def llm_stats():
+    """查看LLM执行器的并发、排队与请求合并统计"""
+    service = _get_deepseek_service()
+    if service is None:
+        return jsonify(BaseResponseModel(status="error", message="DeepSeek服务未初始化").model_dump()), 500
+    return jsonify(service.executor.stats())
@@ -0,0 +1,98 @@
+# app/services/change_feed.py
+import secrets
+import threading
+import time
+from collections import deque
+from typing import List, Optional
+
+
+class ChangeFeed:
+    """
+    图数据变更流：环形缓冲区中保存最近 capacity 个带版本号的增量，版本号与 GraphService.graph_version 一致。
+    每个增量为
+        {"version", "source", "time", "reset", "counters", "nodes": [ECharts节点], "links": [ECharts连线], "metrics": [...]}
+    nodes/links 是新增或修改过的节点和连线，客户端按 _internal_id / _relationship_id 合并；
+    metrics 是图指标重新计算后节点的 {"_internal_id", "influence", "community", "symbolSize"[, "category"]}，
+    客户端只更新已有节点的这些字段；
+    reset 为True表示无法得到完整的增量（例如有删除、或写入没有返回受影响的实体），客户端需要重新获取图数据。
+
+    epoch 在每次进程启动时随机生成，客户端持有的 (epoch, version) 与当前不一致时同样需要重新获取。
+    """
+
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self.epoch = secrets.token_hex(4)
+        self.version = 0
+        self._deltas: "deque[dict]" = deque(maxlen=capacity)
+        self._condition = threading.Condition()
+        self.published = 0
+        self.resets = 0
+        self.waiting = 0
+
+    def publish(self, version: int, source: str, nodes: List[dict] = None, links: List[dict] = None,
+                counters: dict = None, reset: bool = False, metrics: List[dict] = None) -> dict:
+        """记录一个版本的增量并唤醒等待中的客户端"""
+        delta = {
+            "version": version,
+            "source": source,
+            "time": time.time(),
+            "reset": reset,
+            "counters": counters or {},
+            "nodes": [] if reset else (nodes or []),
+            "links": [] if reset else (links or []),
+            "metrics": [] if reset else (metrics or [])
+        }
+        with self._condition:
+            self._deltas.append(delta)
+            self.version = version
+            self.published += 1
+            self.resets += reset
+            self._condition.notify_all()
+        return delta
+
+    def since(self, version: int, epoch: Optional[str] = None) -> dict:
+        """
+        返回 version 之后的所有增量: {"epoch", "version", "reset", "deltas"}。
+        客户端版本已过旧（对应的增量已被淘汰）、来自其他 epoch，或其间有 reset 增量时，
+        只返回 reset=True 和当前版本号。
+        """
+        with self._condition:
+            current = self.version
+            if epoch is not None and epoch != self.epoch:
+                return self._reply(current, reset=True)
+            if version == current:
+                return self._reply(current)
+            oldest = self._deltas[0]["version"] if self._deltas else current + 1
+            if version > current or version < oldest - 1:
+                return self._reply(current, reset=True)
+            deltas = [delta for delta in self._deltas if delta["version"] > version]
+        if any(delta["reset"] for delta in deltas):
+            return self._reply(current, reset=True)
+        return self._reply(current, deltas=deltas)
+
+    def wait(self, version: int, epoch: Optional[str] = None, timeout: float = 25.0) -> dict:
+        """长轮询：阻塞到版本号超过 version 或超时，再返回 since(version, epoch)"""
+        with self._condition:
+            self.waiting += 1
+            try:
+                if epoch is None or epoch == self.epoch:
+                    self._condition.wait_for(lambda: self.version != version, timeout=timeout)
+            finally:
+                self.waiting -= 1
+        return self.since(version, epoch)
+
+    def _reply(self, version: int, reset: bool = False, deltas: list = None) -> dict:
+        return {"epoch": self.epoch, "version": version, "reset": reset, "deltas": deltas or []}
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "epoch": self.epoch,
+                "version": self.version,
+                "capacity": self.capacity,
+                "buffered": len(self._deltas),
+                "oldest_version": self._deltas[0]["version"] if self._deltas else None,
+                "published": self.published,
+                "resets": self.resets,
+                "waiting": self.waiting
+            }
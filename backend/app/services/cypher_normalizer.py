@@ -0,0 +1,368 @@
+# app/services/cypher_normalizer.py
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+# 按顺序匹配的词法单元；字符串和数字字面量会被提取为参数，其余原样保留
+TOKEN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*[\s\S]*?\*/)"
+    r"|(?P<space>\s+)"
+    r"|(?P<backtick>`(?:[^`]|``)*`)"
+    r"|(?P<string>'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\")"
+    r"|(?P<parameter>\$(?:[A-Za-z_][A-Za-z0-9_]*|\d+|`(?:[^`]|``)*`))"
+    # 可变长度关系 [:R*1..3] 的跳数不能使用参数
+    r"|(?P<varlength>\*\s*(?:\d+\s*)?(?:\.\.\s*(?:\d+\s*)?)?(?=[\]{]))"
+    r"|(?P<hex>0[xX][0-9a-fA-F]+|0o[0-7]+)"
+    r"|(?P<number>(?:\d+\.\d+|\.\d+|\d+)(?:[eE][+-]?\d+)?(?![A-Za-z0-9_]))"
+    r"|(?P<word>[A-Za-z_][A-Za-z0-9_]*)"
+    r"|(?P<other>.)",
+    re.DOTALL
+)
+
+# 管理命令（索引、约束、数据库、用户等）的字面量通常不能替换为参数，不做处理
+ADMIN_COMMAND = re.compile(
+    r"^\s*(?:SHOW|GRANT|DENY|REVOKE|ALTER|START|STOP|TERMINATE|ENABLE|DRYRUN)\b"
+    r"|^\s*(?:CREATE|DROP)\s+(?:OR\s+REPLACE\s+)?"
+    r"(?:(?:RANGE|TEXT|POINT|LOOKUP|FULLTEXT|VECTOR|BTREE)\s+)?(?:INDEX|CONSTRAINT|DATABASE|COMPOSITE|USER|ROLE|ALIAS)\b",
+    re.IGNORECASE
+)
+
+# 这些关键字后面的数字是语法的一部分（如 IN TRANSACTIONS OF 100 ROWS、SHORTEST 2），保留字面量
+LITERAL_KEYWORDS = {"OF", "SHORTEST", "ANY", "ALL"}
+
+ESCAPES = {"\\": "\\", "'": "'", '"': '"', "n": "\n", "t": "\t", "r": "\r", "b": "\b", "f": "\f"}
+ESCAPE = re.compile(r"\\(u[0-9a-fA-F]{4}|U[0-9a-fA-F]{8}|.)", re.DOTALL)
+
+MAX_INT = 2 ** 63 - 1
+PARAMETER_PREFIX = "lit"
+
+
+def _unescape(body: str) -> Optional[str]:
+    """解析Cypher字符串中的转义；遇到无法识别的转义时返回None（保留原字面量）"""
+    invalid = False
+
+    def replace(match):
+        nonlocal invalid
+        code = match.group(1)
+        if code[0] in "uU" and len(code) > 1:
+            return chr(int(code[1:], 16))
+        if code in ESCAPES:
+            return ESCAPES[code]
+        invalid = True
+        return match.group(0)
+
+    value = ESCAPE.sub(replace, body)
+    return None if invalid else value
+
+
+def _number(text: str) -> Optional[Any]:
+    if re.fullmatch(r"\d+", text):
+        value = int(text)
+        return value if value <= MAX_INT else None
+    return float(text)
+
+
+def parameterize(cypher_query: str) -> Tuple[str, Dict[str, Any]]:
+    """
+    把查询中的字符串和数字字面量提取为参数，返回 (参数化后的查询, 参数)：
+        MERGE (s:Student {name: "张三", year: 2023})
+        -> MERGE (s:Student {name: $lit0, year: $lit1}), {"lit0": "张三", "lit1": 2023}
+    - 相同的字面量共用一个参数；已有的 $参数 保持不变，新参数名不会与其冲突
+    - 注释被去掉，字符串之外的连续空白合并为一个空格，排版不同的同一语句得到相同的文本
+    - 标签、属性名、可变长度关系的跳数、布尔值和null保持原样；管理命令不做处理
+    - RETURN 中未加别名的表达式，列名会随之变为参数化后的文本（如 n.x * $lit0）
+    Neo4j 按查询文本缓存执行计划，参数化后只有值不同的语句可以复用同一个计划。
+    """
+    if ADMIN_COMMAND.search(cypher_query):
+        return cypher_query.strip(), {}
+
+    tokens = [(match.lastgroup, match.group()) for match in TOKEN.finditer(cypher_query.strip())]
+    existing = {text[1:].strip("`") for kind, text in tokens if kind == "parameter"}
+
+    params: Dict[str, Any] = {}
+    names: Dict[tuple, str] = {}
+    counter = 0
+    parts = []
+    previous_word = None
+    for kind, text in tokens:
+        if kind == "comment":
+            # 注释相当于空白
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            continue
+        if kind == "space":
+            if parts and parts[-1] != " ":
+                parts.append(" ")
+            continue
+
+        value = None
+        if kind == "string":
+            value = _unescape(text[1:-1])
+        elif kind == "number" and (previous_word or "").upper() not in LITERAL_KEYWORDS:
+            value = _number(text)
+
+        if value is None:
+            parts.append(text)
+        else:
+            key = (type(value).__name__, value)
+            if key not in names:
+                while f"{PARAMETER_PREFIX}{counter}" in existing:
+                    counter += 1
+                names[key] = f"{PARAMETER_PREFIX}{counter}"
+                params[names[key]] = value
+                counter += 1
+            parts.append(f"${names[key]}")
+
+        previous_word = text if kind == "word" else None
+    return "".join(parts).strip(), params
+
+
+# 子句关键字：遇到时结束上一个子句（RETURN 列表、SET 目标列表等）
+CLAUSE_KEYWORDS = {
+    "MATCH", "OPTIONAL", "MERGE", "CREATE", "SET", "REMOVE", "DELETE", "DETACH", "RETURN", "WITH", "UNWIND",
+    "WHERE", "ORDER", "SKIP", "LIMIT", "CALL", "FOREACH", "UNION", "ON", "USE", "LOAD", "YIELD", "FINISH"
+}
+
+
+def _identifier(kind: str, text: str) -> Optional[str]:
+    if kind == "word":
+        return text
+    if kind == "backtick":
+        return text[1:-1].replace("``", "`")
+    return None
+
+
+def returns_written_entities(cypher_query: str) -> bool:
+    """
+    判断写查询修改的实体是否都出现在最后的 RETURN 中（用于确定返回结果能否作为完整的变更增量）：
+    - SET/REMOVE 的每个目标变量都被原样返回（RETURN x 或 RETURN x AS y）
+    - CREATE/MERGE 模式中新引入的节点和关系都有变量，且这些变量都被返回（之前已绑定的变量只是端点，不需要）
+    RETURN * 视为返回了全部变量。没有 RETURN、含 UNION，或者有匿名的新建元素时返回False。
+    只做词法层面的保守判断：变量经 WITH 改名后再返回等情况同样返回False。
+    """
+    tokens = [(match.lastgroup, match.group()) for match in TOKEN.finditer(cypher_query)
+              if match.lastgroup not in ("space", "comment")]
+    written = set()
+    bound = set()       # 已出现过的标识符
+    returned = set()
+    return_star = False
+    clause = None
+    clause_depth = 0
+    depth = 0           # () 和 [] 的嵌套深度
+    braces = 0          # {} 的嵌套深度（属性映射、子查询）
+    expect_target = False
+    items = None        # 当前 RETURN 子句的返回项，每项为词法单元列表
+
+    for i, (kind, text) in enumerate(tokens):
+        upper = text.upper() if kind == "word" else None
+        previous = tokens[i - 1][1] if i else ""
+        if upper in CLAUSE_KEYWORDS and braces == 0 and previous != ".":
+            if upper == "UNION":
+                return False
+            clause, clause_depth = upper, depth
+            expect_target = upper in ("SET", "REMOVE")
+            if upper == "RETURN":
+                items, returned, return_star = [[]], set(), False
+            elif upper not in ("ORDER", "SKIP", "LIMIT"):
+                # ORDER BY/SKIP/LIMIT 之后 RETURN 仍是最后的子句，其他子句说明前面的 RETURN 不是
+                items = None
+            continue
+
+        if text in "([{" and kind == "other":
+            if text == "{":
+                braces += 1
+            else:
+                depth += 1
+                if clause in ("CREATE", "MERGE") and braces == 0:
+                    following = tokens[i + 1] if i + 1 < len(tokens) else ("other", "")
+                    variable = _identifier(*following)
+                    if variable is None:
+                        return False
+                    if variable not in bound:
+                        written.add(variable)
+        elif text in ")]}" and kind == "other":
+            if text == "}":
+                braces -= 1
+            else:
+                depth -= 1
+
+        if clause in ("SET", "REMOVE") and braces == 0:
+            if expect_target:
+                variable = _identifier(kind, text)
+                if variable is not None:
+                    written.add(variable)
+                expect_target = False
+            elif text == "," and depth == clause_depth:
+                expect_target = True
+        elif clause == "RETURN" and items is not None and braces == 0:
+            if text == "," and depth == clause_depth:
+                items.append([])
+            elif not (upper == "DISTINCT" and not items[0]):
+                items[-1].append((kind, text))
+
+        if kind in ("word", "backtick") and previous != ".":
+            bound.add(_identifier(kind, text))
+
+    if items is None:
+        return False
+    for item in items:
+        if item == [("other", "*")]:
+            return_star = True
+        elif len(item) in (1, 3) and (len(item) == 1 or item[1][1].upper() == "AS"):
+            variable = _identifier(*item[0])
+            if variable is not None:
+                returned.add(variable)
+    return return_star or written <= returned
+
+
+def accepts_trailing_limit(cypher_query: str) -> bool:
+    """
+    判断能否在查询末尾直接追加 LIMIT：最后一个顶层子句是 RETURN（之后只有 ORDER BY/SKIP），
+    没有 LIMIT，且不含 UNION（追加的 LIMIT 只会作用于最后一个分支）。子查询 {...} 中的子句不计。
+    """
+    tokens = [(match.lastgroup, match.group()) for match in TOKEN.finditer(cypher_query)
+              if match.lastgroup not in ("space", "comment")]
+    clause = None
+    depth = 0
+    for i, (kind, text) in enumerate(tokens):
+        if kind == "other":
+            if text in "([{":
+                depth += 1
+            elif text in ")]}":
+                depth -= 1
+            elif text == ";" and (i != len(tokens) - 1 or not cypher_query.rstrip().endswith(";")):
+                # 分号后还有内容（多条语句或注释），不改写
+                return False
+            continue
+        if kind != "word" or depth != 0 or (i and tokens[i - 1][1] == "."):
+            continue
+        upper = text.upper()
+        if upper == "UNION":
+            return False
+        if upper in CLAUSE_KEYWORDS:
+            if upper in ("ORDER", "SKIP") and clause == "RETURN":
+                continue
+            clause = upper
+    return clause == "RETURN"
+
+
+def shape_id(cypher_query: str) -> str:
+    return hashlib.sha1(cypher_query.encode("utf-8")).hexdigest()[:16]
+
+
+class StatementRegistry:
+    """
+    语句形态登记表：记录执行过的（参数化后的）查询文本，估算 Neo4j 执行计划缓存的命中率。
+
+    Neo4j 以查询文本为键、按 LRU 缓存执行计划（默认 1000 条，server.db.query_cache_size），
+    但 Bolt 协议不返回单次查询是否命中计划缓存。这里用同样容量的 LRU 在客户端模拟：
+    形态已在登记表中即视为命中，否则视为需要重新编译。同时按形态统计 result_available_after
+    （服务端从收到查询到返回第一行的耗时，包含编译），对比首次与后续执行即可看出编译开销。
+    另外按原始查询文本（未参数化）维护一个同样的 LRU，用于对比参数化前后的命中率。
+    """
+
+    def __init__(self, max_shapes: int = 1000):
+        self.max_shapes = max_shapes
+        self._shapes: "OrderedDict[str, dict]" = OrderedDict()
+        self._raw: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.executions = 0
+        self.hits = 0
+        self.raw_hits = 0
+        self.parameterized = 0
+        self.literals = 0
+        self.evictions = 0
+
+    def observe(self, query: str, raw_query: str = None, literals: int = 0,
+                available_after: Optional[float] = None) -> dict:
+        """
+        记录一次执行，返回 {"shape", "plan_cache"}。
+        query 为实际执行的查询文本，raw_query 为参数化前的原始文本，literals 为提取的字面量个数，
+        available_after 为该次执行的 result_available_after（毫秒）。
+        """
+        key = shape_id(query)
+        raw_key = shape_id(raw_query if raw_query is not None else query)
+        now = time.time()
+        with self._lock:
+            self.executions += 1
+            if literals:
+                self.parameterized += 1
+                self.literals += literals
+
+            if raw_key in self._raw:
+                self.raw_hits += 1
+                self._raw.move_to_end(raw_key)
+            else:
+                self._raw[raw_key] = None
+                if len(self._raw) > self.max_shapes:
+                    self._raw.popitem(last=False)
+
+            shape = self._shapes.get(key)
+            hit = shape is not None
+            if hit:
+                self.hits += 1
+                self._shapes.move_to_end(key)
+            else:
+                shape = {
+                    "shape": key,
+                    "query": query,
+                    "executions": 0,
+                    "first_seen": now,
+                    "first_available_after": available_after,
+                    "repeat_available_after_total": 0.0,
+                    "repeat_timed": 0
+                }
+                self._shapes[key] = shape
+                if len(self._shapes) > self.max_shapes:
+                    self._shapes.popitem(last=False)
+                    self.evictions += 1
+            shape["executions"] += 1
+            shape["last_seen"] = now
+            if hit and available_after is not None:
+                shape["repeat_available_after_total"] += available_after
+                shape["repeat_timed"] += 1
+        return {"shape": key, "plan_cache": "hit" if hit else "miss"}
+
+    def stats(self, limit: int = 20) -> dict:
+        """汇总统计及执行次数最多的 limit 个形态"""
+        with self._lock:
+            shapes = list(self._shapes.values())
+            executions, hits, raw_hits = self.executions, self.hits, self.raw_hits
+            summary = {
+                "max_shapes": self.max_shapes,
+                "shapes": len(shapes),
+                "executions": executions,
+                "hits": hits,
+                "misses": executions - hits,
+                "hit_rate": round(hits / executions, 4) if executions else 0.0,
+                "raw_hit_rate": round(raw_hits / executions, 4) if executions else 0.0,
+                "parameterized": self.parameterized,
+                "literals_extracted": self.literals,
+                "evictions": self.evictions
+            }
+
+        first = [s["first_available_after"] for s in shapes if s["first_available_after"] is not None]
+        repeat_total = sum(s["repeat_available_after_total"] for s in shapes)
+        repeat_timed = sum(s["repeat_timed"] for s in shapes)
+        summary["avg_first_available_after_ms"] = round(sum(first) / len(first), 2) if first else None
+        summary["avg_repeat_available_after_ms"] = round(repeat_total / repeat_timed, 2) if repeat_timed else None
+
+        top = sorted(shapes, key=lambda s: s["executions"], reverse=True)[:limit]
+        summary["top_shapes"] = [
+            {
+                "shape": s["shape"],
+                "query": s["query"],
+                "executions": s["executions"],
+                "first_seen": s["first_seen"],
+                "last_seen": s["last_seen"],
+                "first_available_after_ms": s["first_available_after"],
+                "avg_repeat_available_after_ms": (
+                    round(s["repeat_available_after_total"] / s["repeat_timed"], 2) if s["repeat_timed"] else None
+                )
+            }
+            for s in top
+        ]
+        return summary
@@ -0,0 +1,90 @@
+# app/services/cypher_templates.py
+import re
+from typing import Any, Dict, Tuple
+
+# 参数化模板中不允许出现的子句和过程调用（只允许 MERGE/MATCH/CREATE/SET/WITH/WHERE/RETURN 等写入语句）
+FORBIDDEN_CLAUSES = re.compile(
+    r"\b(DELETE|DETACH|REMOVE|DROP|CALL|LOAD|FOREACH|USE|GRANT|DENY|REVOKE|ALTER|TERMINATE|SHOW|UNION)\b"
+    r"|\bCREATE\s+(INDEX|CONSTRAINT|DATABASE|USER|ROLE|ALIAS)\b"
+    r"|\b(apoc|dbms|db|gds)\s*\.",
+    re.IGNORECASE
+)
+WRITE_CLAUSES = re.compile(r"\b(MERGE|CREATE|SET)\b", re.IGNORECASE)
+STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+PARAMETER = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)")
+TRAILING_RETURN = re.compile(r"\s+RETURN\b(?:(?!\b(?:MERGE|CREATE|SET|MATCH|WITH)\b)[\s\S])*$", re.IGNORECASE)
+
+MAX_TEMPLATE_LENGTH = 2000
+# 批量执行时每行参数的变量名，模板中不能使用
+ROW_VARIABLE = "_row"
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+
+
+def _check_value(name: str, value: Any, allow_map: bool = True) -> None:
+    if isinstance(value, SCALAR_TYPES):
+        return
+    if isinstance(value, list):
+        if not all(isinstance(item, SCALAR_TYPES) for item in value):
+            raise ValueError(f"参数 {name} 的列表元素只能是字符串、数字或布尔值")
+        return
+    if isinstance(value, dict) and allow_map:
+        for key, item in value.items():
+            _check_value(f"{name}.{key}", item, allow_map=False)
+        return
+    raise ValueError(f"参数 {name} 的类型不支持: {type(value).__name__}")
+
+
+def validate_statement(statement: Any) -> Tuple[str, Dict[str, Any]]:
+    """
+    校验模型生成的参数化写入语句 {"query": 模板, "params": {...}}，返回 (模板, 参数)。
+    - 模板必须是写入语句，不能包含删除、过程调用、管理命令，也不能有多条语句
+    - 所有值都必须通过参数传入（模板中不能有字符串字面量），这样同类语句共用同一个模板和查询计划
+    - 模板引用的参数必须全部提供，参数值只能是标量、标量列表或由它们组成的映射
+    不合法时抛出 ValueError
+    """
+    if not isinstance(statement, dict):
+        raise ValueError("语句必须是包含 query 和 params 的对象")
+    query = statement.get("query")
+    params = statement.get("params", statement.get("parameters")) or {}
+    if not isinstance(query, str) or not query.strip():
+        raise ValueError("query 不能为空")
+    if not isinstance(params, dict):
+        raise ValueError("params 必须是对象")
+
+    query = " ".join(query.strip().rstrip(";").split())
+    if len(query) > MAX_TEMPLATE_LENGTH:
+        raise ValueError(f"query 超过 {MAX_TEMPLATE_LENGTH} 个字符")
+    if ";" in query:
+        raise ValueError("一条语句中只能包含一个查询")
+    if STRING_LITERAL.search(query):
+        raise ValueError("query 中不能包含字符串字面量，值必须通过参数传入")
+    forbidden = FORBIDDEN_CLAUSES.search(query)
+    if forbidden:
+        raise ValueError(f"query 中不允许使用 {forbidden.group(0)}")
+    if not WRITE_CLAUSES.search(query):
+        raise ValueError("query 必须是写入语句（MERGE/CREATE/SET）")
+    if re.search(rf"\b{ROW_VARIABLE}\b", query):
+        raise ValueError(f"query 中不能使用变量名 {ROW_VARIABLE}")
+
+    referenced = set(PARAMETER.findall(query))
+    missing = referenced - set(params)
+    if missing:
+        raise ValueError(f"缺少参数: {', '.join(sorted(missing))}")
+    for name in referenced:
+        _check_value(name, params[name])
+    return query, {name: params[name] for name in referenced}
+
+
+def to_unwind(template: str) -> str:
+    """
+    把参数化模板改写为按行批量执行的查询：$name 改为 _row.name，
+    每行在 CALL 子查询中独立执行，模板末尾的 RETURN 去掉，只返回处理的行数。
+    """
+    body = TRAILING_RETURN.sub("", template)
+    body = PARAMETER.sub(lambda m: f"{ROW_VARIABLE}.`{m.group(1)}`", body)
+    return (
+        f"UNWIND $rows AS {ROW_VARIABLE}\n"
+        f"CALL {{\n    WITH {ROW_VARIABLE}\n    {body}\n}}\n"
+        f"RETURN count(*) AS rows"
+    )
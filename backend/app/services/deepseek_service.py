@@ -1,11 +1,76 @@
-from openai import OpenAI
-from typing import Dict, Any
+import json
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, wait
+from typing import Dict, Any, List
 from ..core.config import Config
+from ..core.logger import get_logger
+from ..core.metrics import span
+from .cypher_templates import validate_statement
+from .llm_executor import LLMBusyError, LLMExecutor
+from .translation_cache import TranslationCache, is_write_query, normalize_user_input
+
+log = get_logger(__name__)
 
 class DeepSeekService:
+    SYSTEM_PROMPT = """你是一个专业的Neo4j Cypher查询生成助手。根据用户的自然语言描述，生成相应的Cypher语句。
+
+规则：
+1. 只返回有效的Cypher语句，不要包含额外的解释
+2. 对于学者，使用标签 :Scholar，属性包括 name, affiliation, field 等
+3. 对于论文，使用标签 :Paper，属性包括 title, year, citations 等
+4. 对于关系，常用的有 AUTHORED, COLLABORATES_WITH, CITES 等
+5. 对于学生，使用标签 :Student，属性包括 name, degree等
+6. 创建节点时使用MERGE而不是CREATE，避免重复
+7. 确保语句语法正确
+
+示例：
+输入："添加一个学生张三，是个硕士"
+输出：MERGE (s:Student {name: "张三", degree: "master"}) RETURN s
+输入："添加一个学者张三，来自清华大学"
+输出：MERGE (s:Scholar {name: "张三", affiliation: "清华大学"}) RETURN s"""
+
+    # 结构化输出模式：一次调用从整段文字中抽取多条参数化写入语句
+    STRUCTURED_SYSTEM_PROMPT = """你是一个把科研人脉描述转换为Neo4j写入语句的助手。从用户给出的一段文字中抽取所有学者、学生、机构、论文及它们之间的关系，只输出如下JSON对象：
+{"statements": [{"query": "<Cypher模板>", "params": {...}}, ...]}
+
+规则：
+1. 所有值（姓名、标题、年份、学位等）都通过 $参数 传入，query 中不能出现字符串字面量
+2. 同一类语句使用完全相同的 query 模板，只有 params 不同；优先使用下面的推荐模板
+3. 节点一律使用 MERGE；不要使用 DELETE、REMOVE、CALL，不要在 query 末尾加 RETURN
+4. 标签：学者 :Scholar，学生 :Student，机构 :Institution，论文 :Paper
+5. 关系：AUTHORED（学者->论文）、COLLABORATES_WITH（学者->学者）、CITES（论文->论文）、ADVISES（学者->学生）、AFFILIATED_WITH（学者/学生->机构）
+6. $props 是其余属性组成的对象（如 {"field": "机器学习"}），没有时传 {}
+
+推荐模板：
+MERGE (n:Scholar {name: $name}) SET n += $props
+MERGE (n:Student {name: $name}) SET n += $props
+MERGE (n:Institution {name: $name})
+MERGE (n:Paper {title: $title}) SET n += $props
+MERGE (a:Scholar {name: $source}) MERGE (b:Scholar {name: $target}) MERGE (a)-[:COLLABORATES_WITH]->(b)
+MERGE (a:Scholar {name: $source}) MERGE (b:Paper {title: $target}) MERGE (a)-[:AUTHORED]->(b)
+MERGE (a:Paper {title: $source}) MERGE (b:Paper {title: $target}) MERGE (a)-[:CITES]->(b)
+MERGE (a:Scholar {name: $source}) MERGE (b:Student {name: $target}) MERGE (a)-[:ADVISES]->(b)
+MERGE (a:Scholar {name: $source}) MERGE (b:Institution {name: $target}) MERGE (a)-[:AFFILIATED_WITH]->(b)
+
+示例：
+输入："清华大学的张三和李四合作发表了论文《图神经网络综述》"
+输出：{"statements": [
+{"query": "MERGE (n:Institution {name: $name})", "params": {"name": "清华大学"}},
+{"query": "MERGE (n:Scholar {name: $name}) SET n += $props", "params": {"name": "张三", "props": {"affiliation": "清华大学"}}},
+{"query": "MERGE (n:Scholar {name: $name}) SET n += $props", "params": {"name": "李四", "props": {"affiliation": "清华大学"}}},
+{"query": "MERGE (a:Scholar {name: $source}) MERGE (b:Scholar {name: $target}) MERGE (a)-[:COLLABORATES_WITH]->(b)", "params": {"source": "张三", "target": "李四"}},
+{"query": "MERGE (a:Scholar {name: $source}) MERGE (b:Paper {title: $target}) MERGE (a)-[:AUTHORED]->(b)", "params": {"source": "张三", "target": "图神经网络综述"}},
+{"query": "MERGE (a:Scholar {name: $source}) MERGE (b:Paper {title: $target}) MERGE (a)-[:AUTHORED]->(b)", "params": {"source": "李四", "target": "图神经网络综述"}}
+]}"""
+
+    # 每次生成Cypher时的调用参数
+    COMPLETION_PARAMS = {"temperature": 0.1, "max_tokens": 500}
+    STRUCTURED_COMPLETION_PARAMS = {"temperature": 0.1, "max_tokens": 4000, "response_format": {"type": "json_object"}}
+
     def __init__(self):
         """初始化DeepSeek客户端"""
-        print("🚀 开始初始化DeepSeek服务...")
+        log.info("🚀 开始初始化DeepSeek服务...")
         
         # 调试配置
         Config.debug_print()
@@ -19,95 +84,267 @@ class DeepSeekService:
             raise ValueError(f"API密钥格式错误: {Config.DEEPSEEK_API_KEY[:10]}...")
         
         try:
-            # 使用和测试脚本完全相同的方式初始化
-            self.client = OpenAI(
+            # 共享连接池、限制并发并合并相同请求的执行器
+            self.executor = LLMExecutor(
                 api_key=Config.DEEPSEEK_API_KEY,
-                base_url=Config.DEEPSEEK_BASE_URL
+                base_url=Config.DEEPSEEK_BASE_URL,
+                max_concurrency=Config.LLM_MAX_CONCURRENCY,
+                max_pending=Config.LLM_MAX_PENDING,
+                pool_connections=Config.LLM_POOL_CONNECTIONS,
+                request_timeout=Config.LLM_REQUEST_TIMEOUT
             )
+            self.client = self.executor.client
             self.model = Config.DEEPSEEK_MODEL
+
+            # 自然语言 -> Cypher 翻译缓存
+            self.cache = None
+            self.cache_bypass_writes = Config.TRANSLATION_CACHE_BYPASS_WRITES
+            if Config.TRANSLATION_CACHE_ENABLED:
+                self.cache = TranslationCache(
+                    Config.TRANSLATION_CACHE_PATH,
+                    max_entries=Config.TRANSLATION_CACHE_MAX_ENTRIES
+                )
+                log.info("   翻译缓存: %s", Config.TRANSLATION_CACHE_PATH)
             
-            print(f"✅ DeepSeek客户端初始化成功")
-            print(f"   使用API密钥: {Config.DEEPSEEK_API_KEY[:10]}...")
-            print(f"   Base URL: {Config.DEEPSEEK_BASE_URL}")
-            print(f"   Model: {Config.DEEPSEEK_MODEL}")
-            
-            # 立即测试连接
-            self._test_connection()
+            log.info("✅ DeepSeek客户端初始化成功 (Base URL: %s, Model: %s, API密钥: %s...)",
+                     Config.DEEPSEEK_BASE_URL, Config.DEEPSEEK_MODEL, Config.DEEPSEEK_API_KEY[:10])
+            # 连接测试由后台健康检查执行（见 HealthMonitor），不阻塞初始化
             
         except Exception as e:
-            print(f"❌ DeepSeek客户端初始化失败: {e}")
+            log.error("❌ DeepSeek客户端初始化失败: %s", e)
             raise
     
     def _test_connection(self):
-        """在初始化时测试连接"""
+        """测试连接和API密钥，失败时抛出异常；只列出可用模型，不产生对话补全费用"""
         try:
-            print("🧪 测试DeepSeek连接...")
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant"},
-                    {"role": "user", "content": "Hi"}
-                ],
-                max_tokens=10
-            )
-            content = response.choices[0].message.content
-            print(f"✅ 连接测试成功，AI回复: {content}")
+            log.debug("🧪 测试DeepSeek连接...")
+            models = [model.id for model in self.client.models.list()]
+            log.debug("✅ 连接测试成功，可用模型: %s", models)
         except Exception as e:
-            print(f"❌ 连接测试失败: {e}")
+            log.warning("❌ 连接测试失败: %s", e)
             raise
     
-    def generate_cypher_from_text(self, user_input: str) -> Dict[str, Any]:
-        """生成Cypher语句 - 使用和测试脚本相同的逻辑"""
+    def generate_cypher_from_text(self, user_input: str, use_cache: bool = True) -> Dict[str, Any]:
+        """生成Cypher语句 - 使用和测试脚本相同的逻辑，相同(归一化后)的问题直接命中翻译缓存"""
         
-        system_prompt = """你是一个专业的Neo4j Cypher查询生成助手。根据用户的自然语言描述，生成相应的Cypher语句。
-
-规则：
-1. 只返回有效的Cypher语句，不要包含额外的解释
-2. 对于学者，使用标签 :Scholar，属性包括 name, affiliation, field 等
-3. 对于论文，使用标签 :Paper，属性包括 title, year, citations 等
-4. 对于关系，常用的有 AUTHORED, COLLABORATES_WITH, CITES 等
-5. 对于学生，使用标签 :Student，属性包括 name, degree等
-6. 创建节点时使用MERGE而不是CREATE，避免重复
-7. 确保语句语法正确
-
-示例：
-输入："添加一个学生张三，是个硕士"
-输出：MERGE (s:Student {name: "张三", degree: "master"}) RETURN s
-输入："添加一个学者张三，来自清华大学"
-输出：MERGE (s:Scholar {name: "张三", affiliation: "清华大学"}) RETURN s"""
-
-        try:
-            print(f"🤖 调用DeepSeek API生成Cypher...")
-            print(f"   用户输入: {user_input}")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                temperature=0.1,
-                max_tokens=500
-            )
-            
-            cypher_query = response.choices[0].message.content.strip()
-            print(f"✅ 生成的Cypher: {cypher_query}")
-            
-            # 验证
-            if not any(keyword in cypher_query.upper() for keyword in ['MATCH', 'CREATE', 'MERGE', 'RETURN']):
-                raise ValueError("生成的不是有效的Cypher语句")
-            
+        cached = self._cache_lookup(user_input) if use_cache else None
+        if cached is not None:
+            log.debug("⚡ 翻译缓存命中: %s", cached['cypher_query'])
             return {
                 "success": True,
-                "cypher_query": cypher_query,
+                "cypher_query": cached["cypher_query"],
                 "original_input": user_input,
-                "model_used": self.model
+                "model_used": self.model,
+                "cached": True
             }
+
+        try:
+            log.debug("🤖 调用DeepSeek API生成Cypher, 用户输入: %s", user_input)
+            
+            with span("llm"):
+                response = self.executor.complete(
+                    model=self.model,
+                    messages=self._messages(user_input),
+                    **self.COMPLETION_PARAMS
+                )
+            return self._completion_result(user_input, response, use_cache)
             
         except Exception as e:
-            print(f"❌ API调用失败: {e}")
+            log.error("❌ API调用失败: %s", e)
             return {
                 "success": False,
                 "error": f"生成Cypher语句失败: {str(e)}",
                 "original_input": user_input
-            }
\ No newline at end of file
+            }
+
+    def generate_cypher_batch(self, inputs: List[str], use_cache: bool = True,
+                              max_concurrency: int = None) -> List[Dict[str, Any]]:
+        """
+        批量生成Cypher语句，返回与 inputs 一一对应的结果（格式同 generate_cypher_from_text）。
+        - 归一化后相同的输入只生成一次
+        - 先查翻译缓存，未命中的输入并行调用模型，同时在途的请求数不超过 max_concurrency
+        """
+        limit = self.executor.max_concurrency + self.executor.max_pending
+        max_concurrency = max(1, min(max_concurrency or self.executor.max_concurrency, limit))
+
+        # 归一化后的输入 -> 原始输入的下标
+        groups: Dict[str, List[int]] = {}
+        for i, user_input in enumerate(inputs):
+            groups.setdefault(normalize_user_input(user_input), []).append(i)
+
+        generated: Dict[str, Dict[str, Any]] = {}
+        pending = deque()
+        for key, indexes in groups.items():
+            user_input = inputs[indexes[0]]
+            cached = self._cache_lookup(user_input) if use_cache else None
+            if cached is not None:
+                generated[key] = {"success": True, "cypher_query": cached["cypher_query"],
+                                  "model_used": self.model, "cached": True}
+            else:
+                pending.append((key, user_input))
+
+        log.info("🤖 批量生成Cypher: %s 条输入, %s 条不重复, %s 条需要调用模型", len(inputs), len(groups), len(pending))
+        with span("llm_batch"):
+            in_flight: Dict[Future, tuple] = {}
+            while pending or in_flight:
+                while pending and len(in_flight) < max_concurrency:
+                    key, user_input = pending.popleft()
+                    try:
+                        future = self.executor.submit(self.model, self._messages(user_input), **self.COMPLETION_PARAMS)
+                    except LLMBusyError as e:
+                        if not in_flight:
+                            generated[key] = {"success": False, "error": f"生成Cypher语句失败: {str(e)}"}
+                            continue
+                        # 等自己的请求完成一部分后再提交
+                        pending.appendleft((key, user_input))
+                        break
+                    in_flight[future] = (key, user_input)
+
+                if not in_flight:
+                    continue
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    key, user_input = in_flight.pop(future)
+                    try:
+                        generated[key] = self._completion_result(user_input, future.result(), use_cache)
+                    except Exception as e:
+                        generated[key] = {"success": False, "error": f"生成Cypher语句失败: {str(e)}"}
+
+        results = []
+        for i, user_input in enumerate(inputs):
+            result = dict(generated[normalize_user_input(user_input)])
+            result["original_input"] = user_input
+            results.append(result)
+        return results
+
+    def extract_statements(self, text: str, use_cache: bool = True) -> Dict[str, Any]:
+        """
+        结构化输出模式：一次调用从整段文字中抽取多条参数化写入语句。
+        返回 {"success", "statements": [{"query", "params"}], "rejected": [{"index", "statement", "error"}],
+              "model_used", "cached", "usage"}，statements 已通过 validate_statement 校验，可直接批量执行。
+        抽取结果本身就是写入语句，TRANSLATION_CACHE_BYPASS_WRITES 不适用于这里，是否使用缓存只由 use_cache 决定。
+        """
+        content, cached, usage = None, False, None
+        if use_cache and self.cache is not None:
+            try:
+                hit = self.cache.get(text, self.model, self.STRUCTURED_SYSTEM_PROMPT)
+            except Exception as e:
+                log.warning("⚠️  读取翻译缓存失败: %s", e)
+                hit = None
+            if hit is not None:
+                content, cached = hit["cypher_query"], True
+
+        try:
+            if content is None:
+                log.debug("🤖 调用DeepSeek API抽取参数化语句 (%s 字)...", len(text))
+                with span("llm"):
+                    response = self.executor.complete(
+                        model=self.model,
+                        messages=[
+                            {"role": "system", "content": self.STRUCTURED_SYSTEM_PROMPT},
+                            {"role": "user", "content": text}
+                        ],
+                        **self.STRUCTURED_COMPLETION_PARAMS
+                    )
+                content = response.choices[0].message.content.strip()
+                if response.usage is not None:
+                    usage = {
+                        "prompt_tokens": response.usage.prompt_tokens,
+                        "completion_tokens": response.usage.completion_tokens,
+                        "total_tokens": response.usage.total_tokens
+                    }
+            statements, rejected = self._parse_statements(content)
+        except Exception as e:
+            log.error("❌ 抽取参数化语句失败: %s", e)
+            return {"success": False, "error": f"抽取参数化语句失败: {str(e)}", "original_input": text}
+
+        if use_cache and not cached and self.cache is not None and statements:
+            try:
+                self.cache.set(text, self.model, self.STRUCTURED_SYSTEM_PROMPT, content)
+            except Exception as e:
+                log.warning("⚠️  写入翻译缓存失败: %s", e)
+
+        log.info("✅ 抽取到 %s 条语句, %s 个模板, 拒绝 %s 条", len(statements), len({s['query'] for s in statements}), len(rejected))
+        return {
+            "success": True,
+            "statements": statements,
+            "rejected": rejected,
+            "original_input": text,
+            "model_used": self.model,
+            "cached": cached,
+            "usage": usage
+        }
+
+    @staticmethod
+    def _parse_statements(content: str) -> tuple:
+        """解析模型返回的JSON并逐条校验，返回 (合法语句, 被拒绝的语句)"""
+        # 兼容模型把JSON包在 ```json 代码块中的情况
+        content = re.sub(r"^```(?:json)?\s*|\s*```$", "", content.strip())
+        payload = json.loads(content)
+        items = payload.get("statements") if isinstance(payload, dict) else payload
+        if not isinstance(items, list):
+            raise ValueError("模型输出中没有 statements 列表")
+
+        statements, rejected = [], []
+        for i, item in enumerate(items):
+            try:
+                query, params = validate_statement(item)
+            except ValueError as e:
+                rejected.append({"index": i, "statement": item, "error": str(e)})
+                continue
+            statements.append({"query": query, "params": params})
+        return statements, rejected
+
+    def _messages(self, user_input: str) -> List[dict]:
+        return [
+            {"role": "system", "content": self.SYSTEM_PROMPT},
+            {"role": "user", "content": user_input}
+        ]
+
+    def _completion_result(self, user_input: str, response, use_cache: bool) -> Dict[str, Any]:
+        """校验模型返回的Cypher语句并写入翻译缓存，不是有效的Cypher时抛出 ValueError"""
+        cypher_query = response.choices[0].message.content.strip()
+        log.debug("✅ 生成的Cypher: %s", cypher_query)
+        
+        # 验证
+        if not any(keyword in cypher_query.upper() for keyword in ['MATCH', 'CREATE', 'MERGE', 'RETURN']):
+            raise ValueError("生成的不是有效的Cypher语句")
+        
+        if use_cache:
+            self._cache_store(user_input, cypher_query)
+        
+        return {
+            "success": True,
+            "cypher_query": cypher_query,
+            "original_input": user_input,
+            "model_used": self.model,
+            "cached": False
+        }
+
+    def _cache_lookup(self, user_input: str):
+        if self.cache is None:
+            return None
+        try:
+            cached = self.cache.get(user_input, self.model, self.SYSTEM_PROMPT)
+        except Exception as e:
+            log.warning("⚠️  读取翻译缓存失败: %s", e)
+            return None
+        if cached is not None and cached["is_write"] and self.cache_bypass_writes:
+            return None
+        return cached
+
+    def _cache_store(self, user_input: str, cypher_query: str) -> None:
+        if self.cache is None:
+            return
+        if self.cache_bypass_writes and is_write_query(cypher_query):
+            return
+        try:
+            self.cache.set(user_input, self.model, self.SYSTEM_PROMPT, cypher_query)
+        except Exception as e:
+            log.warning("⚠️  写入翻译缓存失败: %s", e)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """翻译缓存的命中统计"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, "bypass_writes": self.cache_bypass_writes, **self.cache.stats()}
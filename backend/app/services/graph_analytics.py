@@ -0,0 +1,436 @@
+# app/services/graph_analytics.py
+import math
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy 未安装且没有 GDS 插件时不计算图指标，节点大小和分类退回到按标签决定
+    np = None
+
+from ..core.logger import get_logger
+from .graph_ingest import chunked
+from .graph_session import as_session_manager
+
+log = get_logger(__name__)
+
+# 参与计算的关系类型为 COLLABORATES_WITH 和 CITES，其中合作关系视为无向，引用关系有方向
+UNDIRECTED_RELATIONSHIPS = {"COLLABORATES_WITH"}
+
+
+def analytics_available() -> bool:
+    return np is not None
+
+
+def pagerank(src, dst, n: int, damping: float = 0.85, tol: float = 1e-8,
+             max_iter: int = 100, start=None):
+    """
+    稀疏幂迭代计算 PageRank，src/dst 为有向边的端点下标。
+    悬挂节点（没有出边）的得分均匀分配给所有节点；start 不为None时以它为初始值（增量计算）。
+    返回 (得分, 迭代次数)
+    """
+    out_degree = np.bincount(src, minlength=n).astype(float)
+    dangling = out_degree == 0
+    scores = np.full(n, 1.0 / n) if start is None else start / start.sum()
+    for iteration in range(1, max_iter + 1):
+        contrib = scores[src] / out_degree[src]
+        updated = np.bincount(dst, weights=contrib, minlength=n)
+        updated = (1 - damping) / n + damping * (updated + scores[dangling].sum() / n)
+        error = np.abs(updated - scores).sum()
+        scores = updated
+        if error < tol:
+            break
+    return scores, iteration
+
+
+def approximate_betweenness(indptr, indices, n: int, samples: int, rng):
+    """
+    基于抽样的 Brandes 算法近似计算无向图的介数中心性：
+    随机选 samples 个源点做按层推进的向量化BFS，再按 n/samples 放大
+    """
+    centrality = np.zeros(n)
+    k = min(samples, n)
+    if k == 0:
+        return centrality
+
+    for source in rng.choice(n, size=k, replace=False):
+        dist = np.full(n, -1, dtype=np.int64)
+        sigma = np.zeros(n)
+        dist[source], sigma[source] = 0, 1.0
+        frontier = np.array([source])
+        levels = []
+        depth = 0
+        while frontier.size:
+            starts = indptr[frontier]
+            counts = indptr[frontier + 1] - starts
+            total = int(counts.sum())
+            if total == 0:
+                break
+            # 展开前沿节点的全部邻接边
+            src = np.repeat(frontier, counts)
+            offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            nbr = indices[np.repeat(starts, counts) + offsets]
+
+            dist[nbr[dist[nbr] < 0]] = depth + 1
+            on_path = dist[nbr] == depth + 1
+            src, nbr = src[on_path], nbr[on_path]
+            if src.size == 0:
+                break
+            np.add.at(sigma, nbr, sigma[src])
+            levels.append((src, nbr))
+            frontier = np.unique(nbr)
+            depth += 1
+
+        delta = np.zeros(n)
+        for src, nbr in reversed(levels):
+            np.add.at(delta, src, sigma[src] / sigma[nbr] * (1 + delta[nbr]))
+        delta[source] = 0
+        centrality += delta
+
+    # 无向图中每条最短路径被两个端点各统计一次
+    return centrality * (n / k) / 2
+
+
+def label_propagation(src, dst, n: int, labels=None, max_iter: int = 20, rng=None):
+    """
+    向量化的标签传播社区发现（src/dst 为双向展开后的无向边）。
+    每轮随机更新一半节点（半同步），避免二部结构上的标签振荡；
+    节点的标签改为邻居中出现次数最多的标签，并列时优先保留当前标签，其次取较小的标签。
+    返回按社区大小降序编号的社区（0 为最大的社区）。
+    """
+    labels = np.arange(n) if labels is None else labels.copy()
+    rng = rng or np.random.default_rng()
+    if len(src):
+        for _ in range(max_iter):
+            base = int(labels.max()) + 1
+            pairs, counts = np.unique(src.astype(np.int64) * base + labels[dst], return_counts=True)
+            nodes, candidates = pairs // base, pairs % base
+            order = np.lexsort((candidates, candidates != labels[nodes], -counts, nodes))
+            nodes, candidates = nodes[order], candidates[order]
+            first = np.ones(len(nodes), dtype=bool)
+            first[1:] = nodes[1:] != nodes[:-1]
+
+            best = labels.copy()
+            best[nodes[first]] = candidates[first]
+            if np.array_equal(best, labels):
+                break
+            labels = np.where(rng.random(n) < 0.5, best, labels)
+
+    _, inverse, sizes = np.unique(labels, return_inverse=True, return_counts=True)
+    rank = np.empty(len(sizes), dtype=np.int64)
+    rank[np.argsort(-sizes, kind="stable")] = np.arange(len(sizes))
+    return rank[inverse]
+
+
+class GraphAnalytics:
+    """
+    预计算学者合作/论文引用网络上的图指标，并写回为节点属性：
+    - pagerank / influence：PageRank 得分及其归一化值（0~1，决定节点大小）
+    - collaboration_degree：合作与引用关系的度数（Student 节点的 degree 属性表示学位，因此不复用该名称）
+    - betweenness：抽样近似的介数中心性
+    - community：标签传播得到的社区编号（0 为最大的社区）
+
+    安装了 GDS 插件时直接调用 GDS 过程在数据库内计算，否则把边表读到进程内，用 numpy 稀疏向量化计算。
+    进程内计算时以上一次的结果为初始值（增量），并且只写回发生变化的节点。
+    """
+
+    EDGE_QUERY = """
+    MATCH (a)-[r:COLLABORATES_WITH|CITES]->(b)
+    RETURN elementId(a) AS source, elementId(b) AS target, type(r) AS type
+    """
+
+    WRITE_QUERY = """
+    UNWIND $rows AS row
+    MATCH (n) WHERE elementId(n) = row.id
+    SET n.pagerank = row.pagerank,
+        n.influence = row.influence,
+        n.collaboration_degree = row.collaboration_degree,
+        n.betweenness = row.betweenness,
+        n.community = row.community
+    """
+
+    GDS_PROJECT_QUERY = """
+    CALL gds.graph.project($graph, '*', {
+        COLLABORATES_WITH: {orientation: 'UNDIRECTED'},
+        CITES: {orientation: 'NATURAL'}
+    })
+    """
+
+    GDS_WRITE_QUERIES = (
+        "CALL gds.pageRank.write($graph, {writeProperty: 'pagerank'})",
+        "CALL gds.degree.write($graph, {writeProperty: 'collaboration_degree', orientation: 'UNDIRECTED'})",
+        "CALL gds.betweenness.write($graph, {writeProperty: 'betweenness', samplingSize: $samples})",
+        "CALL gds.labelPropagation.write($graph, {writeProperty: 'community'})",
+    )
+
+    # GDS 写回后补充归一化影响力，并把社区编号改为按大小排名
+    GDS_FINALIZE_QUERIES = (
+        """
+        MATCH (n) WHERE n.pagerank IS NOT NULL
+        WITH max(n.pagerank) AS top
+        MATCH (n) WHERE n.pagerank IS NOT NULL
+        SET n.influence = CASE WHEN top > 0 THEN sqrt(n.pagerank / top) ELSE 0.0 END
+        """,
+        """
+        MATCH (n) WHERE n.community IS NOT NULL
+        WITH n.community AS community, collect(n) AS members
+        ORDER BY size(members) DESC
+        WITH collect(members) AS groups
+        UNWIND range(0, size(groups) - 1) AS rank
+        UNWIND groups[rank] AS n
+        SET n.community = rank
+        """,
+    )
+
+    def __init__(self, driver, backend: str = "auto", betweenness_samples: int = 64,
+                 batch_size: int = 5000, seed: int = 42):
+        self.driver = as_session_manager(driver)
+        # auto | numpy | gds
+        self.backend = backend
+        self.betweenness_samples = betweenness_samples
+        self.batch_size = batch_size
+        self.seed = seed
+        self._gds_available: Optional[bool] = None
+        # 上一次进程内计算的结果：elementId -> 指标，作为增量计算的初始值
+        self._previous: Dict[str, dict] = {}
+
+    def run(self) -> dict:
+        """计算全部指标并写回数据库，返回计算报告"""
+        started = time.perf_counter()
+        try:
+            if self._use_gds():
+                report = self._run_gds()
+            elif np is not None:
+                report = self._run_numpy()
+            else:
+                return {"success": False, "error": "numpy 未安装，且数据库没有 GDS 插件"}
+        except Exception as e:
+            log.error("❌ 图指标计算失败: %s", e)
+            return {"success": False, "error": str(e), "seconds": round(time.perf_counter() - started, 3)}
+
+        report["success"] = True
+        report["seconds"] = round(time.perf_counter() - started, 3)
+        log.info("📊 图指标计算完成 (%s): %s 个节点, 写回 %s 个, %ss",
+                 report['backend'], report['nodes'], report['written'], report['seconds'])
+        return report
+
+    def _use_gds(self) -> bool:
+        if self.backend == "numpy":
+            return False
+        if self._gds_available is None:
+            try:
+                self.driver.read_query("CALL gds.version()")
+                self._gds_available = True
+            except Exception:
+                self._gds_available = False
+        if self.backend == "gds" and not self._gds_available:
+            raise RuntimeError("数据库没有安装 GDS 插件")
+        return self._gds_available
+
+    def _run_gds(self) -> dict:
+        graph = f"rhizome-analytics-{int(time.time() * 1000)}"
+        self.driver.execute_query(self.GDS_PROJECT_QUERY, {"graph": graph})
+        try:
+            for query in self.GDS_WRITE_QUERIES:
+                self.driver.execute_query(query, {"graph": graph, "samples": self.betweenness_samples})
+        finally:
+            self.driver.execute_query("CALL gds.graph.drop($graph, false)", {"graph": graph})
+        for query in self.GDS_FINALIZE_QUERIES:
+            self.driver.execute_query(query)
+
+        records, _, _ = self.driver.read_query("MATCH (n) WHERE n.pagerank IS NOT NULL RETURN count(n) AS nodes")
+        nodes = records[0]["nodes"] if records else 0
+        return {"backend": "gds", "nodes": nodes, "written": nodes}
+
+    def _run_numpy(self) -> dict:
+        records, _, _ = self.driver.read_query(self.EDGE_QUERY)
+        if not records:
+            return {"backend": "numpy", "nodes": 0, "edges": 0, "written": 0}
+
+        endpoints = np.array([r["source"] for r in records] + [r["target"] for r in records])
+        ids, inverse = np.unique(endpoints, return_inverse=True)
+        n, m = len(ids), len(records)
+        src, dst = inverse[:m], inverse[m:]
+        undirected = np.array([r["type"] in UNDIRECTED_RELATIONSHIPS for r in records])
+
+        metrics = self._compute(ids, src, dst, undirected)
+        rows = self._changed_rows(ids, metrics)
+        for batch in chunked(rows, self.batch_size):
+            self.driver.write_transaction(lambda tx, batch=batch: tx.run(self.WRITE_QUERY, rows=batch).consume())
+
+        self._previous = {
+            node_id: {name: values[i] for name, values in metrics.items()}
+            for i, node_id in enumerate(ids.tolist())
+        }
+        return {"backend": "numpy", "nodes": n, "edges": m, "written": len(rows),
+                "communities": int(metrics["community"].max()) + 1, "changed": rows}
+
+    def _compute(self, ids, src, dst, undirected) -> dict:
+        n = len(ids)
+        rng = np.random.default_rng(self.seed)
+        previous = [self._previous.get(node_id) for node_id in ids.tolist()]
+
+        # PageRank：引用按原方向，合作关系两个方向各算一条
+        pr_src = np.concatenate([src, dst[undirected]])
+        pr_dst = np.concatenate([dst, src[undirected]])
+        start = None
+        if any(previous):
+            start = np.array([p["pagerank"] if p else 1.0 / n for p in previous])
+        scores, _ = pagerank(pr_src, pr_dst, n, start=start)
+
+        # 度数、介数与社区都在无向图上计算（去掉自环和重复边）
+        pairs = np.stack([np.concatenate([src, dst]), np.concatenate([dst, src])], axis=1)
+        degree = np.bincount(pairs[:, 0], minlength=n)
+        pairs = np.unique(pairs[pairs[:, 0] != pairs[:, 1]], axis=0)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(pairs[:, 0], minlength=n))])
+        betweenness = approximate_betweenness(indptr, pairs[:, 1], n, self.betweenness_samples, rng)
+
+        # 已有节点从原社区出发，新节点各自一个社区
+        labels = np.arange(n) + n
+        for i, p in enumerate(previous):
+            if p:
+                labels[i] = p["community"]
+        community = label_propagation(pairs[:, 0], pairs[:, 1], n, labels=labels, rng=rng)
+
+        top = scores.max()
+        return {
+            "pagerank": scores,
+            "influence": np.sqrt(scores / top) if top > 0 else np.zeros(n),
+            "collaboration_degree": degree,
+            "betweenness": betweenness,
+            "community": community
+        }
+
+    def _changed_rows(self, ids, metrics: dict) -> list:
+        """只返回指标发生变化（超过相对误差）的节点"""
+        rows = []
+        for i, node_id in enumerate(ids.tolist()):
+            row = {
+                "id": node_id,
+                "pagerank": float(metrics["pagerank"][i]),
+                "influence": round(float(metrics["influence"][i]), 4),
+                "collaboration_degree": int(metrics["collaboration_degree"][i]),
+                "betweenness": float(metrics["betweenness"][i]),
+                "community": int(metrics["community"][i])
+            }
+            previous = self._previous.get(node_id)
+            if previous is None or self._differs(previous, row):
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def _differs(previous: dict, row: dict) -> bool:
+        for name in ("collaboration_degree", "community"):
+            if previous[name] != row[name]:
+                return True
+        return any(
+            not math.isclose(float(previous[name]), row[name], rel_tol=1e-3, abs_tol=1e-9)
+            for name in ("pagerank", "influence", "betweenness")
+        )
+
+
+class AnalyticsScheduler:
+    """
+    在后台线程中定期重新计算图指标：
+    - 每 interval 秒完整计算一次；run_on_start 为False时第一次完整计算在启动 interval 秒后，
+      避免每个工作进程启动（部署、调试模式重启）时都对全图计算并写回
+    - 写操作后调用 mark_dirty()，在 debounce 秒内没有新的写入时再计算一次（合并连续的写入）
+    - schedule() 请求尽快在后台计算一次，不阻塞调用方
+    计算完成且有节点被更新时调用 on_complete(changed)，changed 为指标变化的节点行（GDS 后端为None）
+    """
+
+    def __init__(self, analytics: GraphAnalytics, interval: float = 3600.0, debounce: float = 30.0,
+                 on_complete: Callable = None, run_on_start: bool = False):
+        self.analytics = analytics
+        self.interval = interval
+        self.debounce = debounce
+        self.on_complete = on_complete
+        self.run_on_start = run_on_start
+        self._requested = False
+        self._lock = threading.Lock()
+        self._run_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dirty_at: Optional[float] = None
+        self._last_report: Optional[dict] = None
+        self._last_run_at: Optional[float] = None
+
+    def mark_dirty(self) -> None:
+        with self._lock:
+            self._dirty_at = time.monotonic()
+        self._wake.set()
+
+    def schedule(self) -> None:
+        """请求尽快重新计算一次：后台线程已启动时交给它执行，否则启动一个一次性的后台线程"""
+        with self._lock:
+            if self._requested:
+                return
+            self._requested = True
+        if self._thread is not None:
+            self._wake.set()
+        else:
+            threading.Thread(target=self.run_now, name="graph-analytics-once", daemon=True).start()
+
+    def run_now(self) -> dict:
+        with self._run_lock:
+            with self._lock:
+                self._dirty_at = None
+                self._requested = False
+            report = self.analytics.run()
+            with self._lock:
+                self._last_report = report
+                self._last_run_at = time.time()
+        # 逐个节点的变化只交给 on_complete，不放进报告（报告会通过 /api/analytics 返回）
+        changed = report.pop("changed", None)
+        if report.get("success") and report.get("written") and self.on_complete is not None:
+            self.on_complete(changed)
+        return report
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._loop, name="graph-analytics", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def _loop(self) -> None:
+        next_full = time.monotonic() + (0 if self.run_on_start else self.interval)
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                dirty_at, requested = self._dirty_at, self._requested
+            if requested or now >= next_full or (dirty_at is not None and now - dirty_at >= self.debounce):
+                self.run_now()
+                next_full = time.monotonic() + self.interval
+                continue
+
+            wait = next_full - now
+            if dirty_at is not None:
+                wait = min(wait, dirty_at + self.debounce - now)
+            self._wake.wait(max(wait, 0.05))
+            self._wake.clear()
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None and not self._stop.is_set(),
+                "computing": self._run_lock.locked(),
+                "requested": self._requested,
+                "dirty": self._dirty_at is not None,
+                "last_run_at": self._last_run_at,
+                "last_report": self._last_report,
+                "interval": self.interval,
+                "debounce": self.debounce
+            }
+
+
+def build_analytics_scheduler(driver, on_complete: Callable = None, interval: float = 3600.0,
+                              debounce: float = 30.0, run_on_start: bool = False, **kwargs) -> AnalyticsScheduler:
+    return AnalyticsScheduler(GraphAnalytics(driver, **kwargs), interval=interval,
+                              debounce=debounce, on_complete=on_complete, run_on_start=run_on_start)
@@ -0,0 +1,112 @@
+# app/services/graph_codec.py
+import gzip
+import json
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 紧凑格式的媒体类型（内容协商时使用）
+COMPACT_JSON_MIMETYPE = "application/vnd.rhizome.graph+json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+# 小于这个大小的响应不压缩
+MIN_COMPRESS_SIZE = 1024
+
+
+def to_compact(data: dict) -> dict:
+    """
+    把 get_graph_for_echarts 的输出转换为紧凑的列式格式:
+    - 节点和连线的属性按列存放，不再在每个对象里重复键名
+    - 连线的 source/target 用节点下标表示，不再重复节点名称字符串
+    - 类别和关系类型各用一张字典表，节点和连线里只存下标
+    - 不包含节点和关系的属性内容（以及 _internal_id 等调试字段），需要时按节点ID单独获取
+    """
+    nodes = data.get("nodes", [])
+    links = data.get("links", [])
+
+    categories = [category["name"] for category in data.get("categories", [])]
+    category_index = {name: i for i, name in enumerate(categories)}
+    node_index = {node["_internal_id"]: i for i, node in enumerate(nodes)}
+
+    link_types = sorted({link["type"] for link in links})
+    type_index = {name: i for i, name in enumerate(link_types)}
+
+    compact_nodes = {
+        "id": [node["_internal_id"] for node in nodes],
+        "name": [node["name"] for node in nodes],
+        "category": [category_index.get(node["category"], -1) for node in nodes],
+        "symbolSize": [node["symbolSize"] for node in nodes],
+    }
+    if nodes and all("x" in node for node in nodes):
+        compact_nodes["x"] = [node["x"] for node in nodes]
+        compact_nodes["y"] = [node["y"] for node in nodes]
+
+    compact_links = {"source": [], "target": [], "type": []}
+    for link in links:
+        source, target = node_index.get(link["_start_node_id"]), node_index.get(link["_end_node_id"])
+        if source is None or target is None:
+            continue
+        compact_links["source"].append(source)
+        compact_links["target"].append(target)
+        compact_links["type"].append(type_index[link["type"]])
+
+    compact = {
+        "format": "compact-v1",
+        "categories": categories,
+        "link_types": link_types,
+        "nodes": compact_nodes,
+        "links": compact_links,
+    }
+    if "layout" in data:
+        compact["layout"] = data["layout"]
+    return compact
+
+
+def _explicitly_accepts(accept_mimetypes, mimetype: str) -> bool:
+    """Accept 头中明确列出了该媒体类型（quality() 会匹配 */*，通用客户端都会命中）"""
+    return any(value.lower() == mimetype and quality > 0 for value, quality in accept_mimetypes)
+
+
+def negotiate_format(accept_mimetypes, format_arg: str = None) -> str:
+    """
+    根据 ?format= 参数或 Accept 头选择返回格式: "json"(默认) / "compact" / "msgpack"
+    只有 Accept 中明确列出紧凑格式或 MessagePack 时才选择它们，*/* 等通配符仍返回JSON；
+    MessagePack 依赖未安装时退回到紧凑JSON
+    """
+    if format_arg:
+        chosen = format_arg.lower()
+    elif any(_explicitly_accepts(accept_mimetypes, mimetype) for mimetype in MSGPACK_MIMETYPES):
+        chosen = "msgpack"
+    elif _explicitly_accepts(accept_mimetypes, COMPACT_JSON_MIMETYPE):
+        chosen = "compact"
+    else:
+        chosen = "json"
+    if chosen == "msgpack" and msgpack is None:
+        chosen = "compact"
+    return chosen if chosen in ("json", "compact", "msgpack") else "json"
+
+
+def encode(payload: dict, fmt: str) -> tuple:
+    """把数据编码为字节，返回 (body, mimetype)"""
+    if fmt == "msgpack":
+        return msgpack.packb(payload, use_bin_type=True, default=str), MSGPACK_MIMETYPES[0]
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+    return body, COMPACT_JSON_MIMETYPE if fmt == "compact" else "application/json"
+
+
+def compress(body: bytes, accept_encodings) -> tuple:
+    """按 Accept-Encoding 选择 br（需安装brotli）或 gzip 压缩，返回 (body, content_encoding)"""
+    if len(body) < MIN_COMPRESS_SIZE:
+        return body, None
+    if brotli is not None and accept_encodings.quality("br"):
+        return brotli.compress(body, quality=5), "br"
+    if accept_encodings.quality("gzip"):
+        return gzip.compress(body, compresslevel=6), "gzip"
+    return body, None
@@ -0,0 +1,191 @@
+# app/services/graph_ingest.py
+import re
+import time
+from typing import Dict, Iterable, List
+
+from neo4j import Driver
+
+from ..core.logger import get_logger
+from .graph_session import as_session_manager
+
+log = get_logger(__name__)
+
+# 标签名、关系类型和属性名只允许字母、数字和下划线，校验后才能拼接进Cypher
+IDENTIFIER_PATTERN = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+# LLMService 输出中的实体类型 -> (节点标签, 用于MERGE的唯一属性)
+ENTITY_SPECS = {
+    "scholars": ("Scholar", "name"),
+    "students": ("Student", "name"),
+    "institutions": ("Institution", "name"),
+    "papers": ("Paper", "title"),
+}
+
+NODE_MERGE_QUERY = """
+UNWIND $rows AS row
+MERGE (n:`{label}` {{`{key}`: row.key}})
+SET n += row.props
+"""
+
+RELATIONSHIP_MERGE_QUERY = """
+UNWIND $rows AS row
+MATCH (a:`{source_label}` {{`{source_key}`: row.source}})
+{target_clause} (b:`{target_label}` {{`{target_key}`: row.target}})
+MERGE (a)-[r:`{rel_type}`]->(b)
+SET r += row.props
+"""
+
+
+def check_identifier(value: str) -> str:
+    if not IDENTIFIER_PATTERN.match(value or ""):
+        raise ValueError(f"非法的标签/关系类型/属性名: {value}")
+    return value
+
+
+def chunked(rows: Iterable, size: int) -> Iterable[List]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class GraphIngestor:
+    """
+    批量写入图数据：每批数据用一条参数化的 UNWIND ... MERGE 语句在一个事务中写入，
+    并记录每批的耗时和吞吐量。
+    死锁、锁超时、连接中断等可重试错误由驱动的托管事务重试（总时长见 NEO4J_MAX_RETRY_TIME），这里不再重试。
+    """
+
+    def __init__(self, driver: Driver, batch_size: int = 5000):
+        self.driver = as_session_manager(driver)
+        self.batch_size = batch_size
+
+    def write_nodes(self, label: str, key: str, rows: Iterable[dict]) -> List[dict]:
+        """
+        MERGE 节点。rows 中每一项为 {"key": 唯一属性值, "props": 其它属性}
+        返回每批的写入报告
+        """
+        query = NODE_MERGE_QUERY.format(label=check_identifier(label), key=check_identifier(key))
+        return [self._write_batch(query, batch, f"(:{label})") for batch in chunked(rows, self.batch_size)]
+
+    def write_relationships(self, rel_type: str, source: tuple, target: tuple,
+                            rows: Iterable[dict], merge_target: bool = False) -> List[dict]:
+        """
+        MERGE 关系。source/target 为 (标签, 唯一属性)，
+        rows 中每一项为 {"source": 起点属性值, "target": 终点属性值, "props": 关系属性}
+        两端节点默认必须已存在，找不到时该行不写入（报告的 relationships_created 会少于行数）；
+        merge_target 为True时终点不存在则按唯一属性创建只有该属性的占位节点，
+        之后导入同一节点时 MERGE 会命中并补全属性（用于指向尚未导入的论文的引用）
+        """
+        query = RELATIONSHIP_MERGE_QUERY.format(
+            target_clause="MERGE" if merge_target else "MATCH",
+            source_label=check_identifier(source[0]), source_key=check_identifier(source[1]),
+            target_label=check_identifier(target[0]), target_key=check_identifier(target[1]),
+            rel_type=check_identifier(rel_type)
+        )
+        name = f"(:{source[0]})-[:{rel_type}]->(:{target[0]})"
+        return [self._write_batch(query, batch, name) for batch in chunked(rows, self.batch_size)]
+
+    def _write_batch(self, query: str, rows: List[dict], name: str) -> dict:
+        def work(tx):
+            return tx.run(query, rows=rows).consume().counters
+
+        started = time.perf_counter()
+        try:
+            counters = self.driver.write_transaction(work)
+        except Exception as e:
+            return self._batch_report(name, rows, started, error=str(e))
+
+        report = self._batch_report(name, rows, started)
+        report["counters"] = {
+            "nodes_created": counters.nodes_created,
+            "relationships_created": counters.relationships_created,
+            "properties_set": counters.properties_set
+        }
+        # 每批一条，按 DEBUG 采样输出
+        log.debug("📥 批量写入 %s: %s 行, %ss, %s 行/秒", name, report['rows'], report['seconds'], report['rows_per_sec'])
+        return report
+
+    @staticmethod
+    def _batch_report(name: str, rows: List[dict], started: float, error: str = None) -> dict:
+        seconds = time.perf_counter() - started
+        report = {
+            "batch": name,
+            "rows": len(rows),
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(len(rows) / seconds, 1) if seconds > 0 else None,
+            "success": error is None
+        }
+        if error is not None:
+            report["error"] = error
+            log.error("❌ 批量写入 %s 失败: %s", name, error)
+        return report
+
+    def ingest_entities(self, entities: dict) -> dict:
+        """
+        写入 LLMService.parse_text_to_entities 的输出：
+        先按实体类型批量MERGE节点，再按 (起点标签, 关系类型, 终点标签) 分组批量MERGE关系。
+        关系两端在本次实体中找不到、或关系类型不是合法标识符时跳过并计入 skipped_relationships，
+        非法的关系类型列在 invalid_relationship_types 中。所有关系在写入任何数据之前校验，
+        不会因为一个非法关系在节点已提交后中途失败。
+        """
+        started = time.perf_counter()
+        batches = []
+        # 实体名称 -> (标签, 唯一属性)，用于确定关系两端节点
+        index: Dict[str, tuple] = {}
+        node_rows: Dict[tuple, List[dict]] = {}
+
+        for entity_type, (label, key) in ENTITY_SPECS.items():
+            for item in entities.get(entity_type) or []:
+                value = item.get(key)
+                if value is None:
+                    continue
+                node_rows.setdefault((label, key), []).append(
+                    {"key": value, "props": {k: v for k, v in item.items() if k != key}}
+                )
+                index.setdefault(value, (label, key))
+
+        groups: Dict[tuple, List[dict]] = {}
+        skipped = 0
+        invalid_types = set()
+        for rel in entities.get("relationships") or []:
+            source, target, rel_type = index.get(rel.get("source")), index.get(rel.get("target")), rel.get("type")
+            if source is None or target is None or not rel_type:
+                skipped += 1
+                continue
+            if not isinstance(rel_type, str) or not IDENTIFIER_PATTERN.match(rel_type):
+                invalid_types.add(str(rel_type))
+                skipped += 1
+                continue
+            groups.setdefault((source, rel_type, target), []).append({
+                "source": rel["source"],
+                "target": rel["target"],
+                "props": {k: v for k, v in rel.items() if k not in ("source", "target", "type")}
+            })
+
+        for (label, key), rows in node_rows.items():
+            batches.extend(self.write_nodes(label, key, rows))
+        for (source, rel_type, target), rows in groups.items():
+            batches.extend(self.write_relationships(rel_type, source, target, rows))
+
+        seconds = time.perf_counter() - started
+        total_rows = sum(batch["rows"] for batch in batches)
+        totals = {"nodes_created": 0, "relationships_created": 0, "properties_set": 0}
+        for batch in batches:
+            for name, value in batch.get("counters", {}).items():
+                totals[name] += value
+
+        return {
+            "success": all(batch["success"] for batch in batches),
+            "batches": batches,
+            "rows": total_rows,
+            "skipped_relationships": skipped,
+            "invalid_relationship_types": sorted(invalid_types),
+            "counters": totals,
+            "seconds": round(seconds, 4),
+            "rows_per_sec": round(total_rows / seconds, 1) if seconds > 0 else None
+        }
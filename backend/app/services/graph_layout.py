@@ -0,0 +1,195 @@
+# app/services/graph_layout.py
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy 未安装时不提供服务端布局，前端退回到浏览器中的力导向布局
+    np = None
+
+from ..core.cache import TTLCache
+from ..core.logger import get_logger
+
+log = get_logger(__name__)
+
+
+def layout_available() -> bool:
+    return np is not None
+
+
+class LayoutEngine:
+    """
+    服务端力导向布局（向量化的 Fruchterman–Reingold）
+    - 节点较少时精确计算两两斥力；节点较多时用网格质心近似远处节点的斥力（类似 Barnes–Hut 的思路）
+    - 计算结果按 (图版本, 节点集合) 缓存
+    - 只有少量节点变化时，以上一次的坐标为初始值，用较低温度做少量迭代（增量布局），
+      保持图的整体形状不变；记住的坐标最多 max_positions 个，超出时淘汰最久没有参与布局的节点
+    可以被多个请求线程同时调用。
+    """
+
+    def __init__(self, iterations: int = 150, incremental_iterations: int = 40,
+                 incremental_ratio: float = 0.2, exact_threshold: int = 1500,
+                 cache_size: int = 16, max_positions: int = 20000, seed: int = 42):
+        self.iterations = iterations
+        self.incremental_iterations = incremental_iterations
+        self.incremental_ratio = incremental_ratio
+        self.exact_threshold = exact_threshold
+        self.seed = seed
+        self._cache = TTLCache(max_size=cache_size)
+        self.max_positions = max_positions
+        # 最近布局过的节点坐标：elementId -> (x, y)，按最近使用排序，作为增量布局的初始值
+        self._last_positions: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._positions_lock = threading.Lock()
+
+    def layout(self, node_ids: List[str], edges: List[Tuple[str, str]],
+               version: int = 0) -> Dict[str, Tuple[float, float]]:
+        """计算节点坐标，返回 elementId -> (x, y)"""
+        if np is None or not node_ids:
+            return {}
+
+        digest = hashlib.sha1("\x1f".join(sorted(node_ids)).encode("utf-8")).hexdigest()
+        cache_key = (version, digest)
+        cached = self._cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        edge_array = np.array(
+            [(index[s], index[t]) for s, t in edges if s in index and t in index and s != t],
+            dtype=np.int64
+        ).reshape(-1, 2)
+
+        n = len(node_ids)
+        area = max(n, 1) * 10000.0          # 每个节点约占 100x100 的面积
+        k = math.sqrt(area / n)             # 理想边长
+        rng = np.random.default_rng(self.seed)
+
+        # 布局计算不持有锁，只在读取和写回坐标时加锁
+        with self._positions_lock:
+            last = self._last_positions
+            known = {node_id: last[node_id] for node_id in node_ids if node_id in last}
+        incremental = len(known) >= n * (1 - self.incremental_ratio) and len(known) > 0
+        if incremental:
+            positions = self._warm_start(index, known, edge_array, rng, k)
+            iterations, temperature = self.incremental_iterations, k * 0.1
+        else:
+            side = math.sqrt(area)
+            positions = rng.uniform(-side / 2, side / 2, size=(n, 2))
+            iterations, temperature = self.iterations, side / 10
+
+        positions = self._run(positions, edge_array, k, iterations, temperature)
+
+        result = {node_id: (round(float(x), 2), round(float(y), 2))
+                  for node_id, (x, y) in zip(node_ids, positions)}
+        self._remember(result)
+        self._cache.set(cache_key, result)
+        # 每次取图数据都可能布局一次，按 DEBUG 采样输出
+        log.debug("🧭 %s布局完成: %s 个节点, %s 条边, %s 次迭代", '增量' if incremental else '完整', n, len(edge_array), iterations)
+        return result
+
+    def _remember(self, positions: Dict[str, Tuple[float, float]]) -> None:
+        with self._positions_lock:
+            last = self._last_positions
+            for node_id, position in positions.items():
+                last[node_id] = position
+                last.move_to_end(node_id)
+            while len(last) > self.max_positions:
+                last.popitem(last=False)
+
+    @staticmethod
+    def _warm_start(index, known, edge_array, rng, k):
+        """已有坐标（known）的节点保持原位，新节点放在已定位邻居的中心附近"""
+        n = len(index)
+        positions = np.zeros((n, 2))
+        placed = np.zeros(n, dtype=bool)
+        for node_id, position in known.items():
+            i = index[node_id]
+            positions[i] = position
+            placed[i] = True
+
+        center = positions[placed].mean(axis=0)
+        for i in np.flatnonzero(~placed):
+            if len(edge_array):
+                neighbors = np.concatenate([
+                    edge_array[edge_array[:, 0] == i, 1],
+                    edge_array[edge_array[:, 1] == i, 0]
+                ])
+                neighbors = neighbors[placed[neighbors]]
+            else:
+                neighbors = []
+            anchor = positions[neighbors].mean(axis=0) if len(neighbors) else center
+            positions[i] = anchor + rng.normal(scale=k / 2, size=2)
+        return positions
+
+    def _run(self, positions, edge_array, k, iterations, temperature):
+        n = len(positions)
+        cooling = temperature / max(iterations, 1)
+        for _ in range(iterations):
+            if n <= self.exact_threshold:
+                displacement = self._exact_repulsion(positions, k)
+            else:
+                displacement = self._grid_repulsion(positions, k)
+
+            if len(edge_array):
+                # 吸引力: f_a(d) = d^2 / k，沿边方向作用在两端
+                delta = positions[edge_array[:, 0]] - positions[edge_array[:, 1]]
+                distance = np.maximum(np.linalg.norm(delta, axis=1), 0.01)
+                force = (delta / distance[:, None]) * (distance ** 2 / k)[:, None]
+                np.add.at(displacement, edge_array[:, 0], -force)
+                np.add.at(displacement, edge_array[:, 1], force)
+
+            # 位移不超过当前温度
+            length = np.maximum(np.linalg.norm(displacement, axis=1), 0.01)
+            positions += displacement / length[:, None] * np.minimum(length, temperature)[:, None]
+            temperature = max(temperature - cooling, 0.01)
+        return positions - positions.mean(axis=0)
+
+    @staticmethod
+    def _repulsion_from(points, sources, weights, k, floor):
+        """
+        计算 sources（带权重）对 points 的斥力之和: f_r(d) = w * k^2 / d。
+        用 |p-c|^2 = |p|^2 + |c|^2 - 2p·c 和矩阵乘法展开，避免构造 N×M×2 的临时数组
+        """
+        distance_sq = (
+            (points ** 2).sum(axis=1)[:, None]
+            + (sources ** 2).sum(axis=1)[None, :]
+            - 2.0 * points @ sources.T
+        )
+        strength = weights[None, :] * (k ** 2) / np.maximum(distance_sq, floor)
+        # sum_j s_ij * (p_i - c_j) = p_i * sum_j s_ij - S @ c
+        return points * strength.sum(axis=1)[:, None] - strength @ sources
+
+    def _exact_repulsion(self, positions, k, block: int = 1024):
+        """精确计算两两斥力，分块以限制内存占用"""
+        weights = np.ones(len(positions))
+        displacement = np.empty_like(positions)
+        for start in range(0, len(positions), block):
+            displacement[start:start + block] = self._repulsion_from(
+                positions[start:start + block], positions, weights, k, 0.0001
+            )
+        return displacement
+
+    def _grid_repulsion(self, positions, k):
+        """把节点划分到网格中，用每个格子的质心和节点数近似计算斥力"""
+        n = len(positions)
+        grid = int(min(max(math.sqrt(n) / 2, 4), 32))
+        low, high = positions.min(axis=0), positions.max(axis=0)
+        cell = np.clip(((positions - low) / np.maximum(high - low, 1e-9) * grid).astype(np.int64), 0, grid - 1)
+        cell_id = cell[:, 0] * grid + cell[:, 1]
+
+        mass = np.bincount(cell_id, minlength=grid * grid).astype(float)
+        occupied = mass > 0
+        centroids = np.stack([
+            np.bincount(cell_id, weights=positions[:, 0], minlength=grid * grid),
+            np.bincount(cell_id, weights=positions[:, 1], minlength=grid * grid)
+        ], axis=1)[occupied] / mass[occupied][:, None]
+        return self._repulsion_from(positions, centroids, mass[occupied], k, (k / 2) ** 2)
+
+
+def build_layout_engine(**kwargs) -> Optional[LayoutEngine]:
+    """numpy 可用时返回布局引擎，否则返回None"""
+    return LayoutEngine(**kwargs) if layout_available() else None
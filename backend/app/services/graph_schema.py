@@ -0,0 +1,122 @@
+# app/services/graph_schema.py
+from typing import List
+
+from neo4j import Driver
+
+from ..core.logger import get_logger
+from .graph_ingest import check_identifier
+from .graph_session import as_session_manager
+
+log = get_logger(__name__)
+
+
+def unique_constraint(label: str, prop: str) -> dict:
+    return {"name": f"{label.lower()}_{prop.lower()}_unique", "kind": "constraint", "label": label, "property": prop}
+
+
+def range_index(label: str, prop: str) -> dict:
+    return {"name": f"{label.lower()}_{prop.lower()}_index", "kind": "index", "label": label, "property": prop}
+
+
+# DeepSeekService 的系统提示词让模型按这些属性 MERGE 节点，
+# 唯一约束同时会创建对应的索引，使 MERGE/MATCH 不再需要按标签全量扫描
+SCHEMA_DECLARATIONS = [
+    unique_constraint("Scholar", "name"),
+    unique_constraint("Paper", "title"),
+    unique_constraint("Student", "name"),
+    unique_constraint("Institution", "name"),
+    range_index("Scholar", "affiliation"),
+    range_index("Scholar", "field"),
+    range_index("Paper", "year"),
+]
+
+
+class SchemaManager:
+    """
+    声明并维护图数据库所需的索引和约束
+    apply() 可重复执行（IF NOT EXISTS），status() 报告索引状态与填充进度
+    """
+
+    def __init__(self, driver: Driver, declarations: List[dict] = None):
+        self.driver = as_session_manager(driver)
+        self.declarations = list(declarations or SCHEMA_DECLARATIONS)
+
+    @staticmethod
+    def build_statement(declaration: dict) -> str:
+        name = check_identifier(declaration["name"])
+        label = check_identifier(declaration["label"])
+        prop = check_identifier(declaration["property"])
+        if declaration["kind"] == "constraint":
+            return f"CREATE CONSTRAINT {name} IF NOT EXISTS FOR (n:`{label}`) REQUIRE n.`{prop}` IS UNIQUE"
+        return f"CREATE INDEX {name} IF NOT EXISTS FOR (n:`{label}`) ON (n.`{prop}`)"
+
+    def apply(self) -> List[dict]:
+        """
+        依次创建所有声明的索引和约束。单条失败（例如已有重复数据导致唯一约束无法创建）
+        不影响其它声明，结果中会给出错误信息。
+        """
+        results = []
+        for declaration in self.declarations:
+            statement = self.build_statement(declaration)
+            try:
+                _, summary, _ = self.driver.execute_query(statement)
+                counters = summary.counters
+                created = counters.indexes_added + counters.constraints_added
+                results.append({"name": declaration["name"], "success": True, "created": created > 0})
+            except Exception as e:
+                log.error("❌ 创建 %s 失败: %s", declaration['name'], e)
+                results.append({"name": declaration["name"], "success": False, "error": str(e)})
+        created = sum(1 for result in results if result.get("created"))
+        log.info("🗂️  索引与约束已同步: 新建 %s 个, 共 %s 个声明", created, len(results))
+        return results
+
+    def status(self) -> dict:
+        """报告每个声明的索引/约束是否存在、索引状态（ONLINE/POPULATING/FAILED）和填充百分比"""
+        indexes, _, _ = self.driver.read_query(
+            "SHOW INDEXES YIELD name, type, state, populationPercent, labelsOrTypes, properties "
+            "RETURN name, type, state, populationPercent, labelsOrTypes, properties"
+        )
+        constraints, _, _ = self.driver.read_query(
+            "SHOW CONSTRAINTS YIELD name, type, labelsOrTypes, properties RETURN name, type, labelsOrTypes, properties"
+        )
+
+        index_by_target = {}
+        for record in indexes:
+            for label in record["labelsOrTypes"] or []:
+                index_by_target[(label, tuple(record["properties"] or []))] = record
+        constraint_by_target = {}
+        for record in constraints:
+            for label in record["labelsOrTypes"] or []:
+                constraint_by_target[(label, tuple(record["properties"] or []))] = record
+
+        declared = []
+        for declaration in self.declarations:
+            target = (declaration["label"], (declaration["property"],))
+            index = index_by_target.get(target)
+            item = {
+                "name": declaration["name"],
+                "kind": declaration["kind"],
+                "label": declaration["label"],
+                "property": declaration["property"],
+                "exists": (target in constraint_by_target) if declaration["kind"] == "constraint" else index is not None,
+                "index_name": index["name"] if index else None,
+                "state": index["state"] if index else None,
+                "population_percent": index["populationPercent"] if index else None
+            }
+            declared.append(item)
+
+        return {
+            "ready": all(item["exists"] and item["state"] == "ONLINE" for item in declared),
+            "declared": declared,
+            "indexes": [
+                {
+                    "name": record["name"],
+                    "type": record["type"],
+                    "state": record["state"],
+                    "population_percent": record["populationPercent"],
+                    "labels_or_types": record["labelsOrTypes"],
+                    "properties": record["properties"]
+                }
+                for record in indexes
+            ]
+        }
@@ -0,0 +1,309 @@
+# app/services/graph_search.py
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from pypinyin import lazy_pinyin
+except ImportError:
+    # pypinyin 未安装时不支持拼音匹配，只做前缀和模糊匹配
+    lazy_pinyin = None
+
+from ..core.logger import get_logger
+from .graph_session import as_session_manager
+
+log = get_logger(__name__)
+
+# 参与搜索的属性及其权重
+SEARCH_FIELDS = {"name": 1.0, "title": 1.0, "affiliation": 0.6, "field": 0.6}
+
+# 各种匹配方式的权重；输入与索引键完全相同时乘以1，只是前缀时按覆盖比例打折
+MATCH_SCORES = {
+    "full": 1.0,        # 整个属性值
+    "token": 0.9,       # 属性中的某个词（英文按单词，中文按连续汉字）
+    "pinyin": 0.85,     # 中文词的全拼（或按音节的后缀）
+    "initials": 0.8,    # 中文词的拼音首字母
+    "substring": 0.7,   # 中文词的后缀，前缀查找即实现子串匹配
+    "fuzzy": 0.45,      # 编辑距离不超过1~2的英文词
+}
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[\u3400-\u9fff]+")
+CJK_PATTERN = re.compile(r"[\u3400-\u9fff]")
+
+# 单个输入词最多检查的索引键和倒排条目数量，保证一两个字母或高频词的输入也能快速返回
+MAX_PREFIX_KEYS = 2000
+MAX_POSTINGS = 5000
+# 模糊匹配最多计算编辑距离的候选词数量
+MAX_FUZZY_CANDIDATES = 200
+
+
+def normalize(text: str) -> str:
+    """全角转半角、转小写、合并空白"""
+    return " ".join(unicodedata.normalize("NFKC", str(text)).lower().split())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """带上限的编辑距离（相邻字符交换算一次编辑），超过 limit 时返回 limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    before, previous = None, list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            cost = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb))
+            if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                cost = min(cost, before[j - 2] + 1)
+            current.append(cost)
+        if min(current) > limit:
+            return limit + 1
+        before, previous = previous, current
+    return previous[-1]
+
+
+def trigrams(word: str) -> set:
+    padded = f"^{word}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+@lru_cache(maxsize=65536)
+def index_keys(value: str) -> Tuple[Tuple[str, str], ...]:
+    """
+    为一个属性值生成 (索引键, 匹配方式) 列表：
+    - 整个属性值，以及其中的每个词（英文按单词，中文按连续汉字）
+    - 中文词的所有后缀（前缀查找即可实现子串匹配）
+    - 中文词的全拼（及其按音节的后缀）和拼音首字母
+    """
+    text = normalize(value)
+    if not text:
+        return ()
+    keys = [(text, "full")]
+    for token in TOKEN_PATTERN.findall(text):
+        if token != text:
+            keys.append((token, "token"))
+        if not CJK_PATTERN.match(token):
+            continue
+        keys.extend((token[i:], "substring") for i in range(1, len(token)))
+        if lazy_pinyin is not None:
+            syllables = lazy_pinyin(token)
+            keys.extend(("".join(syllables[i:]), "pinyin") for i in range(len(syllables)))
+            keys.append(("".join(s[0] for s in syllables if s), "initials"))
+    return tuple(keys)
+
+
+class _Snapshot:
+    """某一时刻的只读索引，重建完成后整体替换，搜索时无需加锁"""
+
+    def __init__(self, rows: list):
+        # entries[i] = (elementId, 标签, 显示名称, 属性, 影响力)
+        self.entries = []
+        postings: Dict[str, list] = {}
+        for row in rows:
+            fields = {name: row.get(name) for name in SEARCH_FIELDS if row.get(name)}
+            if not fields:
+                continue
+            entry = len(self.entries)
+            display = fields.get("name") or fields.get("title") or next(iter(fields.values()))
+            self.entries.append((row["id"], row.get("label"), str(display), fields, row.get("influence") or 0.0))
+            for name, value in fields.items():
+                for key, kind in index_keys(str(value)):
+                    postings.setdefault(key, []).append((entry, name, kind))
+
+        self.keys = sorted(postings)
+        self.postings = [postings[key] for key in self.keys]
+        # 英文单词的三元组倒排表，用于模糊匹配
+        self.trigram_index: Dict[str, List[int]] = {}
+        for i, key in enumerate(self.keys):
+            if len(key) >= 4 and key.isascii() and key.isalnum():
+                for gram in trigrams(key):
+                    self.trigram_index.setdefault(gram, []).append(i)
+
+    def match_token(self, token: str, fuzzy: bool) -> Dict[int, Tuple[float, str]]:
+        """返回 条目 -> (得分, 命中的属性)，同一条目取最高分"""
+        matches: Dict[int, Tuple[float, str]] = {}
+        budget = MAX_POSTINGS
+
+        def add(postings: list, weight: float, kind_override: str = None):
+            for entry, name, kind in postings:
+                value = MATCH_SCORES[kind_override or kind] * weight * SEARCH_FIELDS[name]
+                if value > matches.get(entry, (0.0, None))[0]:
+                    matches[entry] = (value, name)
+
+        start = bisect.bisect_left(self.keys, token)
+        for i in range(start, min(start + MAX_PREFIX_KEYS, len(self.keys))):
+            key = self.keys[i]
+            if not key.startswith(token) or budget <= 0:
+                break
+            # 完全相同得满分，前缀按输入覆盖索引键的比例计分
+            weight = 1.0 if key == token else 0.5 + 0.3 * len(token) / len(key)
+            postings = self.postings[i][:budget]
+            budget -= len(postings)
+            add(postings, weight)
+
+        if fuzzy and len(token) >= 4 and token.isascii():
+            limit = 1 if len(token) < 7 else 2
+            counts: Dict[int, int] = {}
+            for gram in trigrams(token):
+                for i in self.trigram_index.get(gram, ()):
+                    counts[i] = counts.get(i, 0) + 1
+            candidates = sorted(counts, key=counts.get, reverse=True)[:MAX_FUZZY_CANDIDATES]
+            for i in candidates:
+                key = self.keys[i]
+                if key.startswith(token) or budget <= 0:
+                    continue
+                # 与索引键的同长前缀比较，输入到一半的词也能模糊匹配
+                distance = edit_distance(token, key[:len(token)], limit)
+                if distance <= limit:
+                    postings = self.postings[i][:budget]
+                    budget -= len(postings)
+                    add(postings, 1 - 0.15 * distance, "fuzzy")
+        return matches
+
+
+class SearchIndex:
+    """
+    学者、论文、学生和机构的进程内搜索索引（用于输入联想）：
+    - 按 name/title/affiliation/field 做前缀匹配，中文支持子串匹配
+    - 安装了 pypinyin 时支持全拼和拼音首字母匹配（如 zhangsan、zs 都能找到“张三”）
+    - 英文词支持编辑距离1~2的模糊匹配
+    - 同分时影响力（见 graph_analytics）高的节点排在前面
+
+    索引通过一次扫描构建，图数据被写入后标记为过期，下一次搜索时在后台线程中重建，
+    重建期间继续使用旧索引，搜索延迟不受影响。
+    两次重建的开始时间至少间隔 rebuild_interval 秒：连续写入期间的搜索不会每次都触发全量重建，
+    间隔未到时安排在间隔结束时重建一次，其间的写入合并到这一次中。
+    """
+
+    SCAN_QUERY = """
+    MATCH (n)
+    WHERE n:Scholar OR n:Paper OR n:Student OR n:Institution
+    RETURN elementId(n) AS id, labels(n)[0] AS label,
+           n.name AS name, n.title AS title, n.affiliation AS affiliation, n.field AS field,
+           n.influence AS influence
+    """
+
+    def __init__(self, driver, fuzzy: bool = True, rebuild_interval: float = 30.0):
+        self.driver = as_session_manager(driver)
+        self.fuzzy = fuzzy
+        self.rebuild_interval = rebuild_interval
+        self._refresh_started: Optional[float] = None
+        self._snapshot: Optional[_Snapshot] = None
+        self._stale = True
+        self._lock = threading.Lock()
+        self._building = False
+        self._built_at: Optional[float] = None
+        self._build_seconds: Optional[float] = None
+
+    def mark_stale(self) -> None:
+        """图数据被修改后调用"""
+        self._stale = True
+
+    def refresh(self) -> None:
+        """扫描图数据库并重建索引"""
+        started = time.perf_counter()
+        self._refresh_started = time.monotonic()
+        # 先清除过期标记，扫描期间发生的写入会重新标记
+        self._stale = False
+        try:
+            records, _, _ = self.driver.read_query(self.SCAN_QUERY)
+            snapshot = _Snapshot([dict(record) for record in records])
+        except Exception:
+            self._stale = True
+            raise
+        self._snapshot = snapshot
+        self._built_at = time.time()
+        self._build_seconds = round(time.perf_counter() - started, 3)
+        log.info("🔎 搜索索引已重建: %s 个实体, %s 个索引键, %ss", len(snapshot.entries), len(snapshot.keys), self._build_seconds)
+
+    def _ensure_fresh(self) -> None:
+        if self._snapshot is None:
+            # 第一次搜索时同步构建
+            with self._lock:
+                if self._snapshot is None:
+                    self.refresh()
+            return
+        if not self._stale:
+            return
+        with self._lock:
+            if self._building:
+                return
+            self._building = True
+        # 距上次重建不足 rebuild_interval 时延后到间隔结束，期间继续使用旧索引
+        elapsed = time.monotonic() - (self._refresh_started or 0.0)
+        delay = max(self.rebuild_interval - elapsed, 0.0) if self._refresh_started is not None else 0.0
+        timer = threading.Timer(delay, self._background_refresh)
+        timer.name, timer.daemon = "search-index", True
+        timer.start()
+
+    def _background_refresh(self) -> None:
+        try:
+            self.refresh()
+        except Exception as e:
+            log.error("❌ 重建搜索索引失败: %s", e)
+        finally:
+            with self._lock:
+                self._building = False
+
+    def search(self, query: str, limit: int = 10, labels: list = None) -> List[dict]:
+        """
+        搜索实体，多个词之间为“与”的关系。
+        返回 [{id, label, name, matched_field, score, ...属性}]，按得分降序排列。
+        """
+        tokens = TOKEN_PATTERN.findall(normalize(query))
+        if not tokens:
+            return []
+        self._ensure_fresh()
+        snapshot = self._snapshot
+
+        scores: Optional[Dict[int, Tuple[float, str]]] = None
+        for token in tokens:
+            matches = snapshot.match_token(token, self.fuzzy)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {
+                    entry: (score + matches[entry][0], field)
+                    for entry, (score, field) in scores.items() if entry in matches
+                }
+            if not scores:
+                return []
+
+        def rank(item):
+            entry, (score, _) = item
+            _, _, display, _, influence = snapshot.entries[entry]
+            return score / len(tokens) + 0.05 * influence, -len(display)
+
+        candidates = (
+            item for item in scores.items()
+            if not labels or snapshot.entries[item[0]][1] in labels
+        )
+        results = []
+        # 只为得分最高的 limit 个条目构造结果
+        for entry, (score, field) in heapq.nlargest(limit, candidates, key=rank):
+            element_id, label, display, fields, influence = snapshot.entries[entry]
+            results.append({
+                "id": element_id,
+                "label": label,
+                "name": display,
+                "matched_field": field,
+                "score": round(score / len(tokens) + 0.05 * influence, 4),
+                **{name: value for name, value in fields.items() if name != "name"}
+            })
+        return results
+
+    def status(self) -> dict:
+        snapshot = self._snapshot
+        return {
+            "entities": len(snapshot.entries) if snapshot else 0,
+            "keys": len(snapshot.keys) if snapshot else 0,
+            "stale": self._stale,
+            "building": self._building,
+            "built_at": self._built_at,
+            "build_seconds": self._build_seconds,
+            "rebuild_interval": self.rebuild_interval,
+            "pinyin": lazy_pinyin is not None
+        }
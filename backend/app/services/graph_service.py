@@ -1,216 +1,1136 @@
 # app/services/graph_service.py
 # backend/app/services/graph_service.py
-from neo4j import GraphDatabase, Driver
+import hashlib
+import json
+import secrets
+import threading
+from itertools import islice
+from typing import Dict
+from neo4j import Driver, Query
+from ..core.cache import TTLCache
+from ..core.logger import get_logger
+from ..core.metrics import RECORDS, span
+from .graph_ingest import GraphIngestor, IDENTIFIER_PATTERN, chunked
+from .cypher_templates import to_unwind
+from .change_feed import ChangeFeed
+from .cypher_normalizer import StatementRegistry, parameterize, returns_written_entities
+from .record_codec import RecordConverter
+from .graph_schema import SchemaManager
+from .graph_session import as_session_manager
+from .graph_layout import build_layout_engine
+from .query_governor import QueryGovernor, QueryRejectedError
+
+log = get_logger(__name__)
 
 class GraphService:
-    def __init__(self, driver: Driver):
+    # 单次往返获取子图：
+    # 1. 先截取 $limit 个节点（包括孤立节点）
+    # 2. 只沿出边方向匹配两端都在节点集合内的关系，每条关系只出现一次
+    # 3. 只投影ECharts需要的字段，而不是完整的Node/Relationship对象
+    # 4. $node_props/$rel_props 不为null时只返回这些属性的值（按顺序组成列表），减少传输量
+    # 5. 预计算的影响力和社区（见 graph_analytics）总是返回，用于决定节点大小和分类
+    SUBGRAPH_QUERY = """
+    MATCH (n)
+    WITH n LIMIT $limit
+    WITH collect(n) AS nodes
+    CALL {
+        WITH nodes
+        UNWIND nodes AS a
+        MATCH (a)-[r]->(b)
+        WHERE b IN nodes
+        RETURN collect({
+            id: elementId(r),
+            type: type(r),
+            source: elementId(a),
+            target: elementId(b),
+            properties: CASE WHEN $rel_props IS NULL THEN properties(r) ELSE [k IN $rel_props | r[k]] END
+        }) AS rels
+    }
+    RETURN [n IN nodes | {
+               id: elementId(n),
+               labels: labels(n),
+               properties: CASE WHEN $node_props IS NULL THEN properties(n) ELSE [k IN $node_props | n[k]] END,
+               influence: n.influence,
+               community: n.community
+           }] AS nodes,
+           rels
+    """
+
+    # 单个节点的完整属性，以及它的度数
+    NODE_DETAIL_QUERY = """
+    MATCH (n) WHERE elementId(n) = $id
+    RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties,
+           COUNT { (n)--() } AS degree
+    """
+
+    # 分页加载：按标签扫描的下一页节点（按elementId做键集分页）
+    PAGE_SCAN_QUERY = """
+    MATCH (n{label})
+    WHERE $after IS NULL OR elementId(n) > $after
+    WITH n ORDER BY elementId(n) LIMIT $limit
+    RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties
+    """
+
+    # 分页加载：从BFS前沿向外扩展出的、客户端尚未拥有的节点
+    PAGE_BFS_QUERY = """
+    UNWIND $frontier AS fid
+    MATCH (f) WHERE elementId(f) = fid
+    MATCH (f)--(n)
+    WHERE NOT elementId(n) IN $visited
+    WITH DISTINCT n LIMIT $limit
+    RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties
+    """
+
+    # 分页加载：新节点之间、以及新节点与客户端已有节点之间的关系
+    PAGE_LINKS_QUERY = """
+    UNWIND $page_ids AS pid
+    MATCH (a) WHERE elementId(a) = pid
+    MATCH (a)-[r]-(b)
+    WHERE elementId(b) IN $page_ids OR elementId(b) IN $known_ids
+    WITH DISTINCT r
+    RETURN elementId(r) AS id, type(r) AS type,
+           elementId(startNode(r)) AS source, elementId(endNode(r)) AS target,
+           properties(r) AS properties
+    """
+
+    # 路径/邻域查询的起点：elementId，或 Scholar/Student/Institution 的 name、Paper 的 title（走唯一约束索引）
+    RESOLVE_NODE_QUERY = """
+    CALL {
+        MATCH (n) WHERE elementId(n) = $key RETURN n
+        UNION
+        MATCH (n:Scholar {name: $key}) RETURN n
+        UNION
+        MATCH (n:Paper {title: $key}) RETURN n
+        UNION
+        MATCH (n:Student {name: $key}) RETURN n
+        UNION
+        MATCH (n:Institution {name: $key}) RETURN n
+    }
+    RETURN elementId(n) AS id LIMIT 1
+    """
+
+    # 有界扩展：每个前沿节点最多展开 $fanout 条关系（可按关系类型过滤），不区分方向
+    EXPAND_QUERY = """
+    UNWIND $frontier AS fid
+    MATCH (f) WHERE elementId(f) = fid
+    CALL {
+        WITH f
+        MATCH (f)-[r]-(m)
+        WHERE $types IS NULL OR type(r) IN $types
+        RETURN r, m LIMIT $fanout
+    }
+    RETURN fid AS from, elementId(m) AS neighbor, elementId(r) AS id, type(r) AS type,
+           elementId(startNode(r)) AS source, elementId(endNode(r)) AS target,
+           properties(r) AS properties
+    """
+
+    # 按elementId批量获取节点
+    NODES_BY_ID_QUERY = """
+    UNWIND $ids AS id
+    MATCH (n) WHERE elementId(n) = id
+    RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties
+    """
+
+    # 出现这些计数器变化时，说明图数据被修改，需要让图缓存失效
+    WRITE_COUNTERS = (
+        'nodes_created', 'nodes_deleted', 'relationships_created',
+        'relationships_deleted', 'properties_set', 'labels_added', 'labels_removed'
+    )
+
+    def __init__(self, driver: Driver, cursor_ttl: int = 600, max_cursors: int = 1000,
+                 cache_size: int = 32, cache_ttl: int = 300, node_cache_size: int = 1024,
+                 ingest_batch_size: int = 5000,
+                 governor: QueryGovernor = None, database: str = None,
+                 community_categories: int = 12, registry: StatementRegistry = None,
+                 change_feed: ChangeFeed = None, change_max_entities: int = 500,
+                 max_graph_nodes: int = 2000, max_page_size: int = 1000, max_fanout: int = 500, max_traversal_nodes: int = 2000,
+                 max_frontier: int = 5000):
+        # 所有查询经过会话管理层：统一的目标数据库、因果一致性书签和读写路由
+        driver = as_session_manager(driver, database)
         self.driver = driver
+        # 自定义Cypher查询的代价检查、超时与行数限制，为None时不做限制
+        self.governor = governor
+        # 自定义Cypher查询的语句形态登记表（估算执行计划缓存命中率），为None时不统计
+        self.registry = registry
+        self.ingestor = GraphIngestor(driver, batch_size=ingest_batch_size)
+        self.schema = SchemaManager(driver)
+        # 服务端力导向布局，numpy 未安装时为None
+        self.layout_engine = build_layout_engine()
+        # 分页游标的服务端状态：游标 -> 已发送节点、BFS前沿等
+        self._cursors = TTLCache(max_size=max_cursors, ttl=cursor_ttl)
+        # ECharts图快照缓存：查询参数 -> (数据, ETag)
+        self._graph_cache = TTLCache(max_size=cache_size, ttl=cache_ttl)
+        # 节点详情缓存：elementId -> 完整属性
+        self._node_cache = TTLCache(max_size=node_cache_size, ttl=cache_ttl)
+        # 最短路径/邻域查询缓存：(查询类型, 起点, 深度, 过滤条件) -> ECharts数据
+        self._traversal_cache = TTLCache(max_size=cache_size * 8, ttl=cache_ttl)
+        # 图数据版本号，每次写操作后递增
+        self.graph_version = 0
+        self._version_lock = threading.Lock()
+        # 按社区分类时，最大的 N 个社区单独成类，其余归入“其他社区”；为0时按标签分类
+        self.community_categories = community_categories
+        # 图数据被写操作修改后的回调（例如标记图指标需要重新计算）
+        self._write_listeners = []
+        # 图数据变更流，为None时不记录增量；单个增量超过 change_max_entities 个实体时改为要求客户端重新获取
+        self.change_feed = change_feed
+        self.change_max_entities = change_max_entities
+        # 客户端可请求的参数上限
+        self.max_graph_nodes = max_graph_nodes
+        self.max_page_size = max_page_size
+        self.max_fanout = max_fanout
+        self.max_traversal_nodes = max_traversal_nodes
+        self.max_frontier = max_frontier
+
+    def invalidate_graph_cache(self, change: dict = None) -> None:
+        """
+        图数据被修改后调用：递增版本号并清空图快照缓存。
+        启用了变更流时，把 change（见 _build_change、apply_analytics）作为新版本的增量发布；
+        未提供 change 时发布要求客户端重新获取的增量。
+        """
+        with self._version_lock:
+            self.graph_version += 1
+            self._graph_cache.clear()
+            self._node_cache.clear()
+            self._traversal_cache.clear()
+            if self.change_feed is not None:
+                self.change_feed.publish(self.graph_version, **(change or {"source": "invalidate", "reset": True}))
+
+    def _invalidate_on_write(self, counters: dict, source: str = "cypher", results: list = ()) -> None:
+        """
+        写操作后使缓存失效并通知监听者。
+        results 为每条语句的 {"query", "counters", "converter", "truncated"}，converter 是转换该语句返回结果时
+        用过的 RecordConverter，其中出现过的节点和关系构成变更流的增量
+        """
+        if self._is_write(counters):
+            change = self._build_change(counters, source, results) if self.change_feed is not None else None
+            self.invalidate_graph_cache(change)
+            for listener in self._write_listeners:
+                listener()
+
+    def _is_write(self, counters: dict) -> bool:
+        return any(counters.get(name) for name in self.WRITE_COUNTERS)
+
+    def _build_change(self, counters: dict, source: str, results: list) -> dict:
+        """
+        由写操作返回的节点和关系构造增量。只有能确定增量完整时才发送实体，否则标记 reset：
+        - 有节点或关系被删除（计数器中看不到被删除实体的ID）
+        - 某条写语句修改或新建的实体没有全部出现在 RETURN 中（见 returns_written_entities），
+          或者返回结果被截断
+        - 返回的实体少于新建的节点/关系数，或者没有返回任何实体（例如只 SET 属性而不 RETURN）
+        - 实体数超过 change_max_entities
+        """
+        nodes, relationships = {}, {}
+        covered = True
+        for result in results:
+            seen_nodes, seen_relationships = result["converter"].seen()
+            nodes.update((node["id"], node) for node in seen_nodes)
+            relationships.update((rel["id"], rel) for rel in seen_relationships)
+            if self._is_write(result["counters"]):
+                covered = covered and not result.get("truncated") and returns_written_entities(result["query"])
+        complete = (
+            covered and not counters.get("nodes_deleted") and not counters.get("relationships_deleted")
+            and (nodes or relationships)
+            and len(nodes) >= counters.get("nodes_created", 0)
+            and len(relationships) >= counters.get("relationships_created", 0)
+            and len(nodes) + len(relationships) <= self.change_max_entities
+        )
+        if not complete:
+            return {"source": source, "counters": counters, "reset": True}
+
+        echarts_nodes = [self._build_echarts_node(node) for node in nodes.values()]
+        id_to_name = {node["_internal_id"]: node["name"] for node in echarts_nodes}
+        # 端点不在增量中的连线，source/target 暂为elementId，由客户端按 _start_node_id/_end_node_id 对应到已有节点
+        links = [
+            self._build_echarts_link({"id": rel["id"], "type": rel["type_name"], "source": rel["start_node"],
+                                      "target": rel["end_node"], "properties": rel["properties"]}, id_to_name)
+            for rel in relationships.values()
+        ]
+        return {"source": source, "counters": counters, "nodes": echarts_nodes, "links": links}
+
+    def apply_analytics(self, changed: list = None) -> None:
+        """
+        图指标写回后调用：清空缓存，并把指标变化的节点的大小、分类作为 metrics 增量发布，
+        客户端原地更新，不需要重新获取图数据。
+        changed 为 [{"id", "influence", "community", ...}]；为None（例如 GDS 后端不返回逐个节点的变化）
+        或超过 change_max_entities 时只发布空的 metrics 增量，已打开的页面在下次加载时才看到新的指标。
+        """
+        metrics = []
+        if changed is not None and len(changed) <= self.change_max_entities:
+            for row in changed:
+                metric = {"_internal_id": row["id"], "influence": row["influence"], "community": row["community"],
+                          "symbolSize": self._influence_size(row["influence"])}
+                category = self._community_category(row["community"])
+                if category is not None:
+                    metric["category"] = category
+                metrics.append(metric)
+        self.invalidate_graph_cache({"source": "analytics", "metrics": metrics})
+
+    def add_write_listener(self, listener) -> None:
+        """注册写操作回调，在图数据被 Cypher 查询或实体导入修改后调用"""
+        self._write_listeners.append(listener)
 
     def get_node_count(self) -> int:
         # ... (此函数保持不变) ...
         try:
-            records, _, _ = self.driver.execute_query("MATCH (n) RETURN count(n) AS node_count")
+            records, _, _ = self.driver.read_query("MATCH (n) RETURN count(n) AS node_count")
             return records[0]["node_count"] if records else 0
         except Exception as e:
-            print(f"Error in get_node_count: {e}")
+            log.error("获取节点数量失败: %s", e)
             return -1
 
-    def get_graph_for_echarts(self, node_limit: int = 25) -> dict:
+    def apply_schema(self) -> list:
+        """幂等地创建 Scholar/Paper/Student 等查找所需的索引和唯一约束"""
+        return self.schema.apply()
+
+    def get_schema_status(self) -> dict:
+        """返回索引和约束的状态及填充进度"""
+        return self.schema.status()
+
+    def process_entities(self, entities: dict) -> dict:
+        """
+        把 LLMService.parse_text_to_entities 解析出的实体和关系批量写入图数据库，
+        返回每批的写入报告（行数、耗时、吞吐量）及跳过的关系
+        """
+        report = self.ingestor.ingest_entities(entities)
+        self._invalidate_on_write(report["counters"], source="ingest")
+        return report
+
+    def get_graph_for_echarts(self, node_limit: int = 25, node_properties: list = None,
+                              link_properties: list = None) -> dict:
         """
         查询图数据并转换为ECharts所需的格式。
+        节点及其诱导关系通过一次查询返回，见 SUBGRAPH_QUERY。
+        node_properties/link_properties 为None时返回全部属性，否则只返回列出的属性。
         """
-        print(f"正在查询最多 {node_limit} 个节点及其关系...")
-        
-        nodes_dict = {}
-        links_list = []
-        categories_set = set()
+        return self.get_graph_snapshot(node_limit, node_properties=node_properties,
+                                       link_properties=link_properties)[0]
 
+    def get_graph_snapshot(self, node_limit: int = 25, with_layout: bool = False,
+                           node_properties: list = None, link_properties: list = None) -> tuple:
+        """
+        带缓存地获取ECharts图数据，返回 (数据, ETag)。
+        缓存按查询参数区分，图数据被写入后整体失效；查询失败时返回空图且不缓存。
+        with_layout 为True时在服务端计算节点坐标（x/y），前端可直接用 layout: 'none' 渲染。
+        node_limit 小于1时抛出 ValueError，超过 max_graph_nodes 时按上限处理（缓存键使用截断后的值）。
+        """
+        if node_limit < 1:
+            raise ValueError("limit 必须为正整数")
+        node_limit = min(node_limit, self.max_graph_nodes)
+        if node_properties is not None and "name" not in node_properties:
+            # name 用作显示名称，总是需要
+            node_properties = ["name"] + list(node_properties)
+        cache_key = (
+            "echarts", node_limit, with_layout,
+            tuple(node_properties) if node_properties is not None else None,
+            tuple(link_properties) if link_properties is not None else None
+        )
+        cached = self._graph_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        version = self.graph_version
         try:
-            # 首先获取所有节点（包括孤立节点）
-            nodes_query = """
-            MATCH (n)
-            RETURN n
-            LIMIT $limit
-            """
-            node_records, _, _ = self.driver.execute_query(nodes_query, limit=node_limit)
-            
-            # 处理所有节点
-            node_name_to_id = {}  # 用于存储节点名称到内部ID的映射
-            for record in node_records:
-                node = record["n"]
-                node_id = node.element_id
-                node_name = node.get("name", f"Node_{node_id[-8:]}")  # 使用name或ID后8位作为显示名称
-                label = list(node.labels)[0] if node.labels else "Unknown"
-                categories_set.add(label)
-                
-                # 存储映射关系
-                node_name_to_id[node_id] = node_name
-                
-                # 构建节点数据，包含所有属性
-                node_data = {
-                    "id": node_name,  # 使用可读名称作为ECharts的id
-                    "name": node_name,
-                    "category": label,
-                    "symbolSize": 40 if label == "Scholar" else 30
-                }
-                
-                # 添加节点的所有属性
-                for key, value in node.items():
-                    if key not in node_data:  # 避免覆盖已有的字段
-                        node_data[key] = value
-                
-                # 添加节点的标签信息
-                node_data["labels"] = list(node.labels)
-                
-                # 添加内部ID供调试使用
-                node_data["_internal_id"] = node_id
-                
-                nodes_dict[node_id] = node_data
-            
-            # 然后获取这些节点之间的关系
-            relations_query = """
-            MATCH (n)-[r]-(m)
-            WHERE elementId(n) IN $node_ids AND elementId(m) IN $node_ids
-            RETURN n, r, m
-            """
-            node_ids = list(nodes_dict.keys())
-            relation_records, _, _ = self.driver.execute_query(relations_query, node_ids=node_ids)
+            data = self._query_graph_for_echarts(node_limit, node_properties, link_properties)
+            if with_layout:
+                self.apply_layout(data, version)
+        except Exception as e:
+            log.error("获取图数据失败: %s", e)
+            return {"nodes": [], "links": [], "categories": []}, None
 
-            
-            # 处理关系
-            processed_rel_ids = set()
-            for record in relation_records:
-                source_node = record["n"]
-                target_node = record["m"]
-                relationship = record["r"]
-                
-                # 避免重复添加同一个关系
-                if relationship.element_id not in processed_rel_ids:
-                    # 获取节点的可读名称
-                    source_name = node_name_to_id.get(source_node.element_id, source_node.element_id)
-                    target_name = node_name_to_id.get(target_node.element_id, target_node.element_id)
-                    
-                    # 构建关系数据，包含所有属性
-                    link_data = {
-                        "source": source_name,  # 使用可读名称
-                        "target": target_name,  # 使用可读名称
-                        "name": relationship.type,
-                        "type": relationship.type  # 关系类型
-                    }
-                    
-                    # 添加关系的所有属性
-                    for key, value in relationship.items():
-                        if key not in link_data:  # 避免覆盖已有的字段
-                            link_data[key] = value
-                    
-                    # 添加关系的内部信息
-                    link_data["_relationship_id"] = relationship.element_id
-                    link_data["_start_node_id"] = relationship.start_node.element_id
-                    link_data["_end_node_id"] = relationship.end_node.element_id
-                    
-                    links_list.append(link_data)
-                    processed_rel_ids.add(relationship.element_id)
-
-            # 构建最终数据
-            final_data = {
-                "nodes": list(nodes_dict.values()),
-                "links": links_list,
-                "categories": [{"name": cat} for cat in sorted(list(categories_set))]
+        snapshot = (data, self._compute_etag(data))
+        # 查询期间如果发生了写操作，结果可能已过期，不放入缓存
+        with self._version_lock:
+            if version == self.graph_version:
+                self._graph_cache.set(cache_key, snapshot)
+        return snapshot
+
+    def _query_graph_for_echarts(self, node_limit: int, node_properties: list = None,
+                                 link_properties: list = None) -> dict:
+        log.debug("正在查询最多 %s 个节点及其关系...", node_limit)
+        with span("cypher_execute"):
+            records, _, _ = self.driver.read_query(
+                self.SUBGRAPH_QUERY, limit=node_limit, node_props=node_properties, rel_props=link_properties
+            )
+        if not records:
+            return {"nodes": [], "links": [], "categories": []}
+
+        node_rows = self._zip_properties(records[0]["nodes"], node_properties)
+        rel_rows = self._zip_properties(records[0]["rels"], link_properties)
+        final_data = self._format_echarts_graph(node_rows, rel_rows)
+        log.debug("查询到 %s 个节点, %s 个关系", len(final_data['nodes']), len(final_data['links']))
+        return final_data
+
+    @staticmethod
+    def _zip_properties(rows: list, keys: list) -> list:
+        """按属性名列表把查询返回的属性值列表还原为字典，去掉不存在（null）的属性"""
+        if keys is None:
+            return rows
+        return [
+            {**row, "properties": {k: v for k, v in zip(keys, row["properties"]) if v is not None}}
+            for row in rows
+        ]
+
+    def get_node_detail(self, element_id: str) -> dict:
+        """
+        获取单个节点的完整属性（悬停或点击时按需加载），结果按节点缓存，写操作后失效。
+        节点不存在时返回None。
+        """
+        cached = self._node_cache.get(element_id)
+        if cached is not None:
+            return cached
+
+        version = self.graph_version
+        records, _, _ = self.driver.read_query(self.NODE_DETAIL_QUERY, id=element_id)
+        if not records:
+            return None
+        record = records[0]
+        detail = {
+            "id": record["id"],
+            "labels": record["labels"],
+            "properties": record["properties"],
+            "degree": record["degree"]
+        }
+        with self._version_lock:
+            if version == self.graph_version:
+                self._node_cache.set(element_id, detail)
+        return detail
+
+    def apply_layout(self, data: dict, version: int = None) -> dict:
+        """为ECharts数据中的节点写入服务端计算的坐标，numpy 不可用时保持不变"""
+        if self.layout_engine is None or not data["nodes"]:
+            return data
+        positions = self.layout_engine.layout(
+            [node["_internal_id"] for node in data["nodes"]],
+            [(link["_start_node_id"], link["_end_node_id"]) for link in data["links"]],
+            version=self.graph_version if version is None else version
+        )
+        for node in data["nodes"]:
+            position = positions.get(node["_internal_id"])
+            if position is not None:
+                node["x"], node["y"] = position
+        data["layout"] = "none"
+        return data
+
+    @staticmethod
+    def _compute_etag(data: dict) -> str:
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    def _build_echarts_node(self, row: dict) -> dict:
+        """
+        把投影后的节点行转换为ECharts节点。
+        有预计算的图指标时，节点大小由影响力（归一化的PageRank）决定，分类为所属社区；
+        否则按标签决定。
+        """
+        node_id = row["id"]
+        properties = row.get("properties") or {}
+        labels = row.get("labels") or []
+        node_name = properties.get("name", f"Node_{node_id[-8:]}")  # 使用name或ID后8位作为显示名称
+        label = labels[0] if labels else "Unknown"
+        influence = row.get("influence", properties.get("influence"))
+        community = row.get("community", properties.get("community"))
+
+        node_data = {
+            "id": node_name,  # 使用可读名称作为ECharts的id
+            "name": node_name,
+            "category": self._community_category(community) or label,
+            "symbolSize": self._influence_size(influence) if influence is not None
+            else (40 if label == "Scholar" else 30)
+        }
+        # 添加节点的所有属性，避免覆盖已有的字段
+        for key, value in properties.items():
+            if key not in node_data:
+                node_data[key] = value
+
+        node_data["labels"] = list(labels)
+        node_data["_internal_id"] = node_id
+        return node_data
+
+    @staticmethod
+    def _influence_size(influence: float) -> float:
+        return round(20 + 40 * influence, 1)
+
+    def _community_category(self, community) -> str:
+        if community is None or not self.community_categories:
+            return None
+        if community < self.community_categories:
+            return f"社区 {community + 1}"
+        return "其他社区"
+
+    @staticmethod
+    def _build_echarts_link(row: dict, id_to_name: dict) -> dict:
+        """把投影后的关系行转换为ECharts连线，source/target使用节点的可读名称"""
+        link_data = {
+            "source": id_to_name.get(row["source"], row["source"]),
+            "target": id_to_name.get(row["target"], row["target"]),
+            "name": row["type"],
+            "type": row["type"]
+        }
+        for key, value in (row.get("properties") or {}).items():
+            if key not in link_data:
+                link_data[key] = value
+
+        link_data["_relationship_id"] = row["id"]
+        link_data["_start_node_id"] = row["source"]
+        link_data["_end_node_id"] = row["target"]
+        return link_data
+
+    def _format_echarts_graph(self, node_rows: list, rel_rows: list) -> dict:
+        """把节点行和关系行组装成 {nodes, links, categories}"""
+        nodes = [self._build_echarts_node(row) for row in node_rows]
+        id_to_name = {node["_internal_id"]: node["name"] for node in nodes}
+        links = [self._build_echarts_link(row, id_to_name) for row in rel_rows]
+        categories = sorted({node["category"] for node in nodes})
+
+        return {
+            "nodes": nodes,
+            "links": links,
+            "categories": [{"name": cat} for cat in categories]
+        }
+
+    def get_graph_page(self, cursor: str = None, page_size: int = 50, mode: str = "scan",
+                       label: str = None, seed: str = None) -> dict:
+        """
+        分页、增量地获取ECharts图数据。
+        每页只包含新节点，以及连接新节点与客户端已有节点（或新节点之间）的关系。
+        首次请求不带cursor，之后用返回的cursor继续加载，直到 has_more 为 False。
+
+        mode:
+            scan - 按elementId顺序扫描（可用label过滤）
+            bfs  - 从seed节点（不指定时取第一个节点）开始按广度优先向外扩展
+        游标状态保存在服务端内存中，超过TTL未使用会失效。
+        page_size 超过 max_page_size 时按 max_page_size 处理。
+        """
+        if page_size <= 0:
+            raise ValueError("page_size 必须为正整数")
+        page_size = min(page_size, self.max_page_size)
+
+        if cursor:
+            state = self._cursors.pop(cursor)
+            if state is None:
+                raise ValueError("游标无效或已过期，请重新开始加载")
+        else:
+            if mode not in ("scan", "bfs"):
+                raise ValueError(f"不支持的分页模式: {mode}")
+            if label is not None and not IDENTIFIER_PATTERN.match(label):
+                raise ValueError(f"非法的标签名: {label}")
+            state = {
+                "mode": mode,
+                "label": label,
+                "after": None,              # scan: 上一页最后一个elementId
+                "frontier": [seed] if seed else [],  # bfs: 当前层待扩展的节点
+                "next_frontier": [],        # bfs: 下一层已发现的节点
+                "visited": {},              # 已发送给客户端的节点: elementId -> 显示名称
             }
 
-            print(f"查询到 {len(final_data['nodes'])} 个节点, {len(final_data['links'])} 个关系")
-            
-            # 调试信息：显示第一个节点的所有属性
-            if final_data['nodes']:
-                print(f"示例节点属性: {list(final_data['nodes'][0].keys())}")
-            
-            # 调试信息：显示第一个关系的所有属性
-            if final_data['links']:
-                print(f"示例关系属性: {list(final_data['links'][0].keys())}")
-                
-            return final_data
+        if state["mode"] == "scan":
+            node_rows = self._next_scan_page(state, page_size)
+        else:
+            node_rows = self._next_bfs_page(state, page_size)
 
-        except Exception as e:
-            print(f"Error in get_graph_for_echarts: {e}")
-            return {"nodes": [], "links": [], "categories": []}
+        known_ids = list(state["visited"].keys())
+        page_ids = [row["id"] for row in node_rows]
+        rel_rows = []
+        if page_ids:
+            rel_rows, _, _ = self.driver.read_query(
+                self.PAGE_LINKS_QUERY, page_ids=page_ids, known_ids=known_ids
+            )
+
+        nodes = [self._build_echarts_node(row) for row in node_rows]
+        for node in nodes:
+            state["visited"][node["_internal_id"]] = node["name"]
+        links = [self._build_echarts_link(row, state["visited"]) for row in rel_rows]
+
+        has_more = self._page_has_more(state, len(node_rows), page_size)
+        next_cursor = None
+        if has_more:
+            next_cursor = secrets.token_urlsafe(16)
+            self._cursors.set(next_cursor, state)
 
-    def execute_cypher_query(self, cypher_query: str, parameters: dict = None) -> dict:
+        log.debug("分页加载(%s): 新增 %s 个节点, %s 个关系, has_more=%s", state['mode'], len(nodes), len(links), has_more)
+        return {
+            "nodes": nodes,
+            "links": links,
+            "categories": [{"name": cat} for cat in sorted({node["category"] for node in nodes})],
+            "cursor": next_cursor,
+            "has_more": has_more
+        }
+
+    def _next_scan_page(self, state: dict, page_size: int) -> list:
+        label_clause = f":`{state['label']}`" if state["label"] else ""
+        records, _, _ = self.driver.read_query(
+            self.PAGE_SCAN_QUERY.format(label=label_clause), after=state["after"], limit=page_size
+        )
+        if records:
+            state["after"] = records[-1]["id"]
+        return records
+
+    def _next_bfs_page(self, state: dict, page_size: int) -> list:
+        # 首页且未指定seed：以第一个节点作为起点
+        if not state["visited"] and not state["frontier"]:
+            seeds = self._next_scan_page(state, 1)
+            state["next_frontier"] = [row["id"] for row in seeds]
+            return seeds
+        # 指定了seed的首页：先把seed节点本身发送给客户端
+        if not state["visited"]:
+            records, _, _ = self.driver.read_query(
+                "MATCH (n) WHERE elementId(n) = $id "
+                "RETURN elementId(n) AS id, labels(n) AS labels, properties(n) AS properties",
+                id=state["frontier"][0]
+            )
+            if not records:
+                raise ValueError(f"找不到seed节点: {state['frontier'][0]}")
+            state["frontier"], state["next_frontier"] = [], [records[0]["id"]]
+            return records
+
+        rows = []
+        while len(rows) < page_size:
+            if not state["frontier"]:
+                if not state["next_frontier"]:
+                    break
+                # 当前层扩展完毕，进入下一层
+                state["frontier"], state["next_frontier"] = state["next_frontier"], []
+            remaining = page_size - len(rows)
+            visited_ids = list(state["visited"].keys()) + [row["id"] for row in rows]
+            records, _, _ = self.driver.read_query(
+                self.PAGE_BFS_QUERY, frontier=state["frontier"], visited=visited_ids, limit=remaining
+            )
+            rows.extend(records)
+            state["next_frontier"].extend(row["id"] for row in records)
+            if len(records) < remaining:
+                # 本层已没有更多未访问的邻居
+                state["frontier"] = []
+        return rows
+
+    @staticmethod
+    def _page_has_more(state: dict, returned: int, page_size: int) -> bool:
+        if state["mode"] == "scan":
+            return returned == page_size
+        return bool(state["frontier"] or state["next_frontier"])
+
+    def get_shortest_path(self, source: str, target: str, max_depth: int = 6, rel_types: list = None,
+                          fanout: int = 200, max_frontier: int = 5000) -> dict:
+        """
+        查找两个节点之间的一条最短路径（不区分关系方向），返回ECharts格式的路径子图。
+        source/target 可以是elementId，也可以是学者/学生/机构的name或论文的title。
+
+        使用双向BFS：每一步只扩展较小的一侧前沿，两侧相遇即得到最短路径。
+        每个节点最多展开 fanout 条关系、每层前沿最多 max_frontier 个节点，
+        触及上限时 truncated 为True，此时“未找到”不代表路径一定不存在。
+        fanout、max_frontier 超过服务端上限（max_fanout、max_frontier）时按上限处理。
+        """
+        max_depth = max(1, min(max_depth, 12))
+        fanout = max(1, min(fanout, self.max_fanout))
+        max_frontier = max(1, min(max_frontier, self.max_frontier))
+        cache_key = ("path", source, target, max_depth, tuple(rel_types or ()), fanout, max_frontier)
+        return self._cached_traversal(cache_key, lambda: self._query_shortest_path(
+            source, target, max_depth, rel_types, fanout, max_frontier))
+
+    def get_neighborhood(self, seed: str, depth: int = 2, rel_types: list = None,
+                         fanout: int = 50, max_nodes: int = 500) -> dict:
+        """
+        获取节点的k跳邻域（ego网络），返回ECharts格式的子图，包含邻域内节点之间的全部关系。
+        seed 可以是elementId，也可以是学者/学生/机构的name或论文的title。
+        每个节点最多展开 fanout 条关系，总节点数不超过 max_nodes，触及上限时 truncated 为True。
+        fanout、max_nodes 超过服务端上限（max_fanout、max_traversal_nodes）时按上限处理。
+        """
+        depth = max(1, min(depth, 4))
+        fanout = max(1, min(fanout, self.max_fanout))
+        max_nodes = max(1, min(max_nodes, self.max_traversal_nodes))
+        cache_key = ("neighborhood", seed, depth, tuple(rel_types or ()), fanout, max_nodes)
+        return self._cached_traversal(cache_key, lambda: self._query_neighborhood(
+            seed, depth, rel_types, fanout, max_nodes))
+
+    def _cached_traversal(self, cache_key: tuple, compute) -> dict:
+        cached = self._traversal_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        version = self.graph_version
+        data = compute()
+        with self._version_lock:
+            if version == self.graph_version:
+                self._traversal_cache.set(cache_key, data)
+        return data
+
+    def _resolve_node(self, key: str) -> str:
+        records, _, _ = self.driver.read_query(self.RESOLVE_NODE_QUERY, key=key)
+        if not records:
+            raise ValueError(f"找不到节点: {key}")
+        return records[0]["id"]
+
+    def _expand(self, frontier: list, rel_types: list, fanout: int) -> tuple:
+        """扩展一层前沿，返回 (关系行, 是否有节点的关系数触及fanout上限)"""
+        records, _, _ = self.driver.read_query(
+            self.EXPAND_QUERY, frontier=frontier, types=rel_types or None, fanout=fanout
+        )
+        per_node = {}
+        for row in records:
+            per_node[row["from"]] = per_node.get(row["from"], 0) + 1
+        return records, any(count >= fanout for count in per_node.values())
+
+    def _query_shortest_path(self, source: str, target: str, max_depth: int, rel_types: list,
+                             fanout: int, max_frontier: int) -> dict:
+        source_id, target_id = self._resolve_node(source), self._resolve_node(target)
+        # 两侧的BFS树：节点 -> (父节点, 关系行)
+        parents = ({source_id: None}, {target_id: None})
+        frontiers = ([source_id], [target_id])
+        meet = source_id if source_id == target_id else None
+        truncated = False
+        hops = 0
+
+        while meet is None and frontiers[0] and frontiers[1] and hops < max_depth:
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            rows, capped = self._expand(frontiers[side], rel_types, fanout)
+            truncated = truncated or capped
+            next_frontier = []
+            for row in rows:
+                neighbor = row["neighbor"]
+                if neighbor in parents[side]:
+                    continue
+                parents[side][neighbor] = (row["from"], row)
+                next_frontier.append(neighbor)
+                if neighbor in parents[1 - side]:
+                    meet = neighbor
+                    break
+            hops += 1
+            if len(next_frontier) > max_frontier:
+                next_frontier, truncated = next_frontier[:max_frontier], True
+            frontiers = (next_frontier, frontiers[1]) if side == 0 else (frontiers[0], next_frontier)
+
+        if meet is None:
+            return {"nodes": [], "links": [], "categories": [], "path": [],
+                    "found": False, "length": None, "truncated": truncated}
+
+        # 从相遇点分别回溯到两个端点
+        node_ids, rel_rows = [meet], []
+        for side in (0, 1):
+            current = meet
+            while parents[side][current] is not None:
+                current, row = parents[side][current]
+                rel_rows.append(row)
+                if side == 0:
+                    node_ids.insert(0, current)
+                else:
+                    node_ids.append(current)
+
+        node_rows, _, _ = self.driver.read_query(self.NODES_BY_ID_QUERY, ids=node_ids)
+        data = self._format_echarts_graph(node_rows, rel_rows)
+        id_to_name = {node["_internal_id"]: node["name"] for node in data["nodes"]}
+        data.update({
+            "path": [id_to_name.get(node_id, node_id) for node_id in node_ids],
+            "found": True,
+            "length": len(rel_rows),
+            "truncated": truncated
+        })
+        log.debug("最短路径: %s (长度 %s)", ' -> '.join(data['path']), data['length'])
+        return data
+
+    def _query_neighborhood(self, seed: str, depth: int, rel_types: list,
+                            fanout: int, max_nodes: int) -> dict:
+        seed_id = self._resolve_node(seed)
+        visited = {seed_id: 0}
+        frontier = [seed_id]
+        truncated = False
+
+        for hop in range(1, depth + 1):
+            rows, capped = self._expand(frontier, rel_types, fanout)
+            truncated = truncated or capped
+            frontier = []
+            for row in rows:
+                neighbor = row["neighbor"]
+                if neighbor in visited:
+                    continue
+                if len(visited) >= max_nodes:
+                    truncated = True
+                    break
+                visited[neighbor] = hop
+                frontier.append(neighbor)
+            if not frontier or len(visited) >= max_nodes:
+                break
+
+        node_ids = list(visited)
+        node_rows, _, _ = self.driver.read_query(self.NODES_BY_ID_QUERY, ids=node_ids)
+        rel_rows, _, _ = self.driver.read_query(self.PAGE_LINKS_QUERY, page_ids=node_ids, known_ids=[])
+        if rel_types:
+            rel_rows = [row for row in rel_rows if row["type"] in rel_types]
+
+        data = self._format_echarts_graph(node_rows, rel_rows)
+        data.update({"seed": seed_id, "depth": depth, "truncated": truncated})
+        log.debug("%s跳邻域: %s 个节点, %s 个关系, truncated=%s", depth, len(data['nodes']), len(data['links']), truncated)
+        return data
+
+    def _parameterize(self, cypher_query: str, parameters: dict, normalize: bool) -> tuple:
+        """normalize 为True时把查询中的字面量提取为参数，返回 (查询, 参数, 提取的字面量)"""
+        if not normalize:
+            return cypher_query, parameters, {}
+        template, literals = parameterize(cypher_query)
+        return template, {**literals, **parameters}, literals
+
+    def _observe(self, query: str, raw_query: str, literals: dict, available_after=None) -> dict:
+        """在语句形态登记表中记录一次执行，返回 {"shape", "plan_cache"}；未启用登记表时返回空字典"""
+        if self.registry is None:
+            return {}
+        return self.registry.observe(query, raw_query=raw_query, literals=len(literals),
+                                     available_after=available_after)
+
+    def execute_cypher_query(self, cypher_query: str, parameters: dict = None, normalize: bool = False,
+                             entities: bool = False) -> dict:
         """
         执行自定义Cypher查询语句
+        normalize 为True时先把查询中的字符串、数字字面量提取为参数（用于模型生成的语句），
+        只有值不同的语句共用同一个查询文本，数据库可以复用缓存的执行计划
+        entities 为True时行中的节点、关系只保留 {"type", "id"} 引用，完整内容在返回的 entities 表中只出现一次
+        （见 record_codec.RecordConverter）
         """
         try:
             if parameters is None:
                 parameters = {}
+            raw_query = cypher_query
+            cypher_query, parameters, literals = self._parameterize(cypher_query, parameters, normalize)
             
-            print(f"执行Cypher查询: {cypher_query}")
-            print(f"参数: {parameters}")
+            log.debug("执行Cypher查询: %s 参数: %s", cypher_query, parameters)
             
-            # 执行查询
-            records, summary, keys = self.driver.execute_query(cypher_query, parameters)
+            # 执行查询（经过查询守卫时：EXPLAIN代价检查、读写路由、超时和行数限制）
+            guard = {}
+            with span("cypher_execute"):
+                if self.governor is not None:
+                    outcome = self.governor.run(cypher_query, parameters)
+                    records, summary, keys = outcome["records"], outcome["summary"], outcome["keys"]
+                    guard = {
+                        "truncated": outcome["truncated"],
+                        "rewritten": outcome["rewritten"],
+                        "estimated_rows": outcome["plan"]["max_estimated_rows"] if outcome["plan"] else None
+                    }
+                else:
+                    records, summary, keys = self.driver.execute_query(cypher_query, parameters)
             
             # 处理结果
-            result_data = []
-            for record in records:
-                row_data = {}
-                for key in keys:
-                    value = record[key]
-                    # 处理不同类型的值
-                    if hasattr(value, 'element_id'):  # Neo4j节点或关系对象
-                        if hasattr(value, 'labels'):  # 节点
-                            row_data[key] = {
-                                "type": "node",
-                                "id": value.element_id,
-                                "labels": list(value.labels),
-                                "properties": dict(value.items())
-                            }
-                        else:  # 关系
-                            row_data[key] = {
-                                "type": "relationship",
-                                "id": value.element_id,
-                                "type_name": value.type,
-                                "properties": dict(value.items()),
-                                "start_node": value.start_node.element_id,
-                                "end_node": value.end_node.element_id
-                            }
-                    else:
-                        row_data[key] = value
-                
-                result_data.append(row_data)
-            
-            # 处理统计计数器
-            counters_dict = {}
-            if hasattr(summary, 'counters') and summary.counters:
-                # 获取所有可用的计数器属性
-                counter_attrs = [
-                    'nodes_created', 'nodes_deleted', 'relationships_created', 
-                    'relationships_deleted', 'properties_set', 'labels_added', 
-                    'labels_removed', 'indexes_added', 'indexes_removed',
-                    'constraints_added', 'constraints_removed'
-                ]
-                
-                for attr in counter_attrs:
-                    if hasattr(summary.counters, attr):
-                        value = getattr(summary.counters, attr)
-                        if value > 0:  # 只记录有变化的计数器
-                            counters_dict[attr] = value
+            with span("record_convert"):
+                converter = RecordConverter(keys, entities=entities)
+                result_data = converter.rows(records)
+            RECORDS.inc(len(records), source="cypher")
+            counters = self._collect_counters(summary)
+            self._invalidate_on_write(counters, results=[{
+                "query": cypher_query, "counters": counters, "converter": converter,
+                "truncated": guard.get("truncated", False)
+            }])
+            statement = self._observe(cypher_query, raw_query, literals,
+                                      getattr(summary, "result_available_after", None))
+            if literals:
+                statement.update({"query": cypher_query, "parameters": literals})
             
             # 返回结果统计信息
             return {
                 "success": True,
                 "data": result_data,
+                **({"entities": converter.entity_table()} if entities else {}),
                 "summary": {
                     "records_count": len(records),
                     "keys": keys,
                     "query_type": summary.query_type if hasattr(summary, 'query_type') else "unknown",
-                    "counters": counters_dict
+                    "counters": counters,
+                    **guard,
+                    **({"statement": statement} if statement else {})
                 }
             }
             
+        except QueryRejectedError as e:
+            log.warning("Cypher查询被拒绝: %s", e)
+            return {
+                "success": False,
+                "error": str(e),
+                "rejected": True,
+                "data": [],
+                "summary": {}
+            }
         except Exception as e:
-            print(f"Cypher查询执行错误: {e}")
+            log.error("Cypher查询执行错误: %s", e)
             return {
                 "success": False,
                 "error": str(e),
                 "data": [],
                 "summary": {}
-            }
\ No newline at end of file
+            }
+
+    def execute_cypher_batch(self, statements: list, chunk_size: int = 100, atomic: bool = False,
+                             max_rows: int = 100, normalize: bool = False) -> dict:
+        """
+        批量执行Cypher语句，statements 的元素为查询字符串或 {"query": ..., "parameters": {...}}。
+        - normalize 为True时先把字面量提取为参数（见 execute_cypher_query）
+        - 完全相同的语句（含参数）只执行一次，重复项的结果标记 duplicate_of
+        - 经过查询守卫时，先逐条做EXPLAIN代价检查，被拒绝的语句不执行
+        - atomic 为True时所有语句在同一个写事务中执行，任一失败则全部回滚；
+          否则每 chunk_size 条语句一个写事务，某个事务失败时逐条重试，定位失败的语句
+        返回 {"success", "total", "unique", "succeeded", "failed", "transactions", "counters", "results"}，
+        results 与 statements 一一对应。
+        """
+        items = []
+        first_index: Dict[str, int] = {}
+        for i, statement in enumerate(statements):
+            if isinstance(statement, str):
+                statement = {"query": statement}
+            raw_query = (statement.get("query") or "").strip()
+            query, parameters, literals = self._parameterize(raw_query, statement.get("parameters") or {},
+                                                             normalize and bool(raw_query))
+            key = json.dumps([query, parameters], sort_keys=True, ensure_ascii=False, default=str)
+            items.append({"index": i, "query": query, "parameters": parameters, "key": key,
+                          "raw_query": raw_query, "literals": literals})
+            first_index.setdefault(key, i)
+
+        outcomes: Dict[str, dict] = {}
+        runnable = []
+        for key, i in first_index.items():
+            item = items[i]
+            if not item["query"]:
+                outcomes[key] = {"success": False, "error": "Cypher查询语句不能为空"}
+                continue
+            if self.governor is not None:
+                try:
+                    self.governor.check(item["query"], self.governor.inspect(item["query"], item["parameters"]),
+                                        rewrite=False)
+                except QueryRejectedError as e:
+                    outcomes[key] = {"success": False, "error": str(e), "rejected": True}
+                    continue
+            runnable.append(item)
+
+        def run_chunk(tx, chunk):
+            results = []
+            for item in chunk:
+                result = tx.run(item["query"], item["parameters"])
+                keys = result.keys()
+                converter = RecordConverter(keys)
+                data = converter.rows(islice(result, max_rows))
+                summary = result.consume()
+                counters = self._collect_counters(summary)
+                results.append({
+                    "success": True,
+                    "data": data,
+                    "summary": {"keys": keys, "query_type": summary.query_type, "counters": counters},
+                    "available_after": getattr(summary, "result_available_after", None),
+                    # 变更流用，执行完后取出（见 _invalidate_on_write）
+                    "change": {"query": item["query"], "counters": counters, "converter": converter,
+                               "truncated": len(data) >= max_rows}
+                })
+            return results
+
+        with span("cypher_batch"):
+            transactions = 0
+            chunks = [runnable] if atomic else list(chunked(runnable, max(1, chunk_size)))
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                transactions += 1
+                try:
+                    for item, outcome in zip(chunk, self.driver.write_transaction(run_chunk, chunk)):
+                        outcomes[item["key"]] = outcome
+                    continue
+                except Exception as e:
+                    error = str(e)
+                if atomic or len(chunk) == 1:
+                    for item in chunk:
+                        outcomes[item["key"]] = {"success": False, "error": error}
+                    continue
+                # 整个事务已回滚，逐条重试以找出失败的语句
+                log.warning("⚠️  批量执行的事务失败，逐条重试 %s 条语句: %s", len(chunk), error)
+                for item in chunk:
+                    transactions += 1
+                    try:
+                        outcomes[item["key"]] = self.driver.write_transaction(run_chunk, [item])[0]
+                    except Exception as e:
+                        outcomes[item["key"]] = {"success": False, "error": str(e)}
+
+        counters: Dict[str, int] = {}
+        changes = []
+        for outcome in outcomes.values():
+            for name, value in outcome.get("summary", {}).get("counters", {}).items():
+                counters[name] = counters.get(name, 0) + value
+            if "change" in outcome:
+                changes.append(outcome.pop("change"))
+        self._invalidate_on_write(counters, source="cypher_batch", results=changes)
+
+        # 每条实际执行成功的语句在形态登记表中记录一次
+        for key, i in first_index.items():
+            outcome, item = outcomes[key], items[i]
+            if not outcome["success"]:
+                continue
+            statement = self._observe(item["query"], item["raw_query"], item["literals"],
+                                      outcome.pop("available_after", None))
+            if item["literals"]:
+                statement.update({"query": item["query"], "parameters": item["literals"]})
+            if statement:
+                outcome["summary"]["statement"] = statement
+
+        results = []
+        for item in items:
+            result = {"index": item["index"], "query": item["query"], **outcomes[item["key"]]}
+            if first_index[item["key"]] != item["index"]:
+                result["duplicate_of"] = first_index[item["key"]]
+            results.append(result)
+
+        succeeded = sum(1 for outcome in outcomes.values() if outcome["success"])
+        log.info("批量执行Cypher: %s 条, 不重复 %s 条, 成功 %s 条, %s 个事务", len(items), len(first_index), succeeded, transactions)
+        return {
+            "success": succeeded == len(first_index),
+            "total": len(items),
+            "unique": len(first_index),
+            "succeeded": succeeded,
+            "failed": len(first_index) - succeeded,
+            "transactions": transactions,
+            "counters": counters,
+            "results": results
+        }
+
+    def execute_statement_templates(self, statements: list, chunk_size: int = 1000) -> dict:
+        """
+        批量执行已校验的参数化写入语句（见 cypher_templates.validate_statement），
+        statements 的元素为 {"query": 模板, "params": {...}}。
+        使用同一模板的语句合并为 UNWIND 批量查询，每 chunk_size 行一个写事务，
+        同一模板只解析、规划一次，数据库可以复用缓存的查询计划。
+        某个事务失败时逐行重试，定位失败的语句。
+        不同模板按首次出现的顺序执行。
+        返回 {"success", "total", "templates", "transactions", "counters", "results"}，
+        results 与 statements 一一对应。
+        """
+        groups: Dict[str, list] = {}
+        for i, statement in enumerate(statements):
+            groups.setdefault(statement["query"], []).append((i, statement.get("params") or {}))
+
+        def run_rows(tx, query, rows):
+            return tx.run(query, rows=rows).consume()
+
+        outcomes: Dict[int, dict] = {}
+        counters: Dict[str, int] = {}
+        transactions = 0
+        with span("cypher_batch"):
+            for template, rows in groups.items():
+                query = to_unwind(template)
+                if self.governor is not None:
+                    try:
+                        self.governor.check(query, self.governor.inspect(query, {"rows": [rows[0][1]]}), rewrite=False)
+                    except QueryRejectedError as e:
+                        for i, _ in rows:
+                            outcomes[i] = {"success": False, "error": str(e), "rejected": True}
+                        continue
+
+                for chunk in chunked(rows, max(1, chunk_size)):
+                    attempts = [chunk]
+                    while attempts:
+                        batch = attempts.pop()
+                        transactions += 1
+                        try:
+                            summary = self.driver.write_transaction(run_rows, query, [params for _, params in batch])
+                        except Exception as e:
+                            if len(batch) > 1:
+                                # 事务已整体回滚，拆成单行重试
+                                log.warning("⚠️  模板批量写入失败，逐行重试 %s 行: %s", len(batch), e)
+                                attempts.extend([row] for row in reversed(batch))
+                            else:
+                                outcomes[batch[0][0]] = {"success": False, "error": str(e)}
+                            continue
+                        for name, value in self._collect_counters(summary).items():
+                            counters[name] = counters.get(name, 0) + value
+                        self._observe(query, query, {}, getattr(summary, "result_available_after", None))
+                        for i, _ in batch:
+                            outcomes[i] = {"success": True}
+        self._invalidate_on_write(counters, source="templates")
+
+        results = [{"index": i, "query": statement["query"], **outcomes[i]} for i, statement in enumerate(statements)]
+        succeeded = sum(1 for result in results if result["success"])
+        log.info("模板批量写入: %s 条语句, %s 个模板, %s 个事务, %s", len(statements), len(groups), transactions, counters)
+        return {
+            "success": succeeded == len(statements),
+            "total": len(statements),
+            "succeeded": succeeded,
+            "templates": len(groups),
+            "transactions": transactions,
+            "counters": counters,
+            "results": results
+        }
+
+    def stream_cypher_query(self, cypher_query: str, parameters: dict = None,
+                            max_rows: int = 100000, fetch_size: int = 1000):
+        """
+        以流的方式执行Cypher查询，逐条产出结果，内存占用与结果集大小无关。
+        产出的事件依次为:
+            {"type": "header", "keys": [...]}
+            {"type": "row", "data": {...}}            (0到max_rows条)
+            {"type": "summary", "success": True, "summary": {...}}
+        出错时以 {"type": "error", "success": False, "error": "..."} 结束。
+
+        驱动每次只从服务器拉取 fetch_size 条记录，消费者不读取时不会继续拉取，
+        从而形成背压；超过 max_rows 后丢弃剩余结果并在summary中标记 truncated。
+        """
+        if parameters is None:
+            parameters = {}
+
+        log.debug("流式执行Cypher查询: %s", cypher_query)
+
+        # 经过查询守卫时：超过代价上限直接拒绝，只读查询使用读会话，并设置事务超时
+        session_config, query = {}, cypher_query
+        if self.governor is not None:
+            plan = self.governor.inspect(cypher_query, parameters)
+            try:
+                self.governor.check(cypher_query, plan, rewrite=False)
+            except QueryRejectedError as e:
+                yield {"type": "error", "success": False, "error": str(e), "rejected": True}
+                return
+            session_config = self.governor.session_config(plan)
+            query = Query(cypher_query, timeout=self.governor.timeout)
+
+        session = self.driver.session(fetch_size=fetch_size, **session_config)
+        try:
+            result = session.run(query, parameters)
+            keys = result.keys()
+            yield {"type": "header", "keys": keys}
+            converter = RecordConverter(keys, memoize=False)
+
+            records_count = 0
+            truncated = False
+            for record in result:
+                if records_count >= max_rows:
+                    truncated = True
+                    break
+                yield {"type": "row", "data": converter.row(record)}
+                records_count += 1
+
+            # 丢弃未读取的记录并获取统计信息
+            summary = result.consume()
+            RECORDS.inc(records_count, source="cypher_stream")
+            counters = self._collect_counters(summary)
+            self._invalidate_on_write(counters, source="cypher_stream")
+            yield {
+                "type": "summary",
+                "success": True,
+                "summary": {
+                    "records_count": records_count,
+                    "keys": keys,
+                    "query_type": summary.query_type if hasattr(summary, 'query_type') else "unknown",
+                    "counters": counters,
+                    "truncated": truncated,
+                    "max_rows": max_rows
+                }
+            }
+        except Exception as e:
+            log.error("Cypher流式查询执行错误: %s", e)
+            yield {"type": "error", "success": False, "error": str(e)}
+        finally:
+            session.close()
+
+    @staticmethod
+    def _collect_counters(summary) -> dict:
+        """只记录有变化的统计计数器"""
+        counters_dict = {}
+        if hasattr(summary, 'counters') and summary.counters:
+            counter_attrs = [
+                'nodes_created', 'nodes_deleted', 'relationships_created', 
+                'relationships_deleted', 'properties_set', 'labels_added', 
+                'labels_removed', 'indexes_added', 'indexes_removed',
+                'constraints_added', 'constraints_removed'
+            ]
+            for attr in counter_attrs:
+                if hasattr(summary.counters, attr):
+                    value = getattr(summary.counters, attr)
+                    if value > 0:
+                        counters_dict[attr] = value
+        return counters_dict
@@ -0,0 +1,68 @@
+# app/services/graph_session.py
+from typing import Any, Callable
+
+from neo4j import Driver, GraphDatabase, READ_ACCESS, RoutingControl, WRITE_ACCESS
+
+
+def create_driver(config) -> Driver:
+    """按 Config 创建 Neo4j 驱动（连接池大小、获取连接超时、事务重试时间）"""
+    return GraphDatabase.driver(
+        config.NEO4J_URI,
+        auth=(config.NEO4J_USER, config.NEO4J_PASSWORD),
+        max_connection_pool_size=config.NEO4J_MAX_POOL_SIZE,
+        connection_acquisition_timeout=config.NEO4J_ACQUISITION_TIMEOUT,
+        max_transaction_retry_time=config.NEO4J_MAX_RETRY_TIME
+    )
+
+
+class SessionManager:
+    """
+    会话管理层，对外提供与 Driver 相同的 execute_query/session 接口，
+    同时统一处理:
+    - 目标数据库（database 为None时使用服务器的默认数据库）
+    - 因果一致性书签：所有查询和会话共享同一个书签管理器，
+      写入之后的读取（即使被路由到集群的只读副本）一定能看到这次写入
+    - 托管的读/写事务函数（execute_read/execute_write），遇到可重试错误时由驱动自动重试
+    """
+
+    def __init__(self, driver: Driver, database: str = None):
+        self.driver = driver
+        self.database = database or None
+        self.bookmark_manager = GraphDatabase.bookmark_manager()
+
+    def execute_query(self, query_, parameters_: dict = None, routing_=RoutingControl.WRITE, **kwargs):
+        kwargs.setdefault("database_", self.database)
+        kwargs.setdefault("bookmark_manager_", self.bookmark_manager)
+        return self.driver.execute_query(query_, parameters_, routing_=routing_, **kwargs)
+
+    def read_query(self, query_, parameters_: dict = None, **kwargs):
+        """只读查询，使用 READ 路由"""
+        return self.execute_query(query_, parameters_, routing_=RoutingControl.READ, **kwargs)
+
+    def session(self, **config):
+        config.setdefault("database", self.database)
+        config.setdefault("bookmark_manager", self.bookmark_manager)
+        return self.driver.session(**config)
+
+    def read_transaction(self, work: Callable, *args, **kwargs) -> Any:
+        """在托管的读事务中执行 work(tx, *args, **kwargs)"""
+        with self.session(default_access_mode=READ_ACCESS) as session:
+            return session.execute_read(work, *args, **kwargs)
+
+    def write_transaction(self, work: Callable, *args, **kwargs) -> Any:
+        """在托管的写事务中执行 work(tx, *args, **kwargs)"""
+        with self.session(default_access_mode=WRITE_ACCESS) as session:
+            return session.execute_write(work, *args, **kwargs)
+
+    def verify_connectivity(self) -> None:
+        self.driver.verify_connectivity()
+
+    def close(self) -> None:
+        self.driver.close()
+
+
+def as_session_manager(driver, database: str = None) -> SessionManager:
+    """已经是 SessionManager 时原样返回，否则用它包装驱动"""
+    if isinstance(driver, SessionManager):
+        return driver
+    return SessionManager(driver, database)
@@ -0,0 +1,129 @@
+# app/services/llm_executor.py
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import httpx
+from openai import OpenAI
+
+from ..core.metrics import LLM_TOKENS, span
+
+
+class LLMBusyError(RuntimeError):
+    """排队中的LLM请求过多，拒绝新的请求"""
+
+
+class LLMExecutor:
+    """
+    线程池驱动的LLM调用执行器
+    - 所有请求共享同一个 httpx 连接池（keep-alive复用TCP/TLS连接）
+    - 同时在途的上游请求数不超过 max_concurrency，排队请求数不超过 max_pending
+    - 每个请求都有独立的超时时间
+    - 参数完全相同的在途请求会被合并为一次上游调用，所有调用方共享同一个结果
+    线程池限制的是上游并发，不会释放调用方线程：Flask 路由通过 complete() 调用时，
+    请求线程仍会阻塞到结果返回（或超时）；排队已满时立即抛出 LLMBusyError，不占用请求线程等待。
+    acomplete() 只供运行在事件循环中的调用方使用，当前的同步路由没有用到。
+    """
+
+    def __init__(self, api_key: str, base_url: str, max_concurrency: int = 8, max_pending: int = 64,
+                 pool_connections: int = 16, request_timeout: float = 30.0, max_retries: int = 1):
+        self.request_timeout = request_timeout
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+
+        self._http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=pool_connections,
+                max_keepalive_connections=pool_connections
+            ),
+            timeout=request_timeout
+        )
+        self.client = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self._http_client,
+            max_retries=max_retries
+        )
+        self._pool = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+
+        # 在途请求：合并键 -> Future
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "coalesced": 0, "rejected": 0, "completed": 0, "failed": 0}
+
+    @staticmethod
+    def _coalesce_key(params: Dict[str, Any]) -> str:
+        payload = json.dumps(params, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, model: str, messages: List[dict], timeout: float = None, **params) -> Future:
+        """
+        提交一次 chat completion 请求，返回 Future。
+        与在途请求参数完全相同时直接返回在途请求的 Future。
+        """
+        request = {"model": model, "messages": messages, **params}
+        key = self._coalesce_key(request)
+
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats["coalesced"] += 1
+                return future
+            if len(self._inflight) >= self.max_concurrency + self.max_pending:
+                self._stats["rejected"] += 1
+                raise LLMBusyError(f"LLM请求排队已满（{len(self._inflight)} 个在途请求）")
+
+            self._stats["submitted"] += 1
+            future = self._pool.submit(self._create, timeout=timeout or self.request_timeout, **request)
+            self._inflight[key] = future
+
+        future.add_done_callback(lambda f: self._on_done(key, f))
+        return future
+
+    def _create(self, **request):
+        """在线程池中执行的上游调用，记录上游耗时和token用量"""
+        with span("llm_upstream"):
+            response = self.client.chat.completions.create(**request)
+        usage = getattr(response, "usage", None)
+        if usage is not None:
+            LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+            LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+        return response
+
+    def _on_done(self, key: str, future: Future) -> None:
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+            self._stats["failed" if future.exception() else "completed"] += 1
+
+    def complete(self, model: str, messages: List[dict], timeout: float = None, **params):
+        """
+        同步调用：提交请求并阻塞调用线程等待结果（最多 timeout*2 秒，含排队时间），
+        超时抛出 concurrent.futures.TimeoutError
+        """
+        timeout = timeout or self.request_timeout
+        future = self.submit(model, messages, timeout=timeout, **params)
+        # 额外留出排队的时间
+        return future.result(timeout=timeout * 2)
+
+    async def acomplete(self, model: str, messages: List[dict], timeout: float = None, **params):
+        """异步调用：在事件循环中等待线程池中的请求完成"""
+        timeout = timeout or self.request_timeout
+        future = self.submit(model, messages, timeout=timeout, **params)
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout=timeout * 2)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "in_flight": len(self._inflight),
+                "max_concurrency": self.max_concurrency,
+                "max_pending": self.max_pending
+            }
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        self._http_client.close()
@@ -0,0 +1,129 @@
+# app/services/query_governor.py
+from typing import Optional
+
+from neo4j import Driver, Query, READ_ACCESS, RoutingControl, WRITE_ACCESS
+
+from ..core.logger import get_logger
+from .cypher_normalizer import accepts_trailing_limit
+from .graph_session import as_session_manager
+
+log = get_logger(__name__)
+
+
+class QueryRejectedError(ValueError):
+    """查询计划的预估代价超过上限，拒绝执行"""
+
+
+
+class QueryGovernor:
+    """
+    Cypher 查询守卫
+    1. 先执行 EXPLAIN 获取查询计划（不会真正执行），取各算子的预估行数
+    2. 任一算子预估行数超过 max_estimated_rows 时拒绝执行（例如笛卡尔积 MATCH (a),(b)）；
+       只读查询的结果预估超过 max_rows、以 RETURN 结尾且没有 LIMIT 时，在末尾追加 LIMIT 再执行；
+       其他形式（UNION、以 CALL 结尾等）不改写，只在读取结果时截断
+    3. 执行时设置事务超时，并在读取结果时限制最多 max_rows 行
+    4. 只读查询使用 READ 路由，可以分发到集群的只读副本
+    """
+
+    def __init__(self, driver: Driver, max_estimated_rows: int = 1_000_000,
+                 timeout: float = 30.0, max_rows: int = 10000):
+        self.driver = as_session_manager(driver)
+        self.max_estimated_rows = max_estimated_rows
+        self.timeout = timeout
+        self.max_rows = max_rows
+
+    def inspect(self, cypher_query: str, parameters: dict) -> Optional[dict]:
+        """
+        EXPLAIN 查询并返回计划摘要；EXPLAIN 本身失败（例如管理命令不支持EXPLAIN）时返回None。
+        语法错误等会在真正执行时以同样的错误报出。
+        """
+        try:
+            _, summary, _ = self.driver.execute_query(f"EXPLAIN {cypher_query}", parameters)
+        except Exception as e:
+            log.warning("⚠️  EXPLAIN 失败，跳过代价检查: %s", e)
+            return None
+
+        operators = []
+
+        def walk(plan: dict):
+            args = plan.get("args", {})
+            operators.append({
+                "operator": plan.get("operatorType"),
+                "estimated_rows": float(args.get("EstimatedRows", 0) or 0)
+            })
+            for child in plan.get("children", []) or []:
+                walk(child)
+
+        plan = summary.plan if isinstance(summary.plan, dict) else None
+        if plan:
+            walk(plan)
+        return {
+            "query_type": summary.query_type,
+            "result_rows": operators[0]["estimated_rows"] if operators else 0.0,
+            "max_estimated_rows": max((op["estimated_rows"] for op in operators), default=0.0),
+            "operators": sorted({op["operator"] for op in operators if op["operator"]})
+        }
+
+    def check(self, cypher_query: str, plan: Optional[dict], rewrite: bool = True) -> tuple:
+        """根据计划决定是否拒绝或改写查询，返回 (最终查询, 是否改写)"""
+        if plan is None:
+            return cypher_query, False
+
+        if plan["max_estimated_rows"] > self.max_estimated_rows:
+            cartesian = any("CartesianProduct" in op for op in plan["operators"])
+            raise QueryRejectedError(
+                f"查询计划预计处理 {int(plan['max_estimated_rows'])} 行，超过上限 {self.max_estimated_rows}"
+                + ("（包含笛卡尔积，请为MATCH模式添加关联条件）" if cartesian else "")
+            )
+
+        if (rewrite and plan["query_type"] == "r" and plan["result_rows"] > self.max_rows
+                and accepts_trailing_limit(cypher_query)):
+            # 不用 CALL { ... } RETURN * 包装：子查询的返回项必须是变量或带别名，RETURN n.name 之类会报语法错误
+            body = cypher_query.strip().rstrip(";")
+            return f"{body}\nLIMIT {self.max_rows}", True
+
+        return cypher_query, False
+
+    def run(self, cypher_query: str, parameters: dict = None, **execute_kwargs) -> dict:
+        """
+        检查并执行查询，返回:
+            {"records", "summary", "keys", "truncated", "rewritten", "plan"}
+        超过代价上限时抛出 QueryRejectedError
+        """
+        parameters = parameters or {}
+        plan = self.inspect(cypher_query, parameters)
+        final_query, rewritten = self.check(cypher_query, plan)
+        is_read = plan is not None and plan["query_type"] == "r"
+        max_rows = self.max_rows
+
+        def collect(result):
+            records = []
+            truncated = False
+            for record in result:
+                if len(records) >= max_rows:
+                    truncated = True
+                    break
+                records.append(record)
+            return records, result.consume(), result.keys(), truncated
+
+        records, summary, keys, truncated = self.driver.execute_query(
+            Query(final_query, timeout=self.timeout),
+            parameters,
+            routing_=RoutingControl.READ if is_read else RoutingControl.WRITE,
+            result_transformer_=collect,
+            **execute_kwargs
+        )
+        return {
+            "records": records,
+            "summary": summary,
+            "keys": keys,
+            "truncated": truncated,
+            "rewritten": rewritten,
+            "plan": plan
+        }
+
+    def session_config(self, plan: Optional[dict]) -> dict:
+        """流式查询使用的会话配置：只读查询使用读会话"""
+        is_read = plan is not None and plan["query_type"] == "r"
+        return {"default_access_mode": READ_ACCESS if is_read else WRITE_ACCESS}
@@ -0,0 +1,231 @@
+# app/services/record_codec.py
+import base64
+import datetime
+import json
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    # orjson 未安装时使用标准库 json 序列化
+    orjson = None
+
+from neo4j.graph import Node, Path, Relationship
+from neo4j.spatial import Point, WGS84Point
+from neo4j.time import Date, DateTime, Duration, Time
+
+SCALAR_TYPES = (str, int, float, bool, type(None))
+TEMPORAL_TYPES = (Date, DateTime, Time, Duration)
+NATIVE_TEMPORAL_TYPES = (datetime.date, datetime.datetime, datetime.time)
+
+
+_tuple_iter = tuple.__iter__
+
+
+def _identity(value):
+    return value
+
+
+def _is_node_type(cls) -> bool:
+    # 驱动的 Node 类，或具有同样接口的对象（如基准测试中的替身）
+    return issubclass(cls, Node) or (hasattr(cls, "element_id") and hasattr(cls, "labels"))
+
+
+def _is_relationship_type(cls) -> bool:
+    return issubclass(cls, Relationship) or (hasattr(cls, "element_id") and hasattr(cls, "start_node"))
+
+
+def _is_path_type(cls) -> bool:
+    return issubclass(cls, Path) or (hasattr(cls, "relationships") and hasattr(cls, "start_node"))
+
+
+class RecordConverter:
+    """
+    把查询结果记录转换为可JSON序列化的结构:
+        节点   {"type": "node", "id", "labels", "properties"}
+        关系   {"type": "relationship", "id", "type_name", "start_node", "end_node", "properties"}
+        路径   {"type": "path", "nodes": [节点...], "relationships": [关系...]}
+        时间   ISO 8601 字符串（Date/DateTime/Time/Duration 及 Python 原生日期时间）
+        空间点 {"type": "point", "srid", "x", "y"[, "z"]}，WGS84 坐标另有 longitude/latitude[/height]
+        列表和映射逐个元素转换，字节数组转为 base64 字符串
+    - 按值的类型选择转换函数，同一类型只判断一次；每列记住上一个值的类型，整列类型相同时不再查表
+    - 同一结果中重复出现的节点和关系只转换一次（memoize 为False时不缓存，用于流式结果，内存占用与结果集大小无关）
+    - entities 为True时，节点和关系只在 entity_table() 中出现一次，行中只保留引用
+      {"type": "node", "id"} / {"type": "relationship", "id"}，结果集中实体重复越多输出越小
+    """
+
+    def __init__(self, keys: List[str], entities: bool = False, memoize: bool = True):
+        self.keys = list(keys)
+        self.entities = entities
+        self.memoize = memoize or entities
+        self._nodes: Dict[str, dict] = {}
+        self._relationships: Dict[str, dict] = {}
+        # 类型 -> 转换函数
+        self._dispatch: Dict[type, Callable] = {}
+        for scalar in SCALAR_TYPES:
+            self._dispatch[scalar] = _identity
+        # 每列上一个值的 (类型, 转换函数)
+        self._columns = [(type(None), _identity)] * len(self.keys)
+
+    # ---------- 按类型分派 ----------
+
+    def _converter(self, cls) -> Callable:
+        converter = self._dispatch.get(cls)
+        if converter is None:
+            converter = self._dispatch[cls] = self._classify(cls)
+        return converter
+
+    def _classify(self, cls) -> Callable:
+        if issubclass(cls, Point):
+            return self._point
+        if issubclass(cls, TEMPORAL_TYPES):
+            return self._temporal
+        if issubclass(cls, NATIVE_TEMPORAL_TYPES):
+            return self._native_temporal
+        if _is_path_type(cls):
+            return self._path
+        if _is_relationship_type(cls):
+            return self._relationship
+        if _is_node_type(cls):
+            return self._node
+        if issubclass(cls, (list, tuple)):
+            return self._list
+        if issubclass(cls, dict):
+            return self._map
+        if issubclass(cls, (bytes, bytearray)):
+            return self._bytes
+        if issubclass(cls, SCALAR_TYPES):
+            return _identity
+        return str
+
+    def convert(self, value) -> Any:
+        """转换单个值"""
+        return self._converter(type(value))(value)
+
+    def row(self, record) -> dict:
+        """转换一条记录（neo4j.Record 或按 keys 顺序的值序列）"""
+        # neo4j.Record 是 tuple 的子类，其 __iter__ 是逐个产出值的生成器，直接按元组遍历更快
+        values = _tuple_iter(record) if isinstance(record, tuple) else iter(record)
+        row = {}
+        columns = self._columns
+        i = 0
+        for key, value in zip(self.keys, values):
+            cls = type(value)
+            last_cls, converter = columns[i]
+            if cls is not last_cls:
+                converter = self._converter(cls)
+                columns[i] = (cls, converter)
+            row[key] = converter(value)
+            i += 1
+        return row
+
+    def rows(self, records: Iterable) -> List[dict]:
+        return [self.row(record) for record in records]
+
+    def entity_table(self) -> Optional[dict]:
+        """entities 模式下的实体表 {"nodes": {id: ...}, "relationships": {id: ...}}"""
+        if not self.entities:
+            return None
+        return {"nodes": self._nodes, "relationships": self._relationships}
+
+    def seen(self) -> tuple:
+        """本结果中出现过的 (节点列表, 关系列表)，为完整的转换结果；memoize 为False时为空"""
+        return list(self._nodes.values()), list(self._relationships.values())
+
+    # ---------- 各类型的转换 ----------
+
+    def _properties(self, entity) -> dict:
+        properties = {}
+        for key, value in entity.items():
+            converter = self._dispatch.get(type(value))
+            properties[key] = value if converter is _identity else self.convert(value)
+        return properties
+
+    def _node(self, node) -> dict:
+        element_id = node.element_id
+        converted = self._nodes.get(element_id)
+        if converted is None:
+            converted = {
+                "type": "node",
+                "id": element_id,
+                "labels": list(node.labels),
+                "properties": self._properties(node)
+            }
+            if self.memoize:
+                self._nodes[element_id] = converted
+        return {"type": "node", "id": element_id} if self.entities else converted
+
+    def _relationship(self, relationship) -> dict:
+        element_id = relationship.element_id
+        converted = self._relationships.get(element_id)
+        if converted is None:
+            converted = {
+                "type": "relationship",
+                "id": element_id,
+                "type_name": relationship.type,
+                "properties": self._properties(relationship),
+                "start_node": relationship.start_node.element_id,
+                "end_node": relationship.end_node.element_id
+            }
+            if self.memoize:
+                self._relationships[element_id] = converted
+        return {"type": "relationship", "id": element_id} if self.entities else converted
+
+    def _path(self, path) -> dict:
+        return {
+            "type": "path",
+            "nodes": [self._node(node) for node in path.nodes],
+            "relationships": [self._relationship(relationship) for relationship in path.relationships]
+        }
+
+    def _list(self, values) -> list:
+        converter, last_cls = _identity, None
+        result = []
+        for value in values:
+            cls = type(value)
+            if cls is not last_cls:
+                converter, last_cls = self._converter(cls), cls
+            result.append(converter(value))
+        return result
+
+    def _map(self, mapping) -> dict:
+        return {key: self.convert(value) for key, value in mapping.items()}
+
+    @staticmethod
+    def _temporal(value) -> str:
+        return value.iso_format()
+
+    @staticmethod
+    def _native_temporal(value) -> str:
+        return value.isoformat()
+
+    @staticmethod
+    def _bytes(value) -> str:
+        return base64.b64encode(bytes(value)).decode("ascii")
+
+    @staticmethod
+    def _point(point) -> dict:
+        converted = {"type": "point", "srid": point.srid, "x": point[0], "y": point[1]}
+        if len(point) > 2:
+            converted["z"] = point[2]
+        if isinstance(point, WGS84Point):
+            converted["longitude"], converted["latitude"] = point[0], point[1]
+            if len(point) > 2:
+                converted["height"] = point[2]
+        return converted
+
+
+def convert_records(records: Iterable, keys: List[str], entities: bool = False) -> tuple:
+    """转换整个结果集，返回 (行列表, 实体表或None)"""
+    converter = RecordConverter(keys, entities=entities)
+    return converter.rows(records), converter.entity_table()
+
+
+def dumps(payload: Any) -> bytes:
+    """序列化为UTF-8编码的紧凑JSON；安装了 orjson 时使用 orjson（超出64位的整数等情况退回标准库）"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(payload, default=str, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
@@ -0,0 +1,154 @@
+# app/services/translation_cache.py
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from typing import Optional
+
+# Cypher中出现这些关键字即视为写语句
+WRITE_KEYWORDS = re.compile(r"\b(CREATE|MERGE|DELETE|DETACH|SET|REMOVE|DROP|LOAD\s+CSV)\b", re.IGNORECASE)
+
+# 归一化时去掉的标点（中英文）；单引号常出现在人名和所有格中（O'Brien、Alice's），保留
+PUNCTUATION = re.compile(r"[\s\.,!?;:，。！？；：、\"“”‘’《》「」()（）\[\]【】]+")
+
+# 引号、书名号括起来的片段，通常是会原样写进Cypher的人名、论文题目等字面量
+QUOTED = re.compile(r'"[^"]*"|“[^”]*”|‘[^’]*’|《[^》]*》|「[^」]*」')
+
+# 中文字符之间的空白没有意义
+CJK_SPACING = re.compile(r"\s*([\u3400-\u9fff])\s*")
+
+
+def _normalize_plain(text: str) -> str:
+    text = PUNCTUATION.sub(" ", text)
+    return CJK_SPACING.sub(r"\1", text).strip()
+
+
+def normalize_user_input(text: str) -> str:
+    """
+    把用户输入归一化，使仅在全半角、空白和标点上有差别的问题命中同一条缓存。
+    不改变大小写，引号和书名号内的内容原样保留（统一为 "..."）：人名、题目等字面量在Cypher中区分大小写和标点，
+    例如 Alice 和 alice、《A.I.》和《AI》需要不同的查询。
+    """
+    text = unicodedata.normalize("NFKC", text).strip()
+    parts, last = [], 0
+    for match in QUOTED.finditer(text):
+        parts.append(_normalize_plain(text[last:match.start()]))
+        parts.append(f'"{match.group()[1:-1]}"')
+        last = match.end()
+    parts.append(_normalize_plain(text[last:]))
+    return " ".join(part for part in parts if part)
+
+
+def is_write_query(cypher_query: str) -> bool:
+    return bool(WRITE_KEYWORDS.search(cypher_query))
+
+
+class TranslationCache:
+    """
+    自然语言 -> Cypher 的持久化翻译缓存（SQLite）
+    缓存键由 归一化后的输入 + 模型名 + 系统提示词哈希 组成，
+    因此更换模型或修改提示词后旧缓存自动失效。
+    超过 max_entries 时按最近使用时间淘汰。
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 10000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS translations (
+                cache_key TEXT PRIMARY KEY,
+                normalized_input TEXT NOT NULL,
+                model TEXT NOT NULL,
+                cypher_query TEXT NOT NULL,
+                is_write INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                hit_count INTEGER NOT NULL DEFAULT 0
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations(last_used_at)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(user_input: str, model: str, system_prompt: str) -> str:
+        prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+        raw = "\x1f".join([normalize_user_input(user_input), model, prompt_hash])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, user_input: str, model: str, system_prompt: str) -> Optional[dict]:
+        key = self.make_key(user_input, model, system_prompt)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cypher_query, is_write FROM translations WHERE cache_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE translations SET last_used_at = ?, hit_count = hit_count + 1 WHERE cache_key = ?",
+                (time.time(), key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return {"cypher_query": row[0], "is_write": bool(row[1])}
+
+    def set(self, user_input: str, model: str, system_prompt: str, cypher_query: str) -> None:
+        key = self.make_key(user_input, model, system_prompt)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO translations
+                    (cache_key, normalized_input, model, cypher_query, is_write, created_at, last_used_at, hit_count)
+                VALUES (?, ?, ?, ?, ?, ?, ?, 0)
+                """,
+                (key, normalize_user_input(user_input), model, cypher_query,
+                 int(is_write_query(cypher_query)), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                """
+                DELETE FROM translations WHERE cache_key IN (
+                    SELECT cache_key FROM translations ORDER BY last_used_at ASC LIMIT ?
+                )
+                """,
+                (overflow,)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM translations")
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        total = self.hits + self.misses
+        return {
+            "size": size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0
+        }
@@ -0,0 +1,3 @@
+# benchmarks/__init__.py
+# 可复现的性能基准：合成学术图 + 进程内的 Neo4j 驱动替身 + 本地 OpenAI 兼容桩服务器，
+# 不需要真实的 Neo4j 和 DeepSeek。用法见 benchmarks/run.py。
@@ -0,0 +1,205 @@
+# benchmarks/fake_neo4j.py
+# 进程内的 Neo4j 驱动替身：Node/Relationship/Path 只实现服务层用到的接口，
+# 记录使用驱动真实的 neo4j.Record；FakeDriver 实现 Driver 中 SessionManager 用到的部分
+# （见 app/services/graph_session.py），服务层仍经过真实的 SessionManager
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+from neo4j import Record
+
+
+class FakeNode:
+    __slots__ = ("element_id", "labels", "_properties")
+
+    def __init__(self, element_id: str, labels: Iterable[str], properties: dict):
+        self.element_id = element_id
+        self.labels = frozenset(labels)
+        self._properties = properties
+
+    def items(self):
+        return self._properties.items()
+
+    def keys(self):
+        return self._properties.keys()
+
+    def values(self):
+        return self._properties.values()
+
+    def get(self, key, default=None):
+        return self._properties.get(key, default)
+
+    def __getitem__(self, key):
+        return self._properties[key]
+
+    def __iter__(self):
+        return iter(self._properties)
+
+    def __len__(self):
+        return len(self._properties)
+
+
+class FakeRelationship(FakeNode):
+    __slots__ = ("type", "start_node", "end_node")
+
+    def __init__(self, element_id: str, rel_type: str, start_node: FakeNode, end_node: FakeNode, properties: dict):
+        super().__init__(element_id, (), properties)
+        self.type = rel_type
+        self.start_node = start_node
+        self.end_node = end_node
+
+    @property
+    def nodes(self):
+        return self.start_node, self.end_node
+
+
+class FakePath:
+    """节点与关系交替组成的路径"""
+
+    def __init__(self, nodes: List[FakeNode], relationships: List[FakeRelationship]):
+        self.nodes = tuple(nodes)
+        self.relationships = tuple(relationships)
+
+    @property
+    def start_node(self):
+        return self.nodes[0]
+
+    @property
+    def end_node(self):
+        return self.nodes[-1]
+
+    def __len__(self):
+        return len(self.relationships)
+
+    def __iter__(self):
+        return iter(self.relationships)
+
+
+class FakeCounters:
+    def __init__(self, **values):
+        for name in ("nodes_created", "nodes_deleted", "relationships_created", "relationships_deleted",
+                     "properties_set", "labels_added", "labels_removed", "indexes_added", "indexes_removed",
+                     "constraints_added", "constraints_removed"):
+            setattr(self, name, values.get(name, 0))
+
+
+class FakeSummary:
+    def __init__(self, query_type: str = "r", counters: FakeCounters = None, plan: dict = None):
+        self.query_type = query_type
+        self.counters = counters or FakeCounters()
+        self.plan = plan
+        self.result_available_after = 0
+        self.result_consumed_after = 0
+
+
+class FakeResult:
+    def __init__(self, keys: List[str], records: List[Record], summary: FakeSummary):
+        self._keys = keys
+        self._records = records
+        self._summary = summary
+
+    def keys(self):
+        return list(self._keys)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def consume(self):
+        return self._summary
+
+
+class FakeTransaction:
+    def __init__(self, driver: "FakeDriver"):
+        self._driver = driver
+
+    def run(self, query, parameters=None, **kwargs):
+        return self._driver._result(query, {**(parameters or {}), **kwargs})
+
+
+class FakeSession(FakeTransaction):
+    def execute_read(self, work, *args, **kwargs):
+        return work(FakeTransaction(self._driver), *args, **kwargs)
+
+    def execute_write(self, work, *args, **kwargs):
+        return work(FakeTransaction(self._driver), *args, **kwargs)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def graph_objects(graph) -> tuple:
+    """把合成图（见 synthetic.SyntheticGraph）转换为 (FakeNode 列表, FakeRelationship 列表)"""
+    nodes = {node["id"]: FakeNode(node["id"], node["labels"], node["properties"]) for node in graph.nodes}
+    rels = [
+        FakeRelationship(rel["id"], rel["type"], nodes[rel["source"]], nodes[rel["target"]], rel["properties"])
+        for rel in graph.rels
+    ]
+    return list(nodes.values()), rels
+
+
+def make_records(keys: List[str], rows: Iterable[tuple]) -> List[Record]:
+    return [Record(zip(keys, row)) for row in rows]
+
+
+class FakeDriver:
+    """
+    Neo4j 驱动的替身：
+    - 图数据查询（SUBGRAPH_QUERY）从合成图计算结果
+    - 其他查询交给 responder(query, parameters) -> (keys, rows, summary 或 None)；未设置时返回空结果
+    - EXPLAIN 返回没有计划的摘要（查询守卫会跳过代价检查）
+    """
+
+    def __init__(self, graph=None, responder: Callable = None):
+        self.graph = graph
+        self.responder = responder
+        self.queries = 0
+
+    def _subgraph(self, parameters: dict) -> tuple:
+        nodes, rels = self.graph.subgraph(parameters["limit"])
+        node_props, rel_props = parameters.get("node_props"), parameters.get("rel_props")
+
+        def project(properties: dict, names: Optional[list]):
+            return dict(properties) if names is None else [properties.get(name) for name in names]
+
+        node_rows = [{"id": n["id"], "labels": n["labels"], "properties": project(n["properties"], node_props),
+                      "influence": n["influence"], "community": n["community"]} for n in nodes]
+        rel_rows = [{"id": r["id"], "type": r["type"], "source": r["source"], "target": r["target"],
+                     "properties": project(r["properties"], rel_props)} for r in rels]
+        return ["nodes", "rels"], [(node_rows, rel_rows)], None
+
+    def _result(self, query, parameters: dict) -> FakeResult:
+        self.queries += 1
+        text = getattr(query, "text", query)
+        if text.lstrip().upper().startswith("EXPLAIN"):
+            return FakeResult([], [], FakeSummary())
+        if self.graph is not None and "collect(n) AS nodes" in text:
+            keys, rows, summary = self._subgraph(parameters)
+        elif self.responder is not None:
+            keys, rows, summary = self.responder(text, parameters)
+        else:
+            keys, rows, summary = [], [], None
+        return FakeResult(keys, make_records(keys, rows), summary or FakeSummary())
+
+    # ---------- Driver 接口 ----------
+
+    def execute_query(self, query_, parameters_: Dict = None, routing_=None, result_transformer_=None, **kwargs):
+        # 以 _ 结尾的是驱动的配置参数（database_、bookmark_manager_ 等），其余是查询参数
+        parameters = {**(parameters_ or {}), **{k: v for k, v in kwargs.items() if not k.endswith("_")}}
+        result = self._result(query_, parameters)
+        if result_transformer_ is not None:
+            return result_transformer_(result)
+        return list(result), result.consume(), result.keys()
+
+    def session(self, **config):
+        return FakeSession(self)
+
+    def verify_connectivity(self):
+        pass
+
+    def close(self):
+        pass
@@ -0,0 +1,342 @@
+# benchmarks/run.py
+# 性能基准：图数据导出（get_graph_for_echarts）、Cypher结果转换（execute_cypher_query 及 /api/cypher）、
+# /api/ai-cypher 端到端（本地桩模型服务器 + 驱动替身），结果写成JSON，便于在不同提交之间对比
+#
+# 用法（在 backend/ 目录下）:
+#   python -m benchmarks.run                                   # small、medium 两个规模的全部基准
+#   python -m benchmarks.run --scales small,medium,large --output results/base.json
+#   python -m benchmarks.run --only echarts,cypher --iterations 50
+#   python -m benchmarks.run --output results/new.json --compare results/base.json
+#   python -m benchmarks.run --llm-delay 0.2 --ai-concurrency 1,8  # 模拟模型延迟，比较不同并发
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCHMARKS = ("echarts", "cypher", "cypher_http", "ai_cypher")
+# 每个规模下图导出的节点数，以及Cypher结果的行数
+ECHARTS_LIMITS = {"small": [50, 500], "medium": [500, 2000], "large": [2000, 10000]}
+CYPHER_ROWS = {"small": [100, 1000], "medium": [1000, 10000], "large": [10000, 50000]}
+# 输出各处理阶段的平均耗时（见 app/core/metrics.py）
+SPANS = ("cypher_execute", "record_convert", "json_serialize", "llm", "llm_upstream")
+
+
+def _environment(stub_url: str) -> None:
+    """在导入 app 之前设置环境变量：Config 在导入时读取环境变量"""
+    os.environ.update({
+        "DEEPSEEK_BASE_URL": stub_url,
+        "DEEPSEEK_API_KEY": "sk-benchmark",
+        "TRANSLATION_CACHE_ENABLED": "false",
+        "HEALTH_CHECK_ON_STARTUP": "false",
+        "SCHEMA_APPLY_ON_STARTUP": "false",
+        "ANALYTICS_ENABLED": "false",
+        "SEARCH_INDEX_ON_STARTUP": "false",
+    })
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def _git_commit() -> dict:
+    def git(*args):
+        try:
+            return subprocess.run(["git", *args], capture_output=True, text=True, timeout=10,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+        except (OSError, subprocess.SubprocessError):
+            return None
+    return {"commit": git("rev-parse", "--short", "HEAD"), "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def _percentile(values: list, q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _span_totals() -> dict:
+    from app.core.metrics import SPAN_SECONDS
+    return {name: SPAN_SECONDS.snapshot(span=name) or {"count": 0, "sum": 0.0} for name in SPANS}
+
+
+def measure(fn, iterations: int, warmup: int, concurrency: int = 1) -> dict:
+    """调用 fn() iterations 次（并发 concurrency），返回延迟分布、吞吐量和各阶段的平均耗时"""
+    for _ in range(warmup):
+        fn()
+
+    spans_before = _span_totals()
+    latencies = []
+
+    def timed(_):
+        started = time.perf_counter()
+        fn()
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    if concurrency <= 1:
+        latencies = [timed(i) for i in range(iterations)]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            latencies = list(pool.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - started
+    spans_after = _span_totals()
+
+    spans = {}
+    for name in SPANS:
+        count = spans_after[name]["count"] - spans_before[name]["count"]
+        if count:
+            spans[name] = round((spans_after[name]["sum"] - spans_before[name]["sum"]) / iterations * 1000, 3)
+
+    return {
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "ops_per_sec": round(iterations / elapsed, 2),
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3),
+            "p50": round(_percentile(latencies, 0.5) * 1000, 3),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 3),
+            "min": round(min(latencies) * 1000, 3),
+            "max": round(max(latencies) * 1000, 3),
+        },
+        "spans_ms": spans
+    }
+
+
+# ---------- 各项基准 ----------
+
+def bench_echarts(graph, scale: str, args) -> list:
+    from app.services.graph_service import GraphService
+    from app.services.graph_session import SessionManager
+    from .fake_neo4j import FakeDriver
+
+    service = GraphService(SessionManager(FakeDriver(graph)))
+    results = []
+    for limit in ECHARTS_LIMITS[scale]:
+        limit = min(limit, len(graph.nodes))
+        data = service.get_graph_for_echarts(node_limit=limit)
+
+        def run():
+            # 每次都清空快照缓存，测量查询结果到ECharts格式的完整转换
+            service.invalidate_graph_cache()
+            service.get_graph_for_echarts(node_limit=limit)
+
+        result = measure(run, args.iterations, args.warmup)
+        items = len(data["nodes"]) + len(data["links"])
+        result.update({"name": "echarts", "scale": scale, "params": {"node_limit": limit},
+                       "nodes": len(data["nodes"]), "links": len(data["links"]),
+                       "items_per_sec": round(items * result["ops_per_sec"], 1)})
+        results.append(result)
+    return results
+
+
+def _path_responder(graph):
+    """MATCH (a)-[r]->(b) RETURN a, r, b LIMIT $limit 的结果：节点、关系、节点"""
+    from .fake_neo4j import graph_objects
+
+    _, rels = graph_objects(graph)
+
+    def respond(query, parameters):
+        limit = parameters.get("limit", len(rels))
+        return ["a", "r", "b"], ((rel.start_node, rel, rel.end_node) for rel in rels[:limit]), None
+    return respond, len(rels)
+
+
+CYPHER_QUERY = "MATCH (a)-[r]->(b) RETURN a, r, b LIMIT $limit"
+
+
+def bench_cypher(graph, scale: str, args) -> list:
+    from app.services.graph_service import GraphService
+    from app.services.graph_session import SessionManager
+    from app.services.query_governor import QueryGovernor
+    from .fake_neo4j import FakeDriver
+
+    responder, available = _path_responder(graph)
+    results = []
+    for rows in CYPHER_ROWS[scale]:
+        rows = min(rows, available)
+        sessions = SessionManager(FakeDriver(graph, responder))
+        service = GraphService(sessions, governor=QueryGovernor(sessions, max_rows=rows))
+
+        def run():
+            result = service.execute_cypher_query(CYPHER_QUERY, {"limit": rows})
+            assert result["success"], result.get("error")
+
+        result = measure(run, args.iterations, args.warmup)
+        result.update({"name": "cypher", "scale": scale, "params": {"rows": rows},
+                       "records_per_sec": round(rows * result["ops_per_sec"], 1)})
+        results.append(result)
+    return results
+
+
+def _app_with_fake_driver(driver):
+    """创建应用并把所有服务的驱动替换为替身（应用启动时不会连接数据库）"""
+    from app import create_app
+    from app.routes import api as api_routes
+    from app.services.graph_session import SessionManager
+
+    app = create_app()
+    sessions = SessionManager(driver)
+    service = api_routes.graph_service
+    service.driver = sessions
+    service.ingestor.driver = sessions
+    service.schema.driver = sessions
+    if service.governor is not None:
+        service.governor.driver = sessions
+    return app
+
+
+def bench_cypher_http(graph, scale: str, args) -> list:
+    from .fake_neo4j import FakeDriver
+
+    responder, available = _path_responder(graph)
+    app = _app_with_fake_driver(FakeDriver(graph, responder))
+    client = app.test_client()
+    max_rows = app.config["QUERY_MAX_ROWS"]
+    results = []
+    # 默认的逐行格式，以及节点、关系去重到实体表的 "format": "entities"
+    for rows in CYPHER_ROWS[scale]:
+        rows = min(rows, available, max_rows)
+        for fmt in (None, "entities"):
+            payload = {"query": CYPHER_QUERY, "parameters": {"limit": rows}}
+            params = {"rows": rows}
+            if fmt:
+                payload["format"] = params["format"] = fmt
+            size = len(client.post("/api/cypher", json=payload).data)
+
+            def run():
+                response = client.post("/api/cypher", json=payload)
+                assert response.status_code == 200, response.data[:200]
+
+            result = measure(run, args.iterations, args.warmup)
+            result.update({"name": "cypher_http", "scale": scale, "params": params,
+                           "response_bytes": size,
+                           "records_per_sec": round(rows * result["ops_per_sec"], 1)})
+            results.append(result)
+    return results
+
+
+def bench_ai_cypher(graph, scale: str, args, stub_state) -> list:
+    from .fake_neo4j import FakeCounters, FakeDriver, FakeSummary
+
+    def respond(query, parameters):
+        # 桩服务器生成的是 MERGE (s:Scholar {name: ...}) RETURN s
+        return [], [], FakeSummary("rw", FakeCounters(nodes_created=1, properties_set=1))
+
+    app = _app_with_fake_driver(FakeDriver(graph, respond))
+    client = app.test_client()
+    results = []
+    for concurrency in args.ai_concurrency:
+        counter = iter(range(10 ** 9))
+
+        def run():
+            # 每次都是不同的输入，不会被请求合并
+            response = client.post("/api/ai-cypher", json={"user_input": f"添加学者 基准{next(counter)}",
+                                                           "use_cache": False})
+            assert response.status_code == 200 and response.json["success"], response.data[:200]
+
+        requests_before = stub_state.requests
+        result = measure(run, args.ai_iterations, args.warmup, concurrency=concurrency)
+        result.update({"name": "ai_cypher", "scale": scale,
+                       "params": {"concurrency": concurrency, "llm_delay": args.llm_delay},
+                       "llm_requests": stub_state.requests - requests_before,
+                       "llm_max_in_flight": stub_state.max_in_flight})
+        results.append(result)
+    return results
+
+
+# ---------- 输出与对比 ----------
+
+def _key(result: dict) -> str:
+    params = ",".join(f"{k}={v}" for k, v in sorted(result["params"].items()))
+    return f"{result['name']}[{result['scale']}]({params})"
+
+
+def print_table(results: list, baseline: dict = None) -> None:
+    header = f"{'benchmark':<52} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10}"
+    if baseline:
+        header += f" {'Δ ops/s':>9} {'Δ p50':>9}"
+    print(header)
+    print("-" * len(header))
+    for result in results:
+        line = (f"{_key(result):<52} {result['ops_per_sec']:>10.1f} "
+                f"{result['latency_ms']['p50']:>10.3f} {result['latency_ms']['p95']:>10.3f}")
+        previous = baseline.get(_key(result)) if baseline else None
+        if previous:
+            ops = result["ops_per_sec"] / previous["ops_per_sec"] - 1
+            p50 = result["latency_ms"]["p50"] / previous["latency_ms"]["p50"] - 1 if previous["latency_ms"]["p50"] else 0
+            line += f" {ops:>+9.1%} {p50:>+9.1%}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="图导出、Cypher结果转换和AI流程的性能基准")
+    parser.add_argument("--scales", default="small,medium", help="合成图规模，逗号分隔: small,medium,large")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"只运行这些基准: {','.join(BENCHMARKS)}")
+    parser.add_argument("--iterations", type=int, default=20, help="每项基准的计时次数")
+    parser.add_argument("--warmup", type=int, default=3, help="计时前的预热次数")
+    parser.add_argument("--seed", type=int, default=42, help="合成图的随机种子")
+    parser.add_argument("--llm-delay", type=float, default=0.0, help="桩模型服务器每个请求的延迟（秒）")
+    parser.add_argument("--ai-iterations", type=int, default=50, help="/api/ai-cypher 的请求次数")
+    parser.add_argument("--ai-concurrency", default="1,8", help="/api/ai-cypher 的并发数，逗号分隔")
+    parser.add_argument("--output", help="结果JSON的输出路径")
+    parser.add_argument("--compare", help="与之前输出的结果JSON对比")
+    args = parser.parse_args()
+    args.ai_concurrency = [int(c) for c in args.ai_concurrency.split(",") if c.strip()]
+    selected = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = set(selected) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"未知的基准: {', '.join(sorted(unknown))}")
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from stub_openai_server import start_stub_server
+
+    server, stub_state = start_stub_server("127.0.0.1", 0, delay=args.llm_delay)
+    _environment(f"http://127.0.0.1:{server.server_address[1]}")
+    from .synthetic import generate
+
+    results = []
+    graphs = {}
+    for scale in [s.strip() for s in args.scales.split(",") if s.strip()]:
+        started = time.perf_counter()
+        graph = generate(scale, seed=args.seed)
+        graphs[scale] = {**graph.stats(), "generate_seconds": round(time.perf_counter() - started, 3)}
+        print(f"📊 {scale}: {graph.stats()['nodes']} 个节点, {graph.stats()['relationships']} 个关系", file=sys.stderr)
+        for name in selected:
+            if name == "ai_cypher":
+                results.extend(bench_ai_cypher(graph, scale, args, stub_state))
+            else:
+                results.extend(globals()[f"bench_{name}"](graph, scale, args))
+    server.shutdown()
+
+    report = {
+        "meta": {
+            **_git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+            "graphs": graphs
+        },
+        "results": results
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = {_key(result): result for result in json.load(f)["results"]}
+    print_table(results, baseline)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"✅ 结果已写入 {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# benchmarks/synthetic.py
+# 合成的学者/论文/学生/机构图，固定随机种子，同样的参数总是生成同样的图
+
+import random
+from typing import Dict, List
+
+# 各规模下的节点数；关系数约为学者数的 10~15 倍
+SCALES = {
+    "small": {"scholars": 200, "papers": 400, "students": 100, "institutions": 20},
+    "medium": {"scholars": 2000, "papers": 5000, "students": 1000, "institutions": 100},
+    "large": {"scholars": 20000, "papers": 50000, "students": 10000, "institutions": 500},
+}
+
+FIELDS = ["图神经网络", "知识图谱", "自然语言处理", "计算机视觉", "强化学习", "数据库系统",
+          "distributed systems", "information retrieval", "machine learning", "bioinformatics"]
+SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗"
+GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰涛明超秀霞平刚"
+TITLE_WORDS = ["Graph", "Neural", "Scalable", "Learning", "Efficient", "Attention", "Retrieval",
+               "Knowledge", "Embedding", "Reasoning", "Large", "Sparse", "Adaptive", "Benchmark"]
+DEGREES = ["本科", "硕士", "博士"]
+
+
+class SyntheticGraph:
+    """
+    节点: {"id", "labels", "properties", "influence", "community"}
+    关系: {"id", "type", "source", "target", "properties"}
+    与 SUBGRAPH_QUERY 返回的行格式一致（properties 为完整属性字典）。
+    """
+
+    def __init__(self, nodes: List[dict], rels: List[dict]):
+        self.nodes = nodes
+        self.rels = rels
+        self.by_id: Dict[str, dict] = {node["id"]: node for node in nodes}
+        self.out_rels: Dict[str, List[dict]] = {}
+        for rel in rels:
+            self.out_rels.setdefault(rel["source"], []).append(rel)
+
+    def subgraph(self, limit: int) -> tuple:
+        """前 limit 个节点及两端都在其中的关系，对应 SUBGRAPH_QUERY 的语义"""
+        nodes = self.nodes[:limit]
+        ids = {node["id"] for node in nodes}
+        rels = [rel for node in nodes for rel in self.out_rels.get(node["id"], ()) if rel["target"] in ids]
+        return nodes, rels
+
+    def stats(self) -> dict:
+        return {"nodes": len(self.nodes), "relationships": len(self.rels)}
+
+
+def _name(rng: random.Random) -> str:
+    return rng.choice(SURNAMES) + "".join(rng.choice(GIVEN) for _ in range(rng.randint(1, 2)))
+
+
+def generate(scale: str = "small", seed: int = 42) -> SyntheticGraph:
+    """
+    生成指定规模的图：
+    - 学者属于某个机构，合作关系和引用关系都按优先连接（度越高越容易被连接）生成，度分布近似幂律
+    - 每篇论文有 1~4 位作者，引用 0~10 篇更早的论文
+    - 每个学生有一位导师
+    """
+    if scale not in SCALES:
+        raise ValueError(f"未知的规模: {scale}，可选 {', '.join(SCALES)}")
+    sizes = SCALES[scale]
+    rng = random.Random(seed)
+    nodes, rels = [], []
+
+    def add_node(label: str, properties: dict) -> str:
+        node_id = f"4:bench:{len(nodes)}"
+        nodes.append({
+            "id": node_id,
+            "labels": [label],
+            "properties": properties,
+            "influence": round(rng.random() ** 3, 4),
+            "community": rng.randrange(max(1, sizes["scholars"] // 50))
+        })
+        return node_id
+
+    def add_rel(rel_type: str, source: str, target: str, properties: dict = None):
+        rels.append({"id": f"5:bench:{len(rels)}", "type": rel_type, "source": source,
+                     "target": target, "properties": properties or {}})
+
+    institutions = [add_node("Institution", {"name": f"{rng.choice(SURNAMES)}{i}大学"})
+                    for i in range(sizes["institutions"])]
+
+    scholars, attachment = [], []
+    for i in range(sizes["scholars"]):
+        institution = rng.choice(institutions)
+        scholar = add_node("Scholar", {
+            "name": f"{_name(rng)}{i}",
+            "affiliation": nodes[int(institution.rsplit(":", 1)[1])]["properties"]["name"],
+            "field": rng.choice(FIELDS),
+            "h_index": rng.randint(1, 80)
+        })
+        add_rel("AFFILIATED_WITH", scholar, institution)
+        # 优先连接：从已有的关系端点中抽样
+        for _ in range(min(len(scholars), rng.randint(1, 3))):
+            partner = rng.choice(attachment) if attachment and rng.random() < 0.8 else rng.choice(scholars)
+            if partner != scholar:
+                add_rel("COLLABORATES_WITH", scholar, partner, {"times": rng.randint(1, 10)})
+                attachment.extend((scholar, partner))
+        scholars.append(scholar)
+
+    papers, cited = [], []
+    for i in range(sizes["papers"]):
+        title = " ".join(rng.sample(TITLE_WORDS, rng.randint(3, 6)))
+        paper = add_node("Paper", {"title": f"{title} {i}", "year": rng.randint(2000, 2024),
+                                   "citations": rng.randint(0, 500)})
+        for author in rng.sample(scholars, min(len(scholars), rng.randint(1, 4))):
+            add_rel("AUTHORED", author, paper)
+        for _ in range(min(len(papers), rng.randint(0, 10))):
+            target = rng.choice(cited) if cited and rng.random() < 0.7 else rng.choice(papers)
+            add_rel("CITES", paper, target)
+            cited.append(target)
+        papers.append(paper)
+
+    for i in range(sizes["students"]):
+        student = add_node("Student", {"name": f"{_name(rng)}{i}", "degree": rng.choice(DEGREES)})
+        add_rel("SUPERVISES", rng.choice(scholars), student)
+
+    # 打乱节点顺序，避免 LIMIT 总是只取到机构
+    order = list(range(len(nodes)))
+    rng.shuffle(order)
+    return SyntheticGraph([nodes[i] for i in order], rels)
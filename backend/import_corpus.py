@@ -0,0 +1,342 @@
+# import_corpus.py
+# 离线批量导入学术语料（论文、作者、引用）到 Neo4j
+#
+# 用法示例:
+#   python import_corpus.py --authors authors.csv --papers papers.jsonl --citations citations.jsonl
+#   python import_corpus.py --papers papers.jsonl --paper-key id --workers 8 --chunk-size 10000
+#
+# 输入文件支持 JSONL（.jsonl/.ndjson/.json，每行一个对象）和 CSV（.csv，带表头）：
+#   作者: name, affiliation, field, ...
+#   论文: title (或 --paper-key 指定的字段), year, venue, citations, authors (列表或用 ; 分隔的字符串), ...
+#   引用: source, target（或 citing, cited），取值为论文的 --paper-key 字段
+#
+# 解析与归一化在进程池中并行执行，写入使用批量事务（UNWIND ... MERGE）。
+# 引用的目标论文可能在后面的块中、甚至不在导入数据中，引用关系的终点不存在时先创建只有 --paper-key 属性的占位论文，
+# 之后导入到这篇论文时会补全属性。
+# 每写完一批就把进度写入检查点文件，中断后重新执行同样的命令会从上次的位置继续。
+
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from app.core.config import Config
+from app.core.logger import configure_logging
+from app.services.graph_ingest import GraphIngestor
+from app.services.graph_schema import SCHEMA_DECLARATIONS, SchemaManager, unique_constraint
+from app.services.graph_session import SessionManager, create_driver
+
+# 导入顺序：先作者，再论文（及作者关系），最后引用
+KINDS = ("authors", "papers", "citations")
+
+
+# ---------- 读取：按块产出原始记录 ----------
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".csv":
+        return "csv"
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    raise ValueError(f"无法识别的文件格式: {path}")
+
+
+def read_chunks(path: str, fmt: str, chunk_size: int, skip: int = 0):
+    """
+    流式读取文件，每次产出 chunk_size 条原始记录（JSONL为字符串行，CSV为dict）。
+    跳过前 skip 条记录（检查点恢复）。
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        source = csv.DictReader(f) if fmt == "csv" else f
+        chunk = []
+        for index, item in enumerate(source):
+            if index < skip:
+                continue
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+# ---------- 归一化：在子进程中执行 ----------
+
+def _clean(value):
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    return value
+
+
+def _to_int(value):
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _split_names(value) -> list:
+    if isinstance(value, list):
+        names = [_clean(v.get("name") if isinstance(v, dict) else v) for v in value]
+    elif isinstance(value, str):
+        names = [_clean(v) for v in value.split(";")]
+    else:
+        names = []
+    return [name for name in names if name]
+
+
+def _props(record: dict, exclude: tuple) -> dict:
+    """只保留Neo4j支持的基本类型属性"""
+    props = {}
+    for key, value in record.items():
+        if key in exclude or not key:
+            continue
+        value = _clean(value)
+        if value is None:
+            continue
+        if isinstance(value, (str, int, float, bool)):
+            props[key] = value
+        elif isinstance(value, list) and all(isinstance(v, (str, int, float, bool)) for v in value):
+            props[key] = value
+    return props
+
+
+def normalize_chunk(kind: str, fmt: str, items: list, paper_key: str) -> dict:
+    """
+    把一块原始记录解析并归一化为待写入的行，返回:
+        {"count": 原始记录数, "errors": 解析失败数,
+         "nodes": {(标签, 唯一属性): [行]}, "relationships": {(关系类型, 起点, 终点): [行]}}
+    CITES 关系的终点按需创建（见 write_chunk），其他关系两端都在本块中写入。
+    """
+    nodes, relationships = {}, {}
+    errors = 0
+
+    for item in items:
+        if fmt == "jsonl":
+            if not item.strip():
+                continue
+            try:
+                record = json.loads(item)
+            except json.JSONDecodeError:
+                errors += 1
+                continue
+        else:
+            record = item
+        if not isinstance(record, dict):
+            errors += 1
+            continue
+
+        if kind == "authors":
+            name = _clean(record.get("name"))
+            if not name:
+                errors += 1
+                continue
+            nodes.setdefault(("Scholar", "name"), []).append(
+                {"key": name, "props": _props(record, ("name",))}
+            )
+
+        elif kind == "papers":
+            key = _clean(record.get(paper_key))
+            if key is None:
+                errors += 1
+                continue
+            props = _props(record, (paper_key, "authors", "references"))
+            for field in ("year", "citations"):
+                if field in props:
+                    props[field] = _to_int(props[field])
+            if "citations" not in props and "n_citation" in props:
+                props["citations"] = _to_int(props.pop("n_citation"))
+            nodes.setdefault(("Paper", paper_key), []).append({"key": key, "props": props})
+
+            for author in _split_names(record.get("authors")):
+                nodes.setdefault(("Scholar", "name"), []).append({"key": author, "props": {}})
+                relationships.setdefault(("AUTHORED", ("Scholar", "name"), ("Paper", paper_key)), []).append(
+                    {"source": author, "target": key, "props": {}}
+                )
+            # 论文记录里自带的引用列表
+            references = record.get("references")
+            if isinstance(references, list):
+                for cited in references:
+                    cited = _clean(cited)
+                    # 终点按需MERGE，空值会导致整批失败
+                    if cited is None:
+                        continue
+                    relationships.setdefault(("CITES", ("Paper", paper_key), ("Paper", paper_key)), []).append(
+                        {"source": key, "target": cited, "props": {}}
+                    )
+
+        elif kind == "citations":
+            source = _clean(record.get("source", record.get("citing")))
+            target = _clean(record.get("target", record.get("cited")))
+            if source is None or target is None:
+                errors += 1
+                continue
+            relationships.setdefault(("CITES", ("Paper", paper_key), ("Paper", paper_key)), []).append(
+                {"source": source, "target": target,
+                 "props": _props(record, ("source", "target", "citing", "cited"))}
+            )
+
+    return {"count": len(items), "errors": errors, "nodes": nodes, "relationships": relationships}
+
+
+def bounded_map(executor, fn, arg_iter, max_in_flight: int):
+    """按顺序产出结果的 executor.map，同时最多只有 max_in_flight 个任务在进程池中，避免一次性读入整个文件"""
+    pending = deque()
+    for args in arg_iter:
+        pending.append(executor.submit(fn, *args))
+        if len(pending) >= max_in_flight:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+# ---------- 检查点 ----------
+
+class Checkpoint:
+    """记录每个输入文件已成功写入的记录数，原子地写回磁盘"""
+
+    def __init__(self, path: str, reset: bool = False):
+        self.path = path
+        self.state = {"files": {}}
+        if not reset and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.state = json.load(f)
+
+    def _entry(self, input_path: str) -> dict:
+        return self.state["files"].setdefault(os.path.abspath(input_path), {"records": 0, "done": False})
+
+    def records(self, input_path: str) -> int:
+        return self._entry(input_path)["records"]
+
+    def done(self, input_path: str) -> bool:
+        return self._entry(input_path)["done"]
+
+    def advance(self, input_path: str, count: int, done: bool = False) -> None:
+        entry = self._entry(input_path)
+        entry["records"] += count
+        entry["done"] = done
+        entry["updated_at"] = time.time()
+        self.save()
+
+    def save(self) -> None:
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+# ---------- 写入 ----------
+
+def write_chunk(ingestor: GraphIngestor, result: dict) -> dict:
+    """写入一块归一化结果，任何一批失败都抛出异常（不推进检查点）"""
+    reports = []
+    for (label, key), rows in result["nodes"].items():
+        reports.extend(ingestor.write_nodes(label, key, rows))
+    for (rel_type, source, target), rows in result["relationships"].items():
+        # 被引用的论文可能还没有导入，终点不存在时创建占位节点，避免引用关系被丢弃
+        reports.extend(ingestor.write_relationships(rel_type, source, target, rows,
+                                                    merge_target=rel_type == "CITES"))
+    for report in reports:
+        if not report["success"]:
+            raise RuntimeError(f"批量写入 {report['batch']} 失败: {report.get('error')}")
+    return {
+        "rows": sum(report["rows"] for report in reports),
+        "nodes_created": sum(report["counters"]["nodes_created"] for report in reports),
+        "relationships_created": sum(report["counters"]["relationships_created"] for report in reports)
+    }
+
+
+def import_file(kind: str, path: str, args, executor, ingestor, checkpoint: Checkpoint) -> None:
+    if checkpoint.done(path):
+        print(f"⏭️  {path} 已导入完成，跳过（使用 --reset 重新导入）")
+        return
+
+    fmt = detect_format(path)
+    skip = checkpoint.records(path)
+    if skip:
+        print(f"🔁 从检查点恢复 {path}: 跳过前 {skip} 条记录")
+
+    started = time.perf_counter()
+    totals = {"records": 0, "errors": 0, "rows": 0, "nodes_created": 0, "relationships_created": 0}
+    chunks = ((kind, fmt, chunk, args.paper_key) for chunk in read_chunks(path, fmt, args.chunk_size, skip))
+
+    for result in bounded_map(executor, normalize_chunk, chunks, args.workers * 2):
+        if args.dry_run:
+            written = {"rows": sum(len(r) for r in result["nodes"].values())
+                       + sum(len(r) for r in result["relationships"].values()),
+                       "nodes_created": 0, "relationships_created": 0}
+        else:
+            written = write_chunk(ingestor, result)
+            checkpoint.advance(path, result["count"])
+
+        totals["records"] += result["count"]
+        totals["errors"] += result["errors"]
+        for name, value in written.items():
+            totals[name] += value
+        elapsed = time.perf_counter() - started
+        print(f"📦 {kind}: 已处理 {skip + totals['records']} 条记录, 新建 {totals['nodes_created']} 个节点、"
+              f"{totals['relationships_created']} 个关系（输入 {totals['rows']} 行, {totals['rows'] / elapsed:.0f} 行/秒）")
+
+    if not args.dry_run:
+        checkpoint.advance(path, 0, done=True)
+    elapsed = time.perf_counter() - started
+    print(f"✅ {path} 导入完成: {totals} 用时 {elapsed:.1f}s")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="离线批量导入论文、作者与引用数据到 Neo4j")
+    parser.add_argument("--authors", action="append", default=[], help="作者文件 (JSONL/CSV)，可重复指定")
+    parser.add_argument("--papers", action="append", default=[], help="论文文件 (JSONL/CSV)，可重复指定")
+    parser.add_argument("--citations", action="append", default=[], help="引用文件 (JSONL/CSV)，可重复指定")
+    parser.add_argument("--paper-key", default="title", help="论文的唯一属性，引用数据用它来指代论文（默认 title）")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="解析进程数")
+    parser.add_argument("--chunk-size", type=int, default=5000, help="每块（每次检查点）的记录数")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_BATCH_SIZE, help="每个事务写入的行数")
+    parser.add_argument("--checkpoint", default="import_checkpoint.json", help="检查点文件路径")
+    parser.add_argument("--reset", action="store_true", help="忽略已有检查点，从头导入")
+    parser.add_argument("--dry-run", action="store_true", help="只解析不写入，用于检查数据和测量解析速度")
+    parser.add_argument("--skip-schema", action="store_true", help="导入前不创建索引与约束")
+    args = parser.parse_args(argv)
+
+    if not (args.authors or args.papers or args.citations):
+        parser.error("至少需要指定 --authors、--papers 或 --citations 中的一个")
+
+    # 写入失败、索引同步等日志与服务端使用同样的级别和采样设置（LOG_LEVEL=DEBUG 时输出每批的耗时）
+    configure_logging(level=Config.LOG_LEVEL, sample_rate=Config.LOG_SAMPLE_RATE, max_length=Config.LOG_MAX_LENGTH)
+    driver = SessionManager(create_driver(Config), database=Config.NEO4J_DATABASE)
+    ingestor = GraphIngestor(driver, batch_size=args.batch_size)
+    checkpoint = Checkpoint(args.checkpoint, reset=args.reset)
+
+    # 没有唯一约束时每次 MERGE 都是按标签全量扫描，大规模导入前先建好
+    if not args.dry_run and not args.skip_schema:
+        declarations = list(SCHEMA_DECLARATIONS)
+        if args.paper_key != "title":
+            declarations.append(unique_constraint("Paper", args.paper_key))
+        SchemaManager(driver, declarations).apply()
+
+    started = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=args.workers) as executor:
+            for kind in KINDS:
+                for path in getattr(args, kind):
+                    import_file(kind, path, args, executor, ingestor, checkpoint)
+    except KeyboardInterrupt:
+        print(f"\n⏹️  导入已中断，进度已保存到 {args.checkpoint}，重新运行同样的命令即可继续")
+        return 1
+    except RuntimeError as e:
+        print(f"❌ {e}\n   进度已保存到 {args.checkpoint}，排除问题后重新运行同样的命令即可继续")
+        return 1
+    finally:
+        driver.close()
+
+    print(f"🎉 全部导入完成，用时 {time.perf_counter() - started:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
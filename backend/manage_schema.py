@@ -0,0 +1,40 @@
+# manage_schema.py
+# 管理 Neo4j 索引与约束
+#
+# 用法:
+#   python manage_schema.py apply    # 幂等地创建所有声明的索引与约束
+#   python manage_schema.py status   # 查看索引状态与填充进度
+
+import argparse
+import json
+import sys
+
+from app.core.config import Config
+from app.services.graph_schema import SchemaManager
+from app.services.graph_session import SessionManager, create_driver
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="管理 Neo4j 索引与约束")
+    parser.add_argument("command", choices=["apply", "status"])
+    args = parser.parse_args(argv)
+
+    driver = SessionManager(create_driver(Config), database=Config.NEO4J_DATABASE)
+    try:
+        manager = SchemaManager(driver)
+        if args.command == "apply":
+            results = manager.apply()
+            print(json.dumps(results, ensure_ascii=False, indent=2))
+            return 0 if all(result["success"] for result in results) else 1
+
+        status = manager.status()
+        for item in status["declared"]:
+            progress = f"{item['population_percent']:.1f}%" if item["population_percent"] is not None else "-"
+            print(f"{'✅' if item['exists'] else '❌'} {item['name']:<32} {item['state'] or 'MISSING':<12} {progress}")
+        return 0 if status["ready"] else 1
+    finally:
+        driver.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
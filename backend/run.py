@@ -1,9 +1,13 @@
-from app import create_app
+from werkzeug.serving import is_running_from_reloader
 
-app = create_app()
+from app import create_app
 
 if __name__ == '__main__':
+    # debug=True 时父进程只负责监视文件、重启真正处理请求的子进程，不启动健康检查等后台任务
+    app = create_app(start_background=is_running_from_reloader())
     # 启动Flask应用
     # debug=True 开启调试模式，修改代码后服务器会自动重启
     # port=5000 指定端口
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    app.run(debug=True, port=5000)
+else:
+    app = create_app()
@@ -0,0 +1,135 @@
+# stub_openai_server.py
+# 本地的 OpenAI 兼容桩服务器，用于在不访问真实 DeepSeek API 的情况下测试和压测后端
+#
+# 用法:
+#   python stub_openai_server.py --port 8001 --delay 0.2
+# 然后让后端指向它:
+#   DEEPSEEK_BASE_URL=http://127.0.0.1:8001 DEEPSEEK_API_KEY=sk-stub python run.py
+
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class StubState:
+    """桩服务器的共享状态：收到的请求数和当前并发数"""
+
+    def __init__(self, delay: float = 0.0, reply: str = None):
+        self.delay = delay
+        self.reply = reply
+        self.requests = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+
+def default_reply(messages: list) -> str:
+    """没有指定固定回复时，根据用户输入生成一条可执行的Cypher"""
+    user_input = messages[-1]["content"] if messages else ""
+    name = json.dumps(user_input[:50], ensure_ascii=False)
+    return f"MERGE (s:Scholar {{name: {name}}}) RETURN s"
+
+
+def make_handler(state: StubState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/chat/completions"):
+                self.send_error(404)
+                return
+
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+
+            with state.lock:
+                state.requests += 1
+                state.in_flight += 1
+                state.max_in_flight = max(state.max_in_flight, state.in_flight)
+            try:
+                if state.delay:
+                    time.sleep(state.delay)
+                content = state.reply or default_reply(body.get("messages", []))
+            finally:
+                with state.lock:
+                    state.in_flight -= 1
+
+            payload = json.dumps({
+                "id": f"chatcmpl-{uuid.uuid4().hex}",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": body.get("model", "stub"),
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+            }, ensure_ascii=False).encode("utf-8")
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            # /models 供后端健康检查使用；/stats 返回桩服务器收到的请求数和最大并发数
+            path = self.path.rstrip("/")
+            if path.endswith("/models"):
+                payload = json.dumps({
+                    "object": "list",
+                    "data": [{"id": "deepseek-chat", "object": "model", "created": 0, "owned_by": "stub"}]
+                }).encode("utf-8")
+            elif path == "/stats":
+                with state.lock:
+                    payload = json.dumps({
+                        "requests": state.requests,
+                        "in_flight": state.in_flight,
+                        "max_in_flight": state.max_in_flight
+                    }).encode("utf-8")
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_stub_server(host: str = "127.0.0.1", port: int = 0, delay: float = 0.0, reply: str = None):
+    """在后台线程中启动桩服务器，返回 (server, state)；port=0 时自动分配端口"""
+    state = StubState(delay=delay, reply=reply)
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI 兼容的本地桩服务器")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="每个请求的模拟延迟（秒）")
+    parser.add_argument("--reply", default=None, help="固定的回复内容，不指定时根据输入生成MERGE语句")
+    args = parser.parse_args()
+
+    state = StubState(delay=args.delay, reply=args.reply)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    print(f"🧪 桩服务器已启动: http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
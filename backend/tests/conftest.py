@@ -0,0 +1,134 @@
+# tests/conftest.py
+# 单元测试不连接 Neo4j：使用 benchmarks/fake_neo4j.py 中的驱动替身和 benchmarks/synthetic.py 中的合成图
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (BACKEND_DIR, os.path.join(BACKEND_DIR, "benchmarks")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from fake_neo4j import FakeDriver  # noqa: E402
+import synthetic  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def small_graph():
+    return synthetic.generate("small")
+
+
+@pytest.fixture
+def graph_driver(small_graph):
+    """从合成图回答子图查询的驱动替身"""
+    return FakeDriver(small_graph)
+
+
+class GraphResponder:
+    """
+    按合成图回答 GraphService 的分页、路径和邻域查询（FakeDriver 的 responder），
+    calls 记录每次查询的 (查询名, 参数)
+    """
+
+    def __init__(self, graph):
+        from app.services.graph_service import GraphService
+
+        self.graph = graph
+        self.calls = []
+        self.adjacent = {}
+        for rel in graph.rels:
+            self.adjacent.setdefault(rel["source"], []).append((rel, rel["target"]))
+            self.adjacent.setdefault(rel["target"], []).append((rel, rel["source"]))
+        self.handlers = {
+            GraphService.PAGE_SCAN_QUERY.format(label=""): ("scan", self._scan),
+            GraphService.PAGE_LINKS_QUERY: ("links", self._links),
+            GraphService.RESOLVE_NODE_QUERY: ("resolve", self._resolve),
+            GraphService.EXPAND_QUERY: ("expand", self._expand),
+            GraphService.NODES_BY_ID_QUERY: ("nodes", self._nodes),
+        }
+
+    def __call__(self, query: str, parameters: dict):
+        name, handler = self.handlers.get(query, (None, None))
+        if handler is None:
+            return [], [], None
+        self.calls.append((name, parameters))
+        keys, rows = handler(parameters)
+        return keys, rows, None
+
+    def names(self, name: str) -> list:
+        return [parameters for called, parameters in self.calls if called == name]
+
+    @staticmethod
+    def _rel_row(rel) -> tuple:
+        return rel["id"], rel["type"], rel["source"], rel["target"], rel["properties"]
+
+    def _node_row(self, node_id) -> tuple:
+        node = self.graph.by_id[node_id]
+        return node["id"], node["labels"], node["properties"]
+
+    def _scan(self, parameters):
+        after, limit = parameters["after"], parameters["limit"]
+        ids = sorted(node["id"] for node in self.graph.nodes)
+        page = [node_id for node_id in ids if after is None or node_id > after][:limit]
+        return ["id", "labels", "properties"], [self._node_row(node_id) for node_id in page]
+
+    def _links(self, parameters):
+        page, known = set(parameters["page_ids"]), set(parameters["known_ids"])
+        rows = {}
+        for node_id in page:
+            for rel, other in self.adjacent.get(node_id, ()):
+                if other in page or other in known:
+                    rows[rel["id"]] = self._rel_row(rel)
+        return ["id", "type", "source", "target", "properties"], list(rows.values())
+
+    def _resolve(self, parameters):
+        key = parameters["key"]
+        for node in self.graph.nodes:
+            if node["id"] == key or key in (node["properties"].get("name"), node["properties"].get("title")):
+                return ["id"], [(node["id"],)]
+        return ["id"], []
+
+    def _expand(self, parameters):
+        types, fanout = parameters["types"], parameters["fanout"]
+        rows = []
+        for node_id in parameters["frontier"]:
+            matched = [(rel, other) for rel, other in self.adjacent.get(node_id, ())
+                       if types is None or rel["type"] in types][:fanout]
+            rows.extend((node_id, other) + self._rel_row(rel) for rel, other in matched)
+        return ["from", "neighbor", "id", "type", "source", "target", "properties"], rows
+
+    def _nodes(self, parameters):
+        return ["id", "labels", "properties"], [self._node_row(node_id) for node_id in parameters["ids"]
+                                                if node_id in self.graph.by_id]
+
+
+@pytest.fixture
+def responder(small_graph):
+    return GraphResponder(small_graph)
+
+
+@pytest.fixture
+def responder_driver(responder):
+    return FakeDriver(responder=responder)
+
+
+@pytest.fixture
+def make_app():
+    """创建不启动后台任务的应用，并把服务的驱动替换为给定的替身"""
+
+    def build(driver, **config):
+        from app import create_app
+        from app.routes import api as api_routes
+        from app.services.graph_session import SessionManager
+
+        app = create_app(start_background=False)
+        app.config.update(TESTING=True, **config)
+        sessions = SessionManager(driver)
+        service = api_routes.graph_service
+        service.driver = service.ingestor.driver = service.schema.driver = sessions
+        if service.governor is not None:
+            service.governor.driver = sessions
+        return app
+
+    return build
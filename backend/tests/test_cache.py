@@ -0,0 +1,46 @@
+# tests/test_cache.py
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_get_drops_expired_entries():
+    cache = TTLCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.05)
+    assert cache.get("a", "missing") == "missing"
+    assert len(cache) == 0
+
+
+def test_pop_drops_expired_entries():
+    cache = TTLCache(ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.05)
+    assert cache.pop("a") is None
+    assert len(cache) == 0
+
+
+def test_pop_removes_live_entry():
+    cache = TTLCache(ttl=60)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a", "gone") == "gone"
+
+
+def test_stats_count_hits_and_misses():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hit_rate"]) == (1, 1, 0.5)
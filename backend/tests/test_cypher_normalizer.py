@@ -0,0 +1,55 @@
+# tests/test_cypher_normalizer.py
+import pytest
+
+from app.services.cypher_normalizer import parameterize
+
+
+def test_extracts_string_and_number_literals():
+    query, params = parameterize('MERGE (s:Student {name: "张三", year: 2023})')
+    assert query == "MERGE (s:Student {name: $lit0, year: $lit1})"
+    assert params == {"lit0": "张三", "lit1": 2023}
+
+
+def test_layout_and_values_do_not_change_the_text():
+    first, _ = parameterize("MATCH (n:Scholar)\n  WHERE n.name = 'A'  // 注释\nRETURN n")
+    second, _ = parameterize("MATCH (n:Scholar) WHERE n.name = 'B' /* 另一个 */ RETURN n")
+    assert first == second == "MATCH (n:Scholar) WHERE n.name = $lit0 RETURN n"
+
+
+def test_equal_literals_share_a_parameter():
+    query, params = parameterize("MATCH (a {x: 1}), (b {x: 1, y: '1'}) RETURN a, b")
+    assert query == "MATCH (a {x: $lit0}), (b {x: $lit0, y: $lit1}) RETURN a, b"
+    assert params == {"lit0": 1, "lit1": "1"}
+
+
+def test_existing_parameters_are_kept_and_not_shadowed():
+    query, params = parameterize("MATCH (n {name: $lit0}) WHERE n.age > 30 RETURN n")
+    assert query == "MATCH (n {name: $lit0}) WHERE n.age > $lit1 RETURN n"
+    assert params == {"lit1": 30}
+
+
+def test_escapes_are_decoded():
+    _, params = parameterize(r"RETURN 'it\'s 中\n'")
+    assert params == {"lit0": "it's 中\n"}
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (a)-[:SUPERVISES*1..3]->(b) RETURN b",
+    "MATCH (n) RETURN n.`name 2`, true, null",
+    "CALL { MATCH (n) RETURN n } IN TRANSACTIONS OF 100 ROWS",
+    "MATCH p = SHORTEST 2 (a)-->+(b) RETURN p",
+    "RETURN 0x1F",
+])
+def test_syntax_literals_are_kept(query):
+    assert parameterize(query) == (query, {})
+
+
+def test_admin_commands_are_not_touched():
+    query = "CREATE INDEX scholar_name IF NOT EXISTS FOR (n:Scholar) ON (n.name) OPTIONS {indexConfig: {}}"
+    assert parameterize(f"  {query} ") == (query, {})
+
+
+def test_large_integers_and_floats():
+    query, params = parameterize("RETURN 1.5, 1e3, 99999999999999999999")
+    assert query == "RETURN $lit0, $lit1, 99999999999999999999"
+    assert params == {"lit0": 1.5, "lit1": 1000.0}
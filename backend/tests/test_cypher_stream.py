@@ -0,0 +1,49 @@
+# tests/test_cypher_stream.py
+import json
+
+import pytest
+
+from fake_neo4j import FakeDriver
+
+
+def numbers(query, parameters):
+    """任何查询都返回 0..99 共100行"""
+    return ["x"], [(i,) for i in range(100)], None
+
+
+@pytest.fixture
+def client(make_app):
+    return make_app(FakeDriver(responder=numbers), CYPHER_STREAM_MAX_ROWS=50).test_client()
+
+
+def stream(client, **body):
+    response = client.post('/api/cypher', json={"query": "UNWIND range(0, 99) AS x RETURN x", "stream": True, **body})
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    return response, lines
+
+
+def test_stream_is_ndjson_with_header_rows_and_summary(client):
+    response, lines = stream(client, max_rows=10)
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert lines[0] == {"type": "header", "keys": ["x"]}
+    assert [line["data"]["x"] for line in lines[1:-1]] == list(range(10))
+    assert lines[-1]["type"] == "summary" and lines[-1]["summary"]["truncated"]
+
+
+def test_max_rows_is_capped_by_config(client):
+    _, lines = stream(client, max_rows=10_000)
+    assert len(lines) - 2 == 50
+
+
+def test_missing_max_rows_uses_the_limit(client):
+    _, lines = stream(client)
+    assert len(lines) - 2 == 50
+
+
+@pytest.mark.parametrize("max_rows", ["abc", 0, -3, [1]])
+def test_invalid_max_rows_is_rejected(client, max_rows):
+    response = client.post('/api/cypher', json={"query": "RETURN 1", "stream": True, "max_rows": max_rows})
+    assert response.status_code == 400
+    body = response.get_json()
+    assert body["success"] is False and body["data"] == [] and body["summary"] == {}
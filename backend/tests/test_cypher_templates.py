@@ -0,0 +1,55 @@
+# tests/test_cypher_templates.py
+import pytest
+
+from app.services.cypher_templates import to_unwind, validate_statement
+
+
+def test_to_unwind_reads_parameters_from_each_row():
+    query = to_unwind("MERGE (s:Scholar {name: $name}) SET s.affiliation = $affiliation")
+    assert query == (
+        "UNWIND $rows AS _row\n"
+        "CALL {\n    WITH _row\n"
+        "    MERGE (s:Scholar {name: _row.`name`}) SET s.affiliation = _row.`affiliation`\n"
+        "}\n"
+        "RETURN count(*) AS rows"
+    )
+
+
+def test_to_unwind_drops_trailing_return():
+    query = to_unwind("MERGE (a:Scholar {name: $a}) MERGE (b:Student {name: $b}) "
+                      "MERGE (a)-[r:SUPERVISES]->(b) RETURN a, r, b")
+    assert "RETURN a" not in query
+    assert "MERGE (a)-[r:SUPERVISES]->(b)\n}" in query
+    assert query.endswith("RETURN count(*) AS rows")
+
+
+def test_to_unwind_keeps_the_clauses_before_the_final_return():
+    query = to_unwind("MATCH (a {name: $a}) WITH a MERGE (b {name: $b}) RETURN b")
+    assert "WITH a MERGE (b {name: _row.`b`})\n}" in query
+
+
+def test_validate_statement_normalizes_and_keeps_referenced_params():
+    query, params = validate_statement({
+        "query": "MERGE (s:Scholar {name: $name})\n  SET s.fields = $fields;",
+        "params": {"name": "张三", "fields": ["AI", "NLP"], "unused": 1}
+    })
+    assert query == "MERGE (s:Scholar {name: $name}) SET s.fields = $fields"
+    assert params == {"name": "张三", "fields": ["AI", "NLP"]}
+
+
+@pytest.mark.parametrize("statement, message", [
+    ("MERGE (n)", "对象"),
+    ({"query": "  "}, "不能为空"),
+    ({"query": "MERGE (n {name: 'x'})"}, "字符串字面量"),
+    ({"query": "MATCH (n) DETACH DELETE n"}, "DETACH"),
+    ({"query": "MERGE (n) WITH n CALL apoc.do.it(n)"}, "CALL"),
+    ({"query": "MATCH (n {name: $name}) RETURN n", "params": {"name": "x"}}, "写入语句"),
+    ({"query": "MERGE (n {name: $name}); MATCH (m) DELETE m"}, "DELETE|一个查询"),
+    ({"query": "MERGE (n {name: $name})"}, "缺少参数: name"),
+    ({"query": "MERGE (n {name: $name})", "params": {"name": [{"a": 1}]}}, "列表元素"),
+    ({"query": "MERGE (n {name: $name})", "params": {"name": {"a": {"b": 1}}}}, "类型不支持"),
+    ({"query": "UNWIND $rows AS _row MERGE (n {name: _row.name})", "params": {"rows": []}}, "_row"),
+])
+def test_validate_statement_rejects(statement, message):
+    with pytest.raises(ValueError, match=message):
+        validate_statement(statement)
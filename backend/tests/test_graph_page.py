@@ -0,0 +1,52 @@
+# tests/test_graph_page.py
+import time
+
+import pytest
+
+from app.services.graph_service import GraphService
+
+
+def load_all(service, page_size):
+    pages, cursor = [], None
+    while True:
+        page = service.get_graph_page(cursor=cursor, page_size=page_size)
+        pages.append(page)
+        cursor = page["cursor"]
+        if not page["has_more"]:
+            return pages
+
+
+def test_scan_pages_cover_every_node_once(responder_driver, small_graph):
+    pages = load_all(GraphService(responder_driver), page_size=300)
+    ids = [node["_internal_id"] for page in pages for node in page["nodes"]]
+    assert len(ids) == len(set(ids)) == len(small_graph.nodes)
+    links = {link["_relationship_id"] for page in pages for link in page["links"]}
+    assert len(links) == len(small_graph.rels)
+
+
+def test_page_size_is_clamped(responder_driver, responder):
+    service = GraphService(responder_driver, max_page_size=25)
+    page = service.get_graph_page(page_size=10_000)
+    assert len(page["nodes"]) == 25
+    assert responder.names("scan")[0]["limit"] == 25
+
+
+def test_non_positive_page_size_is_rejected(responder_driver):
+    with pytest.raises(ValueError):
+        GraphService(responder_driver).get_graph_page(page_size=0)
+
+
+def test_expired_cursor_is_rejected(responder_driver):
+    service = GraphService(responder_driver, cursor_ttl=0.01)
+    page = service.get_graph_page(page_size=10)
+    time.sleep(0.05)
+    with pytest.raises(ValueError):
+        service.get_graph_page(cursor=page["cursor"], page_size=10)
+
+
+def test_cursor_is_single_use(responder_driver):
+    service = GraphService(responder_driver)
+    page = service.get_graph_page(page_size=10)
+    service.get_graph_page(cursor=page["cursor"], page_size=10)
+    with pytest.raises(ValueError):
+        service.get_graph_page(cursor=page["cursor"], page_size=10)
@@ -0,0 +1,35 @@
+# tests/test_graph_snapshot.py
+from app.services.graph_service import GraphService
+
+
+def test_subgraph_is_fetched_in_one_round_trip(graph_driver):
+    service = GraphService(graph_driver)
+    data = service.get_graph_for_echarts(200)
+
+    assert graph_driver.queries == 1
+    assert len(data["nodes"]) == 200
+    assert data["links"]
+    node_ids = {node["_internal_id"] for node in data["nodes"]}
+    for link in data["links"]:
+        assert link["_start_node_id"] in node_ids
+        assert link["_end_node_id"] in node_ids
+
+
+def test_snapshot_is_cached_until_a_write(graph_driver):
+    service = GraphService(graph_driver)
+    first, etag = service.get_graph_snapshot(100)
+    again, again_etag = service.get_graph_snapshot(100)
+    assert graph_driver.queries == 1
+    assert again is first and again_etag == etag
+
+    service.invalidate_graph_cache()
+    service.get_graph_snapshot(100)
+    assert graph_driver.queries == 2
+
+
+def test_projected_properties_keep_the_display_name(graph_driver):
+    service = GraphService(graph_driver)
+    data = service.get_graph_for_echarts(50, node_properties=["affiliation"])
+    for node in data["nodes"]:
+        assert node["name"]
+        assert "h_index" not in node
@@ -0,0 +1,72 @@
+# tests/test_query_governor.py
+import pytest
+
+from fake_neo4j import FakeDriver
+
+from app.services.cypher_normalizer import accepts_trailing_limit
+from app.services.query_governor import QueryGovernor, QueryRejectedError
+
+
+def plan(result_rows=50_000.0, max_rows=None, query_type="r", operators=("ProduceResults", "NodeByLabelScan")):
+    return {
+        "query_type": query_type,
+        "result_rows": result_rows,
+        "max_estimated_rows": max_rows if max_rows is not None else result_rows,
+        "operators": list(operators)
+    }
+
+
+@pytest.fixture
+def governor():
+    return QueryGovernor(FakeDriver(responder=lambda text, params: ([], [], None)),
+                         max_estimated_rows=1_000_000, max_rows=100)
+
+
+def test_appends_limit_to_return_of_properties(governor):
+    query, rewritten = governor.check("MATCH (n:Scholar) RETURN n.name, n.affiliation;", plan())
+    assert rewritten
+    assert query == "MATCH (n:Scholar) RETURN n.name, n.affiliation\nLIMIT 100"
+
+
+def test_appends_limit_after_order_by(governor):
+    query, rewritten = governor.check("MATCH (n) RETURN n ORDER BY n.name SKIP 10", plan())
+    assert rewritten and query.endswith("SKIP 10\nLIMIT 100")
+
+
+@pytest.mark.parametrize("query", [
+    "MATCH (n) RETURN n LIMIT 5",
+    "MATCH (n:Scholar) RETURN n.name AS name UNION MATCH (n:Paper) RETURN n.title AS name",
+    "CALL db.labels()",
+    "MATCH (n) CALL { WITH n RETURN n.name AS name } RETURN name LIMIT 10",
+    "MATCH (n) RETURN n; MATCH (m) RETURN m",
+])
+def test_keeps_queries_that_cannot_take_a_trailing_limit(governor, query):
+    assert governor.check(query, plan()) == (query, False)
+
+
+def test_keeps_small_and_write_queries(governor):
+    query = "MATCH (n) RETURN n"
+    assert governor.check(query, plan(result_rows=10)) == (query, False)
+    assert governor.check(query, plan(query_type="rw")) == (query, False)
+    assert governor.check(query, plan(), rewrite=False) == (query, False)
+    assert governor.check(query, None) == (query, False)
+
+
+def test_rejects_plans_above_the_estimate_limit(governor):
+    with pytest.raises(QueryRejectedError, match="笛卡尔积"):
+        governor.check("MATCH (a), (b) RETURN a, b LIMIT 1",
+                       plan(result_rows=1, max_rows=5_000_000, operators=("CartesianProduct",)))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("MATCH (n) RETURN n", True),
+    ("MATCH (n) RETURN n;", True),
+    ("MATCH (n) RETURN n.limit", True),
+    ("MATCH (n) RETURN n // 末尾注释", True),
+    ("MATCH (n) WITH n LIMIT 10 RETURN n", True),
+    ("MATCH (n) RETURN n LIMIT 10", False),
+    ("MATCH (n) SET n.x = 1", False),
+    ("MATCH (n) RETURN n; // 注释", False),
+])
+def test_accepts_trailing_limit(query, expected):
+    assert accepts_trailing_limit(query) is expected
@@ -0,0 +1,87 @@
+# tests/test_traversal.py
+from collections import deque
+
+import pytest
+
+from app.services.graph_service import GraphService
+
+HUB = "4:bench:220"
+
+
+def distance(graph, source, target):
+    """无向图上的BFS距离，作为对照"""
+    adjacent = {}
+    for rel in graph.rels:
+        adjacent.setdefault(rel["source"], set()).add(rel["target"])
+        adjacent.setdefault(rel["target"], set()).add(rel["source"])
+    seen, queue = {source: 0}, deque([source])
+    while queue:
+        node = queue.popleft()
+        for other in adjacent.get(node, ()):
+            if other not in seen:
+                seen[other] = seen[node] + 1
+                queue.append(other)
+    return seen.get(target)
+
+
+def test_neighborhood_fanout_and_size_are_clamped(responder_driver, responder):
+    service = GraphService(responder_driver, max_fanout=20, max_traversal_nodes=50)
+    data = service.get_neighborhood(HUB, depth=3, fanout=10_000, max_nodes=10_000)
+    assert all(call["fanout"] == 20 for call in responder.names("expand"))
+    assert len(data["nodes"]) == 50
+    assert data["truncated"] is True
+
+
+def test_neighborhood_within_limits_is_complete(responder_driver, small_graph):
+    service = GraphService(responder_driver)
+    seed = next(node["id"] for node in small_graph.nodes if node["id"] != HUB)
+    data = service.get_neighborhood(seed, depth=1, fanout=1000, max_nodes=1000)
+    expected = {seed} | {rel["target"] for rel in small_graph.rels if rel["source"] == seed} \
+        | {rel["source"] for rel in small_graph.rels if rel["target"] == seed}
+    assert {node["_internal_id"] for node in data["nodes"]} == expected
+    assert data["truncated"] is False
+
+
+def test_shortest_path_matches_bfs_distance(responder_driver, small_graph):
+    service = GraphService(responder_driver)
+    source, target = small_graph.nodes[0]["id"], small_graph.nodes[-1]["id"]
+    data = service.get_shortest_path(source, target)
+    assert data["found"] is True
+    assert data["length"] == distance(small_graph, source, target)
+    assert len(data["path"]) == data["length"] + 1
+
+
+def test_shortest_path_fanout_and_frontier_are_clamped(responder_driver, responder, small_graph):
+    service = GraphService(responder_driver, max_fanout=2, max_frontier=3)
+    source, target = small_graph.nodes[0]["id"], small_graph.nodes[-1]["id"]
+    service.get_shortest_path(source, target, fanout=10_000, max_frontier=10_000)
+    calls = responder.names("expand")
+    assert calls and all(call["fanout"] == 2 for call in calls)
+    assert all(len(call["frontier"]) <= 3 for call in calls)
+
+
+@pytest.fixture
+def client(make_app, responder_driver):
+    return make_app(responder_driver).test_client()
+
+
+@pytest.mark.parametrize("url", [
+    f"/api/neighborhood?seed={HUB}&fanout=0",
+    f"/api/neighborhood?seed={HUB}&max_nodes=-5",
+    f"/api/neighborhood?seed={HUB}&depth=0",
+    f"/api/path?source={HUB}&target={HUB}&fanout=-1",
+    f"/api/path?source={HUB}&target={HUB}&max_depth=0",
+])
+def test_non_positive_limits_are_rejected(client, url):
+    response = client.get(url)
+    assert response.status_code == 400
+    assert response.get_json()["status"] == "error"
+
+
+def test_neighborhood_endpoint_applies_server_limits(make_app, responder_driver):
+    from app.routes import api as api_routes
+
+    client = make_app(responder_driver).test_client()
+    api_routes.graph_service.max_traversal_nodes = 30
+    data = client.get(f"/api/neighborhood?seed={HUB}&max_nodes=100000").get_json()
+    assert len(data["nodes"]) == 30 and data["truncated"] is True
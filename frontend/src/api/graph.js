@@ -9,15 +9,229 @@ const apiClient = axios.create({
   },
 });
 
-export const getGraphData = async () => {
+// 紧凑格式的媒体类型，与后端 graph_codec.COMPACT_JSON_MIMETYPE 一致
+const COMPACT_GRAPH_MIMETYPE = 'application/vnd.rhizome.graph+json';
+
+// 把后端返回的列式紧凑格式还原为ECharts需要的 {nodes, links, categories}
+// 紧凑格式不包含属性内容，节点的 _internal_id 可用于按需获取详情
+export const decodeCompactGraph = (payload) => {
+  const { nodes: columns, links: linkColumns, categories, link_types: linkTypes } = payload;
+  const nodes = columns.id.map((id, i) => {
+    const node = {
+      id: columns.name[i],
+      name: columns.name[i],
+      category: categories[columns.category[i]] ?? 'Unknown',
+      symbolSize: columns.symbolSize[i],
+      _internal_id: id,
+    };
+    if (columns.x) {
+      node.x = columns.x[i];
+      node.y = columns.y[i];
+    }
+    return node;
+  });
+  const links = linkColumns.source.map((source, i) => ({
+    source: nodes[source].name,
+    target: nodes[linkColumns.target[i]].name,
+    name: linkTypes[linkColumns.type[i]],
+    type: linkTypes[linkColumns.type[i]],
+  }));
+  return {
+    nodes,
+    links,
+    categories: categories.map(name => ({ name })),
+    layout: payload.layout,
+  };
+};
+
+// options.limit: 节点数量上限；options.layout: 为true时由后端计算节点坐标
+// options.compact: 为true时请求紧凑格式（体积小一个数量级，但不含节点属性）
+// options.properties: 只返回这些节点属性（完整属性用 getNodeDetail 按需获取）
+export const getGraphData = async ({ limit = null, layout = false, compact = false, properties = null } = {}) => {
   try {
+    const params = {};
+    if (limit) params.limit = limit;
+    if (layout) params.layout = 'server';
+    if (properties) params.properties = properties.join(',');
+    const headers = compact ? { Accept: COMPACT_GRAPH_MIMETYPE } : {};
     // 请求的地址直接写 /api/graph-data 即可
-    const response = await apiClient.get('/api/graph-data');
+    const response = await apiClient.get('/api/graph-data', { params, headers });
+    const data = compact ? decodeCompactGraph(response.data) : response.data;
+    // 这份数据对应的图版本，用于订阅之后的变更（见 subscribeGraphChanges）
+    data.version = Number(response.headers['x-graph-version'] ?? 0);
+    data.epoch = response.headers['x-graph-epoch'] ?? null;
     // 在控制台打印返回的数据，方便调试
-    console.log('从后端获取的图谱数据:', response.data);
-    return response.data;
+    console.log('从后端获取的图谱数据:', data);
+    return data;
   } catch (error) {
     console.error('获取图谱数据失败:', error);
     throw error;
   }
-};
\ No newline at end of file
+};
+
+// 分页获取图数据：每页只包含新节点，以及它们与已加载节点之间的关系
+// options: { cursor, pageSize, mode: 'scan' | 'bfs', label, seed }
+export const getGraphPage = async ({ cursor = null, pageSize = 50, mode = 'scan', label = null, seed = null } = {}) => {
+  const params = { page_size: pageSize };
+  if (cursor) {
+    params.cursor = cursor;
+  } else {
+    params.mode = mode;
+    if (label) params.label = label;
+    if (seed) params.seed = seed;
+  }
+  const response = await apiClient.get('/api/graph-data/page', { params });
+  return response.data;
+};
+
+// 增量加载整个图：每拿到一页就回调 onPage(page)，返回合并后的完整数据
+// maxPages 用来限制最多加载的页数
+export const loadGraphIncrementally = async (onPage, options = {}, maxPages = Infinity) => {
+  const merged = { nodes: [], links: [], categories: [] };
+  const categoryNames = new Set();
+  let cursor = null;
+  let pages = 0;
+
+  do {
+    const page = await getGraphPage({ ...options, cursor });
+    merged.nodes.push(...page.nodes);
+    merged.links.push(...page.links);
+    for (const category of page.categories) {
+      if (!categoryNames.has(category.name)) {
+        categoryNames.add(category.name);
+        merged.categories.push(category);
+      }
+    }
+    if (onPage) onPage(page, merged);
+    cursor = page.has_more ? page.cursor : null;
+    pages += 1;
+  } while (cursor && pages < maxPages);
+
+  return merged;
+};
+
+// 获取单个节点的完整属性（悬停或点击时按需加载）
+export const getNodeDetail = async (elementId) => {
+  const response = await apiClient.get(`/api/node/${encodeURIComponent(elementId)}`);
+  return response.data;
+};
+
+// 查找两个节点之间的最短路径（source/target 可以是elementId、学者姓名或论文标题）
+// options: { maxDepth, types: ['COLLABORATES_WITH', ...], layout }
+export const getShortestPath = async (source, target, { maxDepth = null, types = null, layout = false } = {}) => {
+  const params = { source, target };
+  if (maxDepth) params.max_depth = maxDepth;
+  if (types) params.types = types.join(',');
+  if (layout) params.layout = 'server';
+  const response = await apiClient.get('/api/path', { params });
+  return response.data;
+};
+
+// 获取节点的k跳邻域（ego网络）
+// options: { depth, types, maxNodes, layout }
+export const getNeighborhood = async (seed, { depth = 2, types = null, maxNodes = null, layout = false } = {}) => {
+  const params = { seed, depth };
+  if (types) params.types = types.join(',');
+  if (maxNodes) params.max_nodes = maxNodes;
+  if (layout) params.layout = 'server';
+  const response = await apiClient.get('/api/neighborhood', { params });
+  return response.data;
+};
+
+// 搜索学者、论文、学生和机构（输入联想），支持前缀、拼音和拼写错误的模糊匹配
+// 返回 [{ id, label, name, matched_field, score, ... }]，id 可直接作为 getNeighborhood 的 seed
+export const searchEntities = async (q, { limit = 10, labels = null } = {}) => {
+  const params = { q, limit };
+  if (labels) params.labels = labels.join(',');
+  const response = await apiClient.get('/api/search', { params });
+  return response.data.results;
+};
+
+// 把变更流中的一个增量合并到图数据中，返回新的 {nodes, links, categories}，不重新请求整个图：
+// - 节点按 _internal_id 新增或替换，保留已有坐标；后端已计算布局时，新节点放在与它相连的已有节点旁边
+// - 连线按 _relationship_id 新增或替换，source/target 按端点的 _internal_id 对应到节点名称，端点不在图中的连线丢弃
+// - metrics（图指标重新计算）只更新已有节点的大小、分类等字段
+export const applyGraphDelta = (graph, delta) => {
+  const nodes = graph.nodes.slice();
+  const nodeIndex = new Map(nodes.map((node, i) => [node._internal_id, i]));
+  for (const metric of delta.metrics || []) {
+    const i = nodeIndex.get(metric._internal_id);
+    if (i !== undefined) {
+      nodes[i] = { ...nodes[i], ...metric };
+    }
+  }
+  for (const node of delta.nodes) {
+    const i = nodeIndex.get(node._internal_id);
+    if (i === undefined) {
+      nodeIndex.set(node._internal_id, nodes.length);
+      nodes.push({ ...node });
+    } else {
+      const { x, y } = nodes[i];
+      nodes[i] = x === undefined ? { ...node } : { ...node, x, y };
+    }
+  }
+  const names = new Map(nodes.map(node => [node._internal_id, node.name]));
+
+  const links = graph.links.slice();
+  const linkIndex = new Map(links.map((link, i) => [link._relationship_id, i]));
+  for (const link of delta.links) {
+    const source = names.get(link._start_node_id);
+    const target = names.get(link._end_node_id);
+    if (source === undefined || target === undefined) continue;
+    const merged = { ...link, source, target };
+    const i = linkIndex.get(link._relationship_id);
+    if (i === undefined) {
+      linkIndex.set(link._relationship_id, links.length);
+      links.push(merged);
+    } else {
+      links[i] = merged;
+    }
+  }
+
+  if (graph.layout === 'none') {
+    placeNewNodes(nodes, links);
+  }
+
+  const categories = graph.categories.slice();
+  const categoryNames = new Set(categories.map(category => category.name));
+  for (const node of [...delta.nodes, ...(delta.metrics || [])]) {
+    if (node.category !== undefined && !categoryNames.has(node.category)) {
+      categoryNames.add(node.category);
+      categories.push({ name: node.category });
+    }
+  }
+  return { ...graph, nodes, links, categories, version: delta.version };
+};
+
+// 给没有坐标的节点一个位置：相连的已有节点旁边，没有相连节点时放在图的中心附近
+const placeNewNodes = (nodes, links) => {
+  const byName = new Map(nodes.map(node => [node.name, node]));
+  const placed = nodes.filter(node => node.x !== undefined);
+  const center = placed.length
+    ? { x: placed.reduce((sum, n) => sum + n.x, 0) / placed.length, y: placed.reduce((sum, n) => sum + n.y, 0) / placed.length }
+    : { x: 0, y: 0 };
+  for (const node of nodes) {
+    if (node.x !== undefined) continue;
+    const neighbor = links
+      .map(link => (link.source === node.name ? byName.get(link.target) : link.target === node.name ? byName.get(link.source) : null))
+      .find(other => other && other.x !== undefined);
+    const anchor = neighbor || center;
+    const angle = Math.random() * 2 * Math.PI;
+    node.x = anchor.x + 60 * Math.cos(angle);
+    node.y = anchor.y + 60 * Math.sin(angle);
+  }
+};
+
+// 订阅图数据变更（Server-Sent Events），断线时浏览器会自动重连并从上次的版本继续
+// from: getGraphData 返回的数据（带 version/epoch）
+// onDelta(delta): 收到一个版本的增量，用 applyGraphDelta 合并
+// onReset(): 增量不完整（例如有删除）或版本已过旧，需要重新获取图数据
+// 返回取消订阅的函数
+export const subscribeGraphChanges = ({ version, epoch }, { onDelta, onReset }) => {
+  const params = new URLSearchParams({ since: version });
+  if (epoch) params.set('epoch', epoch);
+  const source = new EventSource(`/api/graph/changes/stream?${params}`);
+  source.addEventListener('delta', event => onDelta(JSON.parse(event.data)));
+  source.addEventListener('reset', () => onReset());
+  return () => source.close();
+};